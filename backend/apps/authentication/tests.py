@@ -1,3 +1,62 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
-# Create your tests here.
+from .authentication import CachedJWTAuthentication, user_cache
+from .models import UserAccount
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = UserAccount.objects.create_user(
+            'inspector@ips.pe', 'pw12345678', username='inspector', first_name='Ana', last_name='Diaz', role='inspector',
+        )
+        self.token = str(AccessToken.for_user(self.user))
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'JWT {self.token}')
+        return CachedJWTAuthentication().authenticate(Request(request))[0]
+
+    def cached(self):
+        return user_cache.get(str(self.user.pk))
+
+    def test_cached_user_has_no_deferred_fields(self):
+        self.authenticate()
+        with CaptureQueriesContext(connection) as queries:
+            user = self.authenticate()
+            self.assertEqual((user.email, user.username, user.first_name, user.role), (
+                'inspector@ips.pe', 'inspector', 'Ana', 'inspector',
+            ))
+            self.assertEqual(user.get_deferred_fields(), set())
+        self.assertEqual(len(queries), 0)
+
+    def test_saving_the_user_invalidates_the_cache(self):
+        self.authenticate()
+        self.user.role = 'admin'
+        self.user.save()
+        self.assertIsNone(self.cached())
+        self.assertEqual(self.authenticate().role, 'admin')
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deleting_the_user_invalidates_the_cache(self):
+        self.authenticate()
+        self.user.delete()
+        self.assertIsNone(self.cached())
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_blacklisting_a_token_invalidates_the_cache(self):
+        self.authenticate()
+        self.assertIsNotNone(self.cached())
+        RefreshToken.for_user(self.user).blacklist()
+        self.assertIsNone(self.cached())
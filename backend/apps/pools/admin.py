@@ -1,8 +1,23 @@
 from django.contrib import admin
-from .models import Pool
+from .models import Inspection, Pool, PoolImage
 
 @admin.register(Pool)
 class PoolAdmin(admin.ModelAdmin):
     list_display = ('file_number', 'legal_name', 'commercial_name', 'state', 'current_state', 'district')
     search_fields = ('file_number', 'legal_name', 'commercial_name', 'district')
-    list_filter = ('state', 'current_state', 'district')
\ No newline at end of file
+    list_filter = ('state', 'current_state', 'district')
+
+
+@admin.register(Inspection)
+class InspectionAdmin(admin.ModelAdmin):
+    list_display = ('pool', 'inspection_date', 'verdict', 'free_chlorine', 'ph', 'turbidity', 'inspector')
+    list_filter = ('verdict', 'district')
+    date_hierarchy = 'inspection_date'
+    raw_id_fields = ('pool', 'inspector')
+
+
+@admin.register(PoolImage)
+class PoolImageAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'format', 'width', 'height', 'size_bytes', 'status', 'created_at')
+    list_filter = ('status', 'format')
+    readonly_fields = ('sha256', 'original', 'variants')
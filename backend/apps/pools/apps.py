@@ -6,3 +6,5 @@ class PoolsConfig(AppConfig):
     name = 'apps.pools'
     verbose_name = 'Pools'
 
+    def ready(self):
+        from . import signals  # noqa: F401
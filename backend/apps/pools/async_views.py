@@ -0,0 +1,122 @@
+"""Vistas de lectura nativas de ASGI.
+
+Usan el ORM async de Django (``aget``, ``async for``) y ``PoolRowSerializer``,
+que solo convierte diccionarios, asi que bajo uvicorn un request no ocupa un
+hilo del pool de ``sync_to_async`` mientras espera. Devuelven el mismo JSON que
+las vistas DRF equivalentes; la paginacion por cursor (opcional) reutiliza
+``PoolCursorPagination``.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from core.metrics import serializer_timer
+
+from .changefeed import drain, feed_settings, follow, get_hub, opening
+from .mixins import parse_fields_param
+from .models import Pool, filter_district
+from .pagination import PoolCursorPagination
+from .serializers import PoolRowSerializer
+
+
+def json_response(data, status=200):
+    # Mismo formato que JSONRenderer de DRF (compacto y sin escapar unicode)
+    return JsonResponse(
+        data, status=status, safe=False, json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False}
+    )
+
+
+class AsyncPoolReadView(View):
+    http_method_names = ['get', 'head', 'options']
+
+    def get_queryset(self):
+        return Pool.objects.all()
+
+    async def get(self, request, **kwargs):
+        try:
+            return await self.read(request, **kwargs)
+        except ValidationError as exc:
+            return json_response(exc.detail, status=400)
+
+
+class AsyncPoolListView(AsyncPoolReadView):
+    async def read(self, request, **kwargs):
+        row_serializer = PoolRowSerializer(fields=parse_fields_param(request))
+        # id ordena el cursor (ver PoolFastListMixin)
+        rows = row_serializer.values(self.get_queryset(), 'id')
+        params = request.GET
+        if 'cursor' in params or 'page_size' in params:
+            return await sync_to_async(self.paginate)(request, row_serializer, rows)
+        rows = [row async for row in rows]
+        with serializer_timer():
+            data = row_serializer.strip(row_serializer.serialize(rows), 'id')
+        return json_response(data)
+
+    def paginate(self, request, row_serializer, rows):
+        paginator = PoolCursorPagination()
+        page = paginator.paginate_queryset(rows, Request(request), view=self)
+        with serializer_timer():
+            data = row_serializer.serialize(page)
+        body = paginator.get_paginated_response(data).data
+        row_serializer.strip(data, 'id')
+        return json_response(body)
+
+
+class AsyncAllPoolsView(AsyncPoolListView):
+    pass
+
+
+class AsyncPoolsByStateView(AsyncPoolListView):
+    def get_queryset(self):
+        return Pool.objects.filter(state=self.kwargs['state'])
+
+
+class AsyncPoolsByDistrictView(AsyncPoolListView):
+    def get_queryset(self):
+        return filter_district(Pool.objects.all(), self.kwargs['district'])
+
+
+class AsyncPoolDetailView(AsyncPoolReadView):
+    async def read(self, request, pk):
+        row_serializer = PoolRowSerializer(fields=parse_fields_param(request))
+        try:
+            row = await row_serializer.values(self.get_queryset()).aget(pk=pk)
+        except Pool.DoesNotExist:
+            return json_response({"detail": "Pool not found."}, status=404)
+        with serializer_timer():
+            data = row_serializer.serialize([row])[0]
+        return json_response(data)
+
+
+class AsyncPoolStatisticsView(AsyncPoolReadView):
+    async def read(self, request):
+        stats = Pool.objects.values('state').annotate(count=Count('id'))
+        return json_response([row async for row in stats])
+
+
+class PoolChangeStreamView(View):
+    """Cambios de piscinas por Server-Sent Events (ver ``changefeed``).
+
+    Bajo ASGI la conexion queda abierta sin ocupar un hilo. Bajo WSGI devuelve lo
+    pendiente y cierra: el navegador reconecta tras ``retry`` con su ultimo id.
+    """
+
+    http_method_names = ['get']
+
+    async def get(self, request):
+        hub, config = get_hub(), feed_settings()
+        token = request.headers.get('Last-Event-ID') or request.GET.get('since')
+        position, first = opening(hub, token, config)
+        if isinstance(request, ASGIRequest):
+            response = StreamingHttpResponse(follow(hub, position, first, config), content_type='text/event-stream')
+        else:
+            response = HttpResponse(first + drain(hub, position, config)[1], content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Sin buffer en nginx: cada evento sale apenas se publica
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
@@ -0,0 +1,569 @@
+"""Benchmark reproducible de los endpoints de piscinas.
+
+Cada ruta de ``apps/pools/urls.py`` (y el login JWT de djoser) se ejecuta con el
+cliente de pruebas de Django contra la base de datos configurada (SQLite o
+PostgreSQL local), midiendo latencia p50/p95/p99, numero de consultas y bytes de
+respuesta. Los resultados se guardan en JSON para compararlos con una linea base.
+"""
+import asyncio
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import datetime
+import gc
+import io
+import json
+import math
+import platform
+import threading
+import time
+
+import django
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+import environ
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.database import connection_settings
+
+from .changes import format_cursor
+from .clustering import tile_position
+from .models import Pool
+from .urls import urlpatterns
+
+BENCH_PASSWORD = 'bench-password-123'
+
+
+@dataclass
+class Case:
+    label: str
+    url_name: str
+    kwargs: dict = field(default_factory=dict)
+    query: str = ''
+    method: str = 'get'
+    body: object = None
+    auth: bool = False
+
+    def request(self, client, token, iteration):
+        url = reverse(self.url_name, kwargs=self.kwargs) + (f'?{self.query}' if self.query else '')
+        extra = {'HTTP_AUTHORIZATION': f'JWT {token}'} if self.auth else {}
+        if self.method == 'get':
+            return client.get(url, **extra)
+        body = self.body(iteration) if callable(self.body) else self.body
+        if isinstance(body, dict) and any(hasattr(value, 'read') for value in body.values()):
+            return client.post(url, body, **extra)
+        return getattr(client, self.method)(url, json.dumps(body), content_type='application/json', **extra)
+
+
+def _new_pool(iteration):
+    return {
+        'file_number': f'BENCH-{time.time_ns()}-{iteration}',
+        'legal_name': 'Benchmark S.A.C.',
+        'pool_type': 'Club',
+        'address': 'Av. Ejército 101',
+        'district': 'Cayma',
+        'capacity': 50,
+        'area_m2': '120.00',
+        'volume_m3': '180.00',
+        'latitude': '-16.366700000',
+        'longitude': '-71.550000000',
+    }
+
+
+def _new_inspection(iteration):
+    return {
+        'inspection_date': (timezone.localdate() - datetime.timedelta(days=iteration % 365)).isoformat(),
+        'free_chlorine': '1.20',
+        'ph': '7.40',
+        'turbidity': '0.50',
+        'verdict': 'HEALTHY' if iteration % 4 else 'UNHEALTHY',
+    }
+
+
+def _bulk_update(pool_ids):
+    def body(iteration):
+        return [
+            {'id': pool_id, 'current_state': 'HEALTHY' if (iteration + offset) % 2 else 'UNHEALTHY'}
+            for offset, pool_id in enumerate(pool_ids)
+        ]
+    return body
+
+
+def _image_file(iteration):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    # Siempre la misma foto: mide el camino de deduplicacion por hash (solo la primera se procesa)
+    buffer = io.BytesIO()
+    Image.new('RGB', (1600, 1200), (30, 144, 255)).save(buffer, 'JPEG', quality=90)
+    return {'file': SimpleUploadedFile('bench.jpg', buffer.getvalue())}
+
+
+def _import_file(iteration):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    lines = ['file_number,legal_name,pool_type,address,district,capacity,area_m2,volume_m3']
+    lines += [f'BENCH-IMPORT-{iteration}-{row},Importada {row},Club,Calle {row},Yura,20,50.00,75.00' for row in range(50)]
+    return {'file': SimpleUploadedFile('bench.csv', '\n'.join(lines).encode())}
+
+
+def build_cases(sample, user_email):
+    latitude, longitude = float(sample['latitude']), float(sample['longitude'])
+    tile_x, tile_y = tile_position(latitude, longitude, 13)
+    bbox = f'{longitude - 0.02},{latitude - 0.02},{longitude + 0.02},{latitude + 0.02}'
+    bulk_ids = list(Pool.objects.order_by('id').values_list('id', flat=True)[:50])
+    # Un cliente al que le faltan los ultimos ~20 cambios
+    recent = Pool.objects.order_by('-change_seq', '-id').values_list('change_seq', 'id')[20:21].first()
+    changes_cursor = format_cursor(*recent) if recent else '0-0'
+    return [
+        Case('all-pools', 'all-pools'),
+        Case('all-pools (page)', 'all-pools', query='page_size=100'),
+        Case('all-pools (map fields)', 'all-pools', query='fields=id,latitude,longitude,current_state'),
+        Case('all-pools (columnar)', 'all-pools', query='format=columnar'),
+        Case('all-pools (msgpack map)', 'all-pools', query='format=msgpack&fields=id,latitude,longitude,current_state'),
+        Case('pool-changes (full)', 'pool-changes', query='page_size=500'),
+        Case('pool-changes (since)', 'pool-changes', query=f'since={changes_cursor}'),
+        Case('pool-detail-from-all', 'pool-detail-from-all', kwargs={'pk': sample['id']}),
+        Case('pool-detail-from-all (patch)', 'pool-detail-from-all', kwargs={'pk': sample['id']}, method='patch',
+             body={'observations': 'Benchmark'}, auth=True),
+        Case('pools-by-state', 'pools-by-state', kwargs={'state': sample['state']}),
+        Case('pools-by-district', 'pools-by-district', kwargs={'district': sample['district'].upper()}),
+        Case('pool-inspections', 'pool-inspections', kwargs={'pk': sample['id']}),
+        Case('pool-inspections (create)', 'pool-inspections', kwargs={'pk': sample['id']}, method='post',
+             body=_new_inspection, auth=True),
+        Case('pool-statistics', 'pool-statistics'),
+        Case('pool-dashboard-statistics', 'pool-dashboard-statistics'),
+        Case('pool-health-trend', 'pool-health-trend', query='months=24'),
+        Case('pool-health-trend (district)', 'pool-health-trend', query=f"district={sample['district']}&months=24"),
+        Case('pool-filters', 'pool-filters', query=f"current_state={sample['current_state']}&page_size=100"),
+        Case('pool-search', 'pool-search', query=f"q={sample['district']}"),
+        Case('pool-search (typo)', 'pool-search', query=f"q={sample['district'][:-1].lower()}"),
+        Case('pools-nearby (bbox)', 'pools-nearby', query=f'bbox={bbox}'),
+        Case('pools-nearby (k-nn)', 'pools-nearby', query=f'near={latitude},{longitude}&k=10'),
+        Case('pool-cluster-tile', 'pool-cluster-tile', kwargs={'z': 13, 'x': int(tile_x), 'y': int(tile_y)}),
+        Case('pool-export (csv)', 'pool-export', kwargs={'export_format': 'csv'}),
+        Case('pool-export (geojson)', 'pool-export', kwargs={'export_format': 'geojson'}),
+        Case('pool-create', 'pool-create', method='post', body=_new_pool, auth=True),
+        Case('pool-import', 'pool-import', method='post', body=_import_file, auth=True),
+        Case('pool-image-upload', 'pool-image-upload', kwargs={'pk': sample['id']}, method='post', body=_image_file,
+             auth=True),
+        Case('pool-bulk-update (50)', 'pool-bulk-update', method='post', body=_bulk_update(bulk_ids), auth=True),
+        Case('async-all-pools', 'async-all-pools', query='fields=id,latitude,longitude,current_state'),
+        Case('async-pool-detail', 'async-pool-detail', kwargs={'pk': sample['id']}),
+        Case('async-pools-by-state', 'async-pools-by-state', kwargs={'state': sample['state']}),
+        Case('async-pools-by-district', 'async-pools-by-district', kwargs={'district': sample['district'].upper()}),
+        Case('async-pool-statistics', 'async-pool-statistics'),
+        # Con el cliente WSGI devuelve lo pendiente y cierra
+        Case('pool-live (catch-up)', 'pool-live'),
+        Case('jwt-create', 'jwt-create', method='post', body={'email': user_email, 'password': BENCH_PASSWORD}),
+    ]
+
+
+def missing_routes(cases):
+    covered = {case.url_name for case in cases}
+    return [pattern.name for pattern in urlpatterns if pattern.name not in covered]
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def measure(case, client, token, requests, warmup):
+    timings, queries, sizes, statuses = [], [], [], set()
+    for iteration in range(warmup + requests):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = case.request(client, token, iteration)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            elapsed = time.perf_counter() - start
+        if iteration < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(len(captured))
+        sizes.append(size)
+        statuses.add(response.status_code)
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries': max(queries),
+        'bytes': max(sizes),
+        'status': sorted(statuses),
+    }
+
+
+def run_benchmark(requests=30, warmup=3, stdout=None):
+    from django.contrib.auth import get_user_model
+
+    user = get_user_model().objects.create_superuser(
+        'bench@example.com', BENCH_PASSWORD, username='bench-user', first_name='Bench', last_name='User'
+    )
+    token = str(RefreshToken.for_user(user).access_token)
+    sample = (
+        Pool.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        .order_by('id')
+        .values('id', 'state', 'current_state', 'district', 'latitude', 'longitude')
+        .first()
+    )
+    if sample is None:
+        raise ValueError("No pools with coordinates to benchmark; seed some data first.")
+
+    cases = build_cases(sample, user.email)
+    missing = missing_routes(cases)
+    if missing:
+        raise ValueError(f"Routes without a benchmark case: {', '.join(missing)}")
+
+    client = Client()
+    results = {}
+    for case in cases:
+        results[case.label] = measure(case, client, token, requests, warmup)
+        if stdout is not None:
+            stdout.write(format_row(case.label, results[case.label]))
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'pools': Pool.objects.count(),
+            'requests': requests,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'results': results,
+    }
+
+
+def format_row(label, result):
+    return (
+        f"{label:30} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+        f"p99 {result['p99_ms']:9.2f} ms  {result['queries']:3} q  {result['bytes']:>10,} B  {result['status']}"
+    )
+
+
+def compare(report, baseline, tolerance):
+    """Regresiones respecto a la linea base: p95 mas lento que la tolerancia o mas consultas."""
+    regressions = []
+    for label, result in report['results'].items():
+        previous = baseline.get('results', {}).get(label)
+        if previous is None:
+            continue
+        if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {previous['p95_ms']} -> {result['p95_ms']} ms")
+        if result['queries'] > previous['queries']:
+            regressions.append(f"{label}: queries {previous['queries']} -> {result['queries']}")
+    return regressions
+
+
+# Concurrencia: la misma lectura por la vista DRF bajo WSGI con N hilos (un worker
+# gthread de gunicorn) y por la vista async bajo ASGI en un solo event loop (un
+# worker de uvicorn). Se llama a los handlers directamente, sin servidor ni red.
+CONCURRENCY_PAIRS = [
+    ('all (map fields)', 'all-pools', 'async-all-pools', {}, 'fields=id,latitude,longitude,current_state'),
+    ('detail', 'pool-detail-from-all', 'async-pool-detail', {'pk': 'id'}, ''),
+    ('by state', 'pools-by-state', 'async-pools-by-state', {'state': 'state'}, 'page_size=100'),
+    ('by district', 'pools-by-district', 'async-pools-by-district', {'district': 'district'}, 'page_size=100'),
+    ('statistics', 'pool-statistics', 'async-pool-statistics', {}, ''),
+]
+
+
+def _wsgi_get(handler, path, query):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'testserver',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'wsgi.version': (1, 0),
+    }
+    statuses = []
+    body = handler(environ, lambda status, headers, exc_info=None: statuses.append(int(status[:3])))
+    try:
+        for _ in body:
+            pass
+    finally:
+        body.close()
+    return statuses[0]
+
+
+async def _asgi_get(handler, path, query):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    done = asyncio.Event()
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    statuses = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        elif not message.get('more_body', False):
+            done.set()
+
+    await handler(scope, receive, send)
+    return statuses[0]
+
+
+def _summary(timings, elapsed, statuses):
+    return {
+        'rps': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'status': sorted(set(statuses)),
+    }
+
+
+def wsgi_throughput(path, query, requests, concurrency, threads):
+    from concurrent.futures import ThreadPoolExecutor
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    # Los clientes concurrentes esperan turno: solo hay ``threads`` hilos atendiendo
+    slots = threading.BoundedSemaphore(threads)
+
+    def one(_):
+        # La latencia incluye la espera por un hilo libre, como la veria el cliente
+        start = time.perf_counter()
+        with slots:
+            status = _wsgi_get(handler, path, query)
+        return (time.perf_counter() - start) * 1000, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    return _summary([timing for timing, _ in results], elapsed, [status for _, status in results])
+
+
+def asgi_throughput(path, query, requests, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+
+    async def run():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with slots:
+                start = time.perf_counter()
+                status = await _asgi_get(handler, path, query)
+                return (time.perf_counter() - start) * 1000, status
+
+        return await asyncio.gather(*(one() for _ in range(requests)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    return _summary([timing for timing, _ in results], elapsed, [status for _, status in results])
+
+
+@contextmanager
+def simulated_db_latency(milliseconds):
+    """Agrega ``milliseconds`` a cada consulta de las conexiones que se abran (red hasta PostgreSQL)."""
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(milliseconds / 1000)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    if not milliseconds:
+        yield
+        return
+    connection_created.connect(install)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+
+
+def run_concurrency_benchmark(requests=400, concurrency=32, threads=4, db_latency=0, stdout=None):
+    sample = (
+        Pool.objects.order_by('id')
+        .values('id', 'state', 'district')
+        .first()
+    )
+    if sample is None:
+        raise ValueError("No pools to benchmark; seed some data first.")
+
+    # Sin cache de respuestas: ambos caminos hacen la consulta y la serializacion
+    no_cache = override_settings(POOL_RESPONSE_CACHE={'BACKEND': 'apps.pools.response_cache.DummyBackend'})
+    results = {}
+    with no_cache, simulated_db_latency(db_latency):
+        for label, sync_name, async_name, kwargs, query in CONCURRENCY_PAIRS:
+            kwargs = {name: sample[column] for name, column in kwargs.items()}
+            sync_result = wsgi_throughput(reverse(sync_name, kwargs=kwargs), query, requests, concurrency, threads)
+            async_result = asgi_throughput(reverse(async_name, kwargs=kwargs), query, requests, concurrency)
+            results[label] = {'wsgi': sync_result, 'asgi': async_result}
+            if stdout is not None:
+                stdout.write(
+                    f"{label:18} WSGI {sync_result['rps']:8.1f} req/s (p95 {sync_result['p95_ms']:8.2f} ms)  "
+                    f"ASGI {async_result['rps']:8.1f} req/s (p95 {async_result['p95_ms']:8.2f} ms)  "
+                    f"{async_result['rps'] / sync_result['rps']:5.2f}x"
+                )
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'pools': Pool.objects.count(),
+            'requests': requests,
+            'concurrency': concurrency,
+            'threads': threads,
+            'db_latency_ms': db_latency,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'results': results,
+    }
+
+
+# Conexiones: la misma carga WSGI con cada DATABASE_CONN_MODE (ver core/database.py)
+# contra PostgreSQL, contando las conexiones que el servidor ve abiertas.
+CONNECTION_PATHS = [
+    ('detail', 'pool-detail-from-all', {'pk': 'id'}, ''),
+    ('by district', 'pools-by-district', {'district': 'district'}, 'page_size=100'),
+]
+
+
+@contextmanager
+def connection_mode(mode):
+    """Aplica ``mode`` a las conexiones que abran los hilos nuevos y cierra su pool al salir."""
+    config = connections.settings[DEFAULT_DB_ALIAS]
+    previous = {key: config[key] for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')}
+    selected = connection_settings(environ.Env(), mode=mode)
+    options = {key: value for key, value in previous['OPTIONS'].items() if key != 'pool'}
+    config.update(selected, OPTIONS={**options, **selected['OPTIONS']})
+    try:
+        yield
+    finally:
+        # Todos los wrappers comparten este diccionario: el pool se cierra antes de restaurarlo
+        connection.close_pool()
+        config.update(previous)
+
+
+class ConnectionSampler(threading.Thread):
+    """Cuenta periodicamente las conexiones del servidor a esta base de datos (sin la propia)."""
+
+    QUERY = "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()"
+
+    def __init__(self, interval=0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+        self.ready = threading.Event()
+
+    def run(self):
+        import psycopg
+
+        with psycopg.connect(**connection.get_connection_params(), autocommit=True) as sampler:
+            while True:
+                self.samples.append(sampler.execute(self.QUERY).fetchone()[0])
+                self.ready.set()
+                if self.stopped.wait(self.interval):
+                    break
+
+    def __enter__(self):
+        self.start()
+        self.ready.wait()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.join()
+
+    def summary(self):
+        return {'peak': max(self.samples), 'mean': round(sum(self.samples) / len(self.samples), 1)}
+
+
+def connection_throughput(mode, path, query, requests, concurrency, threads):
+    opened = []
+
+    def count(sender, connection, **kwargs):
+        opened.append(1)
+
+    with connection_mode(mode):
+        connection_created.connect(count)
+        try:
+            with ConnectionSampler() as sampler:
+                result = wsgi_throughput(path, query, requests, concurrency, threads)
+        finally:
+            connection_created.disconnect(count)
+        # Con pool, connection_created se emite en cada prestamo: las conexiones reales salen de sus estadisticas
+        result['connections_opened'] = connection.pool.get_stats()['connections_num'] if mode == 'pool' else len(opened)
+    # Los hilos de WSGI terminaron: sus conexiones persistentes se liberan con el recolector
+    gc.collect()
+    result['connections_held'] = sampler.summary()
+    return result
+
+
+def run_connection_benchmark(modes, requests=400, concurrency=32, threads=8, stdout=None):
+    if connection.vendor != 'postgresql':
+        raise ValueError("The connection benchmark needs PostgreSQL.")
+    sample = Pool.objects.order_by('id').values('id', 'district').first()
+    if sample is None:
+        raise ValueError("No pools to benchmark; seed some data first.")
+    connection.close()
+
+    no_cache = override_settings(POOL_RESPONSE_CACHE={'BACKEND': 'apps.pools.response_cache.DummyBackend'})
+    results = {}
+    with no_cache:
+        for label, name, kwargs, query in CONNECTION_PATHS:
+            path = reverse(name, kwargs={key: sample[column] for key, column in kwargs.items()})
+            results[label] = {}
+            for mode in modes:
+                result = connection_throughput(mode, path, query, requests, concurrency, threads)
+                results[label][mode] = result
+                if stdout is not None:
+                    stdout.write(
+                        f"{label:12} {mode:10} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.2f} ms  "
+                        f"p95 {result['p95_ms']:7.2f} ms  opened {result['connections_opened']:5}  "
+                        f"held peak {result['connections_held']['peak']:3} "
+                        f"(mean {result['connections_held']['mean']})  {result['status']}"
+                    )
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'pools': Pool.objects.count(),
+            'requests': requests,
+            'concurrency': concurrency,
+            'threads': threads,
+            'pool_options': connection_settings(environ.Env(), mode='pool')['OPTIONS']['pool'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'results': results,
+    }
@@ -0,0 +1,171 @@
+"""Actualizacion por lotes de piscinas (``POST /pool/bulk-update/``).
+
+Cada item es una actualizacion parcial identificada por ``id`` o ``file_number``.
+Las piscinas se leen con dos consultas, todos los items se validan con un mismo
+serializer y los cambios se escriben con ``bulk_update`` en una sola transaccion.
+La respuesta trae un resultado por item, en el orden recibido.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .importers import PoolImportSerializer
+from .models import SEARCH_FIELDS, Pool, next_change_seq
+from .signals import pools_bulk_changed, tracked_values
+
+MAX_ITEMS = 1000
+DEFAULT_BATCH_SIZE = 500
+
+
+class BulkUpdateReport:
+    def __init__(self, size):
+        self.results = [None] * size
+        self.updated = 0
+        self.failed = 0
+
+    def add_result(self, index, pool, status='updated'):
+        self.results[index] = {'index': index, 'id': pool.pk, 'file_number': pool.file_number, 'status': status}
+
+    def add_error(self, index, errors):
+        self.failed += 1
+        self.results[index] = {'index': index, 'status': 'error', 'errors': errors}
+
+    def as_dict(self):
+        return {'updated': self.updated, 'failed': self.failed, 'results': self.results}
+
+
+def _item_key(item):
+    """``('id', int)`` o ``('file_number', str)``; ``id`` manda si vienen ambos."""
+    if not isinstance(item, dict):
+        raise ValidationError({'non_field_errors': ["Expected an object."]})
+    if item.get('id') is not None:
+        try:
+            return 'id', int(item['id'])
+        except (TypeError, ValueError):
+            raise ValidationError({'id': ["A valid integer is required."]})
+    if item.get('file_number') not in (None, ''):
+        return 'file_number', str(item['file_number'])
+    raise ValidationError({'non_field_errors': ["Each update needs an id or a file_number."]})
+
+
+def _write(pools, fields, batch_size):
+    """Como ``QuerySet.bulk_update`` pero con un ``WHEN`` por valor distinto y no por fila.
+
+    Los lotes de inspeccion repiten mucho los valores (salubridad, fecha, ``updated_at``),
+    asi que la sentencia y el costo de armarla en Django se reducen varias veces.
+    """
+    for start in range(0, len(pools), batch_size):
+        batch = pools[start:start + batch_size]
+        values = {}
+        for name in fields:
+            field = Pool._meta.get_field(name)
+            groups = defaultdict(list)
+            for pool in batch:
+                groups[getattr(pool, field.attname)].append(pool.pk)
+            if len(groups) == 1:
+                values[name] = Value(next(iter(groups)), output_field=field)
+            else:
+                values[name] = Case(
+                    *(When(pk__in=pks, then=Value(value, output_field=field)) for value, pks in groups.items()),
+                    output_field=field,
+                )
+        Pool.objects.filter(pk__in=[pool.pk for pool in batch]).update(**values)
+
+
+def bulk_update_pools(items, atomic=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Aplica las actualizaciones parciales de ``items`` y devuelve un ``BulkUpdateReport``.
+
+    Con ``atomic`` basta un item invalido para que no se escriba ninguno.
+    """
+    if not isinstance(items, list):
+        raise ValueError("Expected a list of updates.")
+    if len(items) > MAX_ITEMS:
+        raise ValueError(f"At most {MAX_ITEMS} updates per request.")
+    report = BulkUpdateReport(len(items))
+
+    keys = {}
+    for index, item in enumerate(items):
+        try:
+            keys[index] = _item_key(item)
+        except ValidationError as exc:
+            report.add_error(index, exc.detail)
+
+    pending = []
+    with transaction.atomic():
+        lookups = {'id': [], 'file_number': []}
+        for name, value in keys.values():
+            lookups[name].append(value)
+        pools = {
+            name: Pool.objects.select_for_update().in_bulk(values, field_name=name) if values else {}
+            for name, values in lookups.items()
+        }
+        # Un solo serializer parcial para todo el lote (la unicidad de file_number se revisa abajo, en una consulta)
+        validator = PoolImportSerializer(partial=True)
+        seen = set()
+        for index, (name, value) in keys.items():
+            pool = pools[name].get(value)
+            if pool is None:
+                report.add_error(index, {name: ["Pool not found."]})
+                continue
+            if pool.pk in seen:
+                report.add_error(index, {'non_field_errors': ["Duplicate update for the same pool."]})
+                continue
+            seen.add(pool.pk)
+            data = {field: item_value for field, item_value in items[index].items() if field != 'id'}
+            if name == 'file_number':
+                # Es la clave de busqueda, no un cambio
+                data.pop('file_number')
+            try:
+                pending.append((index, pool, validator.run_validation(data)))
+            except ValidationError as exc:
+                report.add_error(index, exc.detail)
+
+        renamed = Counter(
+            data['file_number'] for _, pool, data in pending if data.get('file_number') not in (None, pool.file_number)
+        )
+        if renamed:
+            # Ocupados por otra piscina o repetidos dentro del lote
+            taken = {number for number, count in renamed.items() if count > 1}
+            taken |= set(Pool.objects.filter(file_number__in=renamed).values_list('file_number', flat=True))
+            conflicts = {
+                index for index, pool, data in pending
+                if data.get('file_number') in taken and data['file_number'] != pool.file_number
+            }
+            for index in conflicts:
+                report.add_error(index, {'file_number': ["pool with this File Number already exists."]})
+            pending = [entry for entry in pending if entry[0] not in conflicts]
+
+        if atomic and report.failed:
+            for index, pool, _ in pending:
+                report.add_result(index, pool, status='skipped')
+            return report
+
+        now = timezone.now()
+        # Todo el lote comparte un numero de cambio: /pool/changes/ desempata por id
+        seq = next_change_seq() if pending else None
+        fields = {'updated_at', 'change_seq'}
+        changes = []
+        for index, pool, data in pending:
+            previous = tracked_values(pool)
+            for name, value in data.items():
+                setattr(pool, name, value)
+            if {'latitude', 'longitude'} & set(data):
+                pool.geohash = pool.compute_geohash()
+                fields.add('geohash')
+            if set(SEARCH_FIELDS) & set(data):
+                pool.search_text = pool.compute_search_text()
+                fields.add('search_text')
+            pool.updated_at = now
+            pool.change_seq = seq
+            fields.update(data)
+            changes.append((previous, tracked_values(pool)))
+            report.add_result(index, pool)
+        _write([pool for _, pool, _ in pending], sorted(fields), batch_size)
+        report.updated = len(pending)
+
+    if report.updated:
+        pools_bulk_changed.send(sender=Pool, fields=fields, changes=changes)
+    return report
@@ -0,0 +1,278 @@
+"""Feed de cambios de piscinas para clientes conectados por Server-Sent Events.
+
+Cuando cambia el ``current_state``, ``state``, ``rating`` o las coordenadas de una
+piscina (o se crea o borra una), al confirmarse la transaccion se publica un lote
+de eventos chicos::
+
+    {"type": "update", "id": 12, "changes": {"current_state": "UNHEALTHY"}}
+    {"type": "create", "id": 13, "pool": {...FEED_FIELDS}}
+    {"type": "delete", "id": 13}
+    {"type": "resync"}   # cambio masivo sin detalle: volver a pedir /pool/all/
+
+El hub guarda los ultimos ``BUFFER_SIZE`` lotes ya serializados, una sola vez para
+todos los clientes. Cada cliente solo tiene su posicion en ese buffer y espera un
+``asyncio.Event`` compartido por su event loop, asi que miles de conexiones
+ociosas cuestan unos pocos bytes cada una y publicar despierta una vez por loop.
+Cada lote tiene un token (el ``id`` del evento SSE): al reconectar, el navegador
+lo manda en ``Last-Event-ID`` y recibe solo lo que se perdio. Si el token ya no
+esta en el buffer (o es de otro proceso), recibe ``resync``.
+
+``LocalHub`` reparte dentro del proceso. ``PostgresHub`` publica con NOTIFY y cada
+proceso escucha con LISTEN, asi los workers de gunicorn/uvicorn ven los mismos
+lotes en el mismo orden y un cliente puede reconectarse a cualquiera.
+"""
+import asyncio
+from collections import deque
+import json
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+FEED_FIELDS = ('current_state', 'state', 'rating', 'latitude', 'longitude')
+
+DEFAULT_SETTINGS = {
+    'BACKEND': 'apps.pools.changefeed.LocalHub',
+    'BUFFER_SIZE': 2000,
+    # Lotes por mensaje SSE como maximo
+    'MAX_BATCHES': 100,
+    # Segundos sin eventos antes de mandar un comentario (mantiene vivos los proxies)
+    'HEARTBEAT': 20,
+    # Milisegundos que espera el navegador antes de reconectar
+    'RETRY_MS': 3000,
+}
+
+
+def feed_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'POOL_CHANGE_FEED', {})}
+
+
+def encode(events):
+    return json.dumps(events, cls=DjangoJSONEncoder, separators=(',', ':'), ensure_ascii=False)
+
+
+def pool_event(previous, current):
+    """Evento para una piscina con estos valores antes y despues (``None`` si se creo o borro)."""
+    if previous is None:
+        return {'type': 'create', 'id': current['id'], 'pool': {name: current[name] for name in FEED_FIELDS}}
+    if current is None:
+        return {'type': 'delete', 'id': previous['id']}
+    changes = {name: current[name] for name in FEED_FIELDS if previous[name] != current[name]}
+    if not changes:
+        return None
+    return {'type': 'update', 'id': current['id'], 'changes': changes}
+
+
+class LocalHub:
+    def __init__(self, buffer_size=2000, **options):
+        self.epoch = secrets.token_hex(4)
+        self.lock = threading.Lock()
+        # (posicion, token, lote JSON); la posicion cuenta lotes desde que arranco el hub
+        self.batches = deque(maxlen=buffer_size)
+        self.positions = {self.start_token: 0}
+        self.head = 0
+        # event loop -> asyncio.Event de los clientes que esperan en el
+        self.waiters = {}
+
+    @property
+    def start_token(self):
+        return f'{self.epoch}-0'
+
+    def publish(self, events):
+        """Publica ``events`` (se llama al confirmar la transaccion, desde cualquier hilo)."""
+        if events:
+            self.deliver(f'{self.epoch}-{self.head + 1}', encode(events))
+
+    def deliver(self, token, payload):
+        with self.lock:
+            if len(self.batches) == self.batches.maxlen:
+                evicted = self.batches[0]
+                self.positions.pop(evicted[1], None)
+                if evicted[0] == 1:
+                    self.positions.pop(self.start_token, None)
+            self.head += 1
+            self.batches.append((self.head, token, payload))
+            self.positions[token] = self.head
+            loops = list(self.waiters)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self.wake, loop)
+            except RuntimeError:
+                # El loop ya se cerro
+                with self.lock:
+                    self.waiters.pop(loop, None)
+
+    def wake(self, loop):
+        with self.lock:
+            event = self.waiters.pop(loop, None)
+        if event is not None:
+            event.set()
+
+    def position(self, token):
+        """Posicion despues del lote ``token``, o ``None`` si ya no esta en el buffer."""
+        with self.lock:
+            return self.positions.get(token)
+
+    def current(self):
+        """(posicion, token) del ultimo lote: desde ahi sigue un cliente nuevo."""
+        with self.lock:
+            if self.batches:
+                position, token, _ = self.batches[-1]
+                return position, token
+            return 0, self.start_token
+
+    def read(self, position, limit):
+        """Lotes posteriores a ``position`` como ``(posicion, token, [payloads])``; ``None`` si se perdieron."""
+        with self.lock:
+            if position >= self.head:
+                return position, None, []
+            oldest = self.batches[0][0]
+            if position < oldest - 1:
+                return None
+            start = position - oldest + 1
+            batches = [self.batches[index] for index in range(start, min(len(self.batches), start + limit))]
+        return batches[-1][0], batches[-1][1], [payload for _, _, payload in batches]
+
+    async def wait(self, position):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if self.head > position:
+                return
+            event = self.waiters.get(loop)
+            if event is None:
+                event = self.waiters[loop] = asyncio.Event()
+        await event.wait()
+
+
+class PostgresHub(LocalHub):
+    CHANNEL = 'pool_changes'
+    # NOTIFY admite hasta 8000 bytes por mensaje
+    MAX_PAYLOAD = 7000
+
+    def __init__(self, buffer_size=2000, **options):
+        super().__init__(buffer_size, **options)
+        self.listener = None
+
+    def publish(self, events):
+        chunks, chunk, size = [], [], 0
+        for event in events:
+            length = len(encode(event)) + 1
+            if chunk and size + length > self.MAX_PAYLOAD:
+                chunks.append(chunk)
+                chunk, size = [], 0
+            chunk.append(event)
+            size += length
+        if chunk:
+            chunks.append(chunk)
+        with connections['default'].cursor() as cursor:
+            for chunk in chunks:
+                cursor.execute("SELECT pg_notify(%s, %s)", [self.CHANNEL, f'{secrets.token_hex(8)} {encode(chunk)}'])
+
+    # El proceso empieza a escuchar con su primer cliente
+    def position(self, token):
+        self.ensure_listener()
+        return super().position(token)
+
+    def current(self):
+        self.ensure_listener()
+        return super().current()
+
+    def ensure_listener(self):
+        if self.listener is not None:
+            return
+        with self.lock:
+            if self.listener is not None:
+                return
+            self.listener = threading.Thread(target=self.listen, name='pool-changes-listener', daemon=True)
+        self.listener.start()
+
+    def listen(self):
+        import psycopg
+
+        params = connections['default'].get_connection_params()
+        while True:
+            try:
+                with psycopg.connect(**params, autocommit=True) as listener:
+                    listener.execute(f"LISTEN {self.CHANNEL}")
+                    for notify in listener.notifies():
+                        token, payload = notify.payload.split(' ', 1)
+                        self.deliver(token, payload)
+            except psycopg.Error:
+                # Mientras no hubo conexion se pudieron perder eventos
+                self.deliver(f'{self.epoch}-lost-{self.head + 1}', encode([{'type': 'resync'}]))
+                time.sleep(1)
+
+
+_hub = None
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        config = feed_settings()
+        _hub = import_string(config['BACKEND'])(buffer_size=config['BUFFER_SIZE'])
+    return _hub
+
+
+@receiver(setting_changed)
+def reset_hub(setting, **kwargs):
+    global _hub
+    if setting == 'POOL_CHANGE_FEED':
+        _hub = None
+
+
+def sse_message(event, token, data):
+    return f'id: {token}\nevent: {event}\ndata: {data}\n\n'
+
+
+def opening(hub, token, config):
+    """Primer mensaje y posicion inicial de un cliente que se conecta con ``token`` (o sin el)."""
+    position = hub.position(token) if token else None
+    if position is not None:
+        return position, f"retry: {config['RETRY_MS']}\n\n"
+    # Cliente nuevo (ready) o que perdio eventos (resync): carga /pool/all/ y sigue desde aqui
+    position, current = hub.current()
+    return position, f"retry: {config['RETRY_MS']}\n" + sse_message('resync' if token else 'ready', current, '{}')
+
+
+def drain(hub, position, config):
+    """Mensajes SSE con los lotes posteriores a ``position`` y la nueva posicion."""
+    messages = []
+    while True:
+        batch = hub.read(position, config['MAX_BATCHES'])
+        if batch is None:
+            position, token = hub.current()
+            messages.append(sse_message('resync', token, '{}'))
+            break
+        position, token, payloads = batch
+        if not payloads:
+            break
+        # Cada lote es un arreglo JSON: se unen sin volver a serializar
+        messages.append(sse_message('pools', token, '[' + ','.join(payload[1:-1] for payload in payloads) + ']'))
+    return position, ''.join(messages)
+
+
+async def follow(hub, position, first, config):
+    """Stream SSE: lo pendiente, luego cada lote nuevo y un comentario cada ``HEARTBEAT`` segundos."""
+    yield first
+    while True:
+        position, messages = drain(hub, position, config)
+        if messages:
+            yield messages
+            continue
+        try:
+            await asyncio.wait_for(hub.wait(position), config['HEARTBEAT'])
+        except asyncio.TimeoutError:
+            yield ': ping\n\n'
+
+
+def publish_on_commit(events):
+    events = [event for event in events if event is not None]
+    if events:
+        transaction.on_commit(lambda: get_hub().publish(events), robust=True)
@@ -0,0 +1,110 @@
+"""Sincronizacion incremental para clientes offline (``/pool/changes/?since=<cursor>``).
+
+Cada escritura de una piscina le asigna ``change_seq = next_change_seq()`` y cada
+borrado deja un ``PoolTombstone`` con su propio numero. El cursor ``<seq>-<id>``
+es la ultima fila entregada: la siguiente pagina son las filas y tombstones con
+``(change_seq, id)`` mayor, leidas por los indices de ese par. Asi el costo
+depende de cuantos cambios hubo desde el cursor y no del tamaño de la tabla.
+
+Los tombstones se borran despues de ``POOL_TOMBSTONE_RETENTION_DAYS``. Un cursor
+anterior a los borrados ya no alcanza y el cliente tiene que sincronizar desde
+cero (``CursorExpired``).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Pool, PoolChangeCounter, PoolTombstone, next_change_seq
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+DEFAULT_RETENTION_DAYS = 90
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def parse_cursor(cursor):
+    """``(change_seq, id)`` del cursor; sin cursor, antes de la primera fila."""
+    if not cursor:
+        return -1, 0
+    seq, separator, pk = cursor.partition('-')
+    if not separator or not seq.isdigit() or not pk.isdigit():
+        raise ValueError("Invalid cursor.")
+    return int(seq), int(pk)
+
+
+def format_cursor(seq, pk):
+    return f'{max(seq, 0)}-{pk}'
+
+
+def changes_since(cursor, row_serializer, page_size=DEFAULT_PAGE_SIZE):
+    """Pagina de cambios posteriores a ``cursor``: ``{cursor, has_more, changed, deleted}``."""
+    seq, pk = parse_cursor(cursor)
+    if cursor:
+        pruned_through = PoolChangeCounter.objects.filter(pk=1).values_list('pruned_through', flat=True).first()
+        if pruned_through and seq <= pruned_through:
+            raise CursorExpired()
+
+    # change_seq >= seq usa el indice como rango; el exclude descarta lo ya entregado con el mismo seq
+    names = list(dict.fromkeys(['id', *row_serializer.field_names]))
+    rows = list(
+        Pool.objects.filter(change_seq__gte=seq).exclude(change_seq=seq, id__lte=pk)
+        .order_by('change_seq', 'id').values(*names, 'change_seq')[:page_size + 1]
+    )
+    tombstones = list(
+        PoolTombstone.objects.filter(change_seq__gte=seq).exclude(change_seq=seq, pool_id__lte=pk)
+        .order_by('change_seq', 'pool_id').values_list('change_seq', 'pool_id')[:page_size + 1]
+    )
+    entries = sorted(
+        [(row['change_seq'], row['id'], row) for row in rows]
+        + [(tombstone_seq, pool_id, None) for tombstone_seq, pool_id in tombstones],
+        key=lambda entry: entry[:2],
+    )
+    page = entries[:page_size]
+    if page:
+        seq, pk = page[-1][:2]
+
+    # El id va siempre, aunque ?fields= no lo pida: el cliente lo necesita para aplicar el cambio
+    changed = [row for _, _, row in page if row is not None]
+    for row in changed:
+        del row['change_seq']
+    return {
+        'cursor': format_cursor(seq, pk),
+        'has_more': len(entries) > page_size,
+        'changed': row_serializer.serialize(changed),
+        'deleted': [pool_id for _, pool_id, row in page if row is None],
+    }
+
+
+def record_tombstones(pool_ids):
+    """Registra el borrado de ``pool_ids``; se llama dentro de la transaccion que borra."""
+    pool_ids = list(pool_ids)
+    if not pool_ids:
+        return
+    seq = next_change_seq()
+    # Si el id ya tenia tombstone (restaurado y vuelto a borrar) se actualiza su numero
+    PoolTombstone.objects.bulk_create(
+        [PoolTombstone(pool_id=pool_id, change_seq=seq) for pool_id in pool_ids],
+        update_conflicts=True, unique_fields=['pool_id'], update_fields=['change_seq'],
+    )
+
+
+def prune_tombstones(days=None):
+    """Borra los tombstones de mas de ``days`` dias y recuerda hasta que numero se borro."""
+    if days is None:
+        days = getattr(settings, 'POOL_TOMBSTONE_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    old = PoolTombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days))
+    with transaction.atomic():
+        pruned_through = old.aggregate(seq=Max('change_seq'))['seq']
+        if pruned_through is None:
+            return 0
+        deleted, _ = old.filter(change_seq__lte=pruned_through).delete()
+        PoolChangeCounter.objects.filter(pk=1, pruned_through__lt=pruned_through).update(
+            pruned_through=pruned_through
+        )
+    return deleted
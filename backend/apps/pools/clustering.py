@@ -0,0 +1,202 @@
+"""Indice de clusters por zoom para servir el mapa por tiles (``/pool/clusters/{z}/{x}/{y}/``).
+
+Cada tile de 256px se divide en ``CELLS_PER_TILE`` x ``CELLS_PER_TILE`` celdas. Para
+cada zoom hasta ``MAX_CLUSTER_ZOOM`` se guarda por celda el conteo, el desglose de
+salubridad y la suma de coordenadas (para el centroide). Guardar una piscina solo
+toca sus celdas, una por zoom.
+"""
+from collections import defaultdict
+import math
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Pool, PoolCluster
+
+CELLS_PER_TILE = 4
+MAX_CLUSTER_ZOOM = 16
+MAX_TILE_ZOOM = 22
+MAX_MERCATOR_LATITUDE = 85.05112878
+# Columnas de PoolCluster que mueve cada piscina, en el orden de los deltas
+DELTA_FIELDS = ('count', 'healthy', 'unhealthy', 'latitude_sum', 'longitude_sum')
+
+
+def tile_position(latitude, longitude, zoom):
+    """Posicion (x, y) en unidades de tile para el zoom dado (Web Mercator)."""
+    latitude = max(-MAX_MERCATOR_LATITUDE, min(MAX_MERCATOR_LATITUDE, float(latitude)))
+    scale = 1 << zoom
+    x = (float(longitude) + 180.0) / 360.0 * scale
+    radians = math.radians(latitude)
+    y = (1.0 - math.log(math.tan(radians) + 1.0 / math.cos(radians)) / math.pi) / 2.0 * scale
+    return min(max(x, 0.0), scale - 1e-9), min(max(y, 0.0), scale - 1e-9)
+
+
+def tile_bounds(zoom, x, y):
+    """Limites (min_lng, min_lat, max_lng, max_lat) de un tile."""
+    scale = 1 << zoom
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / scale))))
+
+    return x / scale * 360.0 - 180.0, latitude(y + 1), (x + 1) / scale * 360.0 - 180.0, latitude(y)
+
+
+def cells_for(latitude, longitude):
+    if latitude is None or longitude is None:
+        return []
+    cells = []
+    for zoom in range(MAX_CLUSTER_ZOOM + 1):
+        x, y = tile_position(latitude, longitude, zoom)
+        cells.append((zoom, int(x * CELLS_PER_TILE), int(y * CELLS_PER_TILE)))
+    return cells
+
+
+def _apply(latitude, longitude, current_state, sign):
+    cells = cells_for(latitude, longitude)
+    healthy = sign if current_state == 'HEALTHY' else 0
+    unhealthy = sign if current_state == 'UNHEALTHY' else 0
+    # El delta es igual en todos los zooms: un UPDATE para las celdas existentes
+    # y un INSERT para las que faltan
+    lookup = Q()
+    for zoom, cell_x, cell_y in cells:
+        lookup |= Q(zoom=zoom, cell_x=cell_x, cell_y=cell_y)
+    existing = PoolCluster.objects.select_for_update().filter(lookup)
+    found = set(existing.values_list('zoom', 'cell_x', 'cell_y'))
+    existing.update(
+        count=F('count') + sign,
+        healthy=F('healthy') + healthy,
+        unhealthy=F('unhealthy') + unhealthy,
+        latitude_sum=F('latitude_sum') + sign * float(latitude),
+        longitude_sum=F('longitude_sum') + sign * float(longitude),
+    )
+    if sign > 0:
+        PoolCluster.objects.bulk_create([
+            PoolCluster(
+                zoom=zoom, cell_x=cell_x, cell_y=cell_y, count=1,
+                healthy=healthy, unhealthy=unhealthy,
+                latitude_sum=float(latitude), longitude_sum=float(longitude),
+            )
+            for zoom, cell_x, cell_y in cells
+            if (zoom, cell_x, cell_y) not in found
+        ])
+
+
+def update_pool_clusters(previous, current):
+    """Mueve una piscina entre celdas. ``previous``/``current`` son (lat, lng, current_state) o None."""
+    if previous == current:
+        return
+    with transaction.atomic():
+        if previous is not None:
+            _apply(*previous, sign=-1)
+        if current is not None:
+            _apply(*current, sign=1)
+
+
+def move_pools_in_clusters(moves, batch_size=1000):
+    """``update_pool_clusters`` para muchas piscinas a la vez (escrituras masivas).
+
+    Suma los deltas por celda y escribe un UPDATE por cada delta distinto: si solo
+    cambia la salubridad hay pocos, asi que el costo depende de las piscinas
+    movidas y no del total, a diferencia de ``rebuild_cluster_index``.
+    """
+    deltas = {}
+    for previous, current in moves:
+        if previous == current:
+            continue
+        for point, sign in ((previous, -1), (current, 1)):
+            if point is None:
+                continue
+            latitude, longitude, current_state = point
+            change = (
+                sign,
+                sign if current_state == 'HEALTHY' else 0,
+                sign if current_state == 'UNHEALTHY' else 0,
+                sign * float(latitude),
+                sign * float(longitude),
+            )
+            for key in cells_for(latitude, longitude):
+                delta = deltas.get(key)
+                deltas[key] = change if delta is None else tuple(a + b for a, b in zip(delta, change))
+    # El aporte de cada piscina se resta y se suma seguido, asi que los que se cancelan dan cero exacto
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    by_zoom = defaultdict(set)
+    for zoom, cell_x, cell_y in deltas:
+        by_zoom[zoom].add((cell_x, cell_y))
+    with transaction.atomic():
+        found = {}
+        for zoom, cells in by_zoom.items():
+            rows = PoolCluster.objects.select_for_update().filter(
+                zoom=zoom, cell_x__in={x for x, _ in cells}, cell_y__in={y for _, y in cells}
+            )
+            for pk, cell_x, cell_y in rows.values_list('pk', 'cell_x', 'cell_y'):
+                if (cell_x, cell_y) in cells:
+                    found[(zoom, cell_x, cell_y)] = pk
+        groups = defaultdict(list)
+        for key, pk in found.items():
+            groups[deltas[key]].append(pk)
+        for delta, pks in groups.items():
+            values = {name: F(name) + change for name, change in zip(DELTA_FIELDS, delta) if change}
+            for start in range(0, len(pks), batch_size):
+                PoolCluster.objects.filter(pk__in=pks[start:start + batch_size]).update(**values)
+        PoolCluster.objects.bulk_create(
+            [
+                PoolCluster(zoom=zoom, cell_x=cell_x, cell_y=cell_y, **dict(zip(DELTA_FIELDS, delta)))
+                for (zoom, cell_x, cell_y), delta in deltas.items()
+                if (zoom, cell_x, cell_y) not in found and delta[0] > 0
+            ],
+            batch_size=2000,
+        )
+
+
+def rebuild_cluster_index(pool_model=Pool, cluster_model=PoolCluster):
+    """Reconstruye todo el indice desde cero (tras cargas masivas que no emiten señales)."""
+    cells = {}
+    pools = pool_model.objects.filter(latitude__isnull=False, longitude__isnull=False).values_list(
+        'latitude', 'longitude', 'current_state'
+    )
+    for latitude, longitude, current_state in pools.iterator(chunk_size=2000):
+        for key in cells_for(latitude, longitude):
+            cell = cells.setdefault(key, [0, 0, 0, 0.0, 0.0])
+            cell[0] += 1
+            cell[1] += current_state == 'HEALTHY'
+            cell[2] += current_state == 'UNHEALTHY'
+            cell[3] += float(latitude)
+            cell[4] += float(longitude)
+    with transaction.atomic():
+        cluster_model.objects.all().delete()
+        cluster_model.objects.bulk_create(
+            (
+                cluster_model(
+                    zoom=zoom, cell_x=cell_x, cell_y=cell_y, count=count, healthy=healthy,
+                    unhealthy=unhealthy, latitude_sum=latitude_sum, longitude_sum=longitude_sum,
+                )
+                for (zoom, cell_x, cell_y), (count, healthy, unhealthy, latitude_sum, longitude_sum) in cells.items()
+            ),
+            batch_size=2000,
+        )
+    return len(cells)
+
+
+def tile_clusters(zoom, x, y):
+    """Clusters de un tile: a lo sumo ``CELLS_PER_TILE ** 2`` elementos."""
+    cells = PoolCluster.objects.filter(
+        zoom=zoom,
+        cell_x__gte=x * CELLS_PER_TILE,
+        cell_x__lt=(x + 1) * CELLS_PER_TILE,
+        cell_y__gte=y * CELLS_PER_TILE,
+        cell_y__lt=(y + 1) * CELLS_PER_TILE,
+        count__gt=0,
+    )
+    return [
+        {
+            'latitude': round(cell.latitude_sum / cell.count, 6),
+            'longitude': round(cell.longitude_sum / cell.count, 6),
+            'count': cell.count,
+            'healthy': cell.healthy,
+            'unhealthy': cell.unhealthy,
+        }
+        for cell in cells
+    ]
@@ -0,0 +1,106 @@
+"""Exportacion en streaming del padron (CSV, GeoJSON y NDJSON).
+
+Se recorre el queryset con ``iterator()`` sobre ``values_list`` y cada fila se
+codifica a mano, sin ``ModelSerializer``: la memoria no depende del numero de
+piscinas y el primer byte sale apenas llega el primer bloque de la base de datos.
+"""
+import csv
+import datetime
+from decimal import Decimal
+import io
+import json
+
+from django.utils import timezone
+
+from .models import Pool
+
+CHUNK_SIZE = 2000
+# Filas codificadas que se agrupan en cada escritura al socket
+ROWS_PER_WRITE = 200
+
+EXPORT_FIELDS = [field.name for field in Pool._meta.concrete_fields if field.name not in ('search_text', 'change_seq')]
+
+
+def to_json_value(value):
+    """Mismo formato que ``PoolSerializer``: decimales como texto y fechas ISO 8601."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        value = timezone.localtime(value) if timezone.is_aware(value) else value
+        text = value.isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def _batched(lines):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= ROWS_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _rows(queryset, fields):
+    return queryset.order_by('id').values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def export_csv(queryset, fields=EXPORT_FIELDS):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def lines():
+        writer.writerow(fields)
+        for row in _rows(queryset, fields):
+            writer.writerow(['' if value is None else to_json_value(value) for value in row])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return _batched(lines())
+
+
+def export_ndjson(queryset, fields=EXPORT_FIELDS):
+    def lines():
+        for row in _rows(queryset, fields):
+            record = {name: to_json_value(value) for name, value in zip(fields, row)}
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+
+    return _batched(lines())
+
+
+def export_geojson(queryset, fields=EXPORT_FIELDS):
+    properties = [name for name in fields if name not in ('latitude', 'longitude')]
+    columns = properties + ['latitude', 'longitude']
+
+    def lines():
+        yield '{"type": "FeatureCollection", "features": ['
+        separator = ''
+        for row in _rows(queryset, columns):
+            *values, latitude, longitude = row
+            geometry = None
+            if latitude is not None and longitude is not None:
+                geometry = {'type': 'Point', 'coordinates': [float(longitude), float(latitude)]}
+            feature = {
+                'type': 'Feature',
+                'geometry': geometry,
+                'properties': {name: to_json_value(value) for name, value in zip(properties, values)},
+            }
+            yield separator + json.dumps(feature, ensure_ascii=False)
+            separator = ',\n'
+        yield ']}\n'
+
+    return _batched(lines())
+
+
+EXPORTERS = {
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+    'geojson': (export_geojson, 'application/geo+json'),
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+}
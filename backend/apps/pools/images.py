@@ -0,0 +1,189 @@
+"""Fotos de piscinas: originales locales y miniaturas WebP/JPEG con nombre por contenido.
+
+Cada subida se identifica por el SHA-256 de sus bytes, asi que volver a subir la
+misma foto reutiliza su ``PoolImage`` sin procesarla otra vez. Las miniaturas se
+generan en Celery (``tasks.process_pool_image``): cada tamaño se reduce a partir
+del anterior y las codificaciones corren en un pool de hilos (Pillow libera el GIL
+al codificar). Los archivos se nombran con el hash de su contenido: una URL nunca
+cambia de contenido y WhiteNoise la sirve con cache ``immutable`` de un año.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
+import os
+from pathlib import Path
+import tempfile
+
+from django.conf import settings
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Pool, PoolImage
+
+DEFAULT_SETTINGS = {
+    'DIR': 'pools',
+    'SIZES': [160, 320, 640, 1280],
+    # Ancho del JPEG que queda en image_url (tarjetas y clientes sin srcset)
+    'FALLBACK_SIZE': 320,
+    'WEBP_QUALITY': 80,
+    'JPEG_QUALITY': 82,
+    'MAX_UPLOAD_SIZE': 15 * 1024 * 1024,
+    'MAX_PIXELS': 40_000_000,
+    'WORKERS': 4,
+}
+# Formato de Pillow -> extension del original
+ALLOWED_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+VARIANT_FORMATS = ('webp', 'jpeg')
+VARIANT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def image_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'POOL_IMAGES', {})}
+
+
+def media_path(name):
+    return Path(settings.MEDIA_ROOT) / name
+
+
+def media_url(name):
+    return f"{getattr(settings, 'MEDIA_BASE_URL', '').rstrip('/')}{settings.MEDIA_URL}{name}"
+
+
+def write_once(name, data):
+    """Escribe ``data`` en ``MEDIA_ROOT/name`` salvo que ya exista (el nombre depende del contenido)."""
+    path = media_path(name)
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    # Como FileSystemStorage: mkstemp deja 0600 y el servidor web no podria leer la imagen
+    os.fchmod(handle, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+    with os.fdopen(handle, 'wb') as output:
+        output.write(data)
+    os.replace(temporary, path)
+
+
+def srcset(image, variant_format='webp'):
+    variants = sorted((v for v in image.variants if v['format'] == variant_format), key=lambda v: v['width'])
+    return ', '.join(f"{media_url(v['name'])} {v['width']}w" for v in variants)
+
+
+def fallback_url(image):
+    """JPEG mas chico que cubre ``FALLBACK_SIZE`` (o el mas grande si la foto es menor)."""
+    variants = sorted((v for v in image.variants if v['format'] == 'jpeg'), key=lambda v: v['width'])
+    if not variants:
+        return None
+    target = image_settings()['FALLBACK_SIZE']
+    return media_url(next((v for v in variants if v['width'] >= target), variants[-1])['name'])
+
+
+def image_payload(image):
+    return {
+        'id': image.pk,
+        'status': image.status,
+        'width': image.width,
+        'height': image.height,
+        'original': media_url(image.original),
+        'image_url': fallback_url(image),
+        'srcset': {variant_format: srcset(image, variant_format) for variant_format in VARIANT_FORMATS},
+    }
+
+
+def store_upload(upload):
+    """Guarda el original de ``upload`` y devuelve ``(PoolImage, creado)``; valida tamaño y formato."""
+    config = image_settings()
+    if upload.size > config['MAX_UPLOAD_SIZE']:
+        raise ValueError(f"The image exceeds {config['MAX_UPLOAD_SIZE'] // (1024 * 1024)} MB.")
+    data = upload.read()
+    digest = hashlib.sha256(data).hexdigest()
+    existing = PoolImage.objects.filter(sha256=digest).first()
+    if existing is not None:
+        return existing, False
+
+    try:
+        # Solo lee el encabezado: las dimensiones se validan antes de decodificar
+        with Image.open(io.BytesIO(data)) as source:
+            image_format, (width, height) = source.format, source.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValueError("The file is not a valid image.")
+    if image_format not in ALLOWED_FORMATS:
+        raise ValueError("Unsupported image format; use JPEG, PNG or WebP.")
+    if width * height > config['MAX_PIXELS']:
+        raise ValueError("The image has too many pixels.")
+
+    original = f"{config['DIR']}/originals/{digest}.{ALLOWED_FORMATS[image_format]}"
+    write_once(original, data)
+    return PoolImage.objects.get_or_create(sha256=digest, defaults={
+        'original': original,
+        'format': image_format,
+        'width': width,
+        'height': height,
+        'size_bytes': len(data),
+    })
+
+
+def _encode(frame, variant_format, config):
+    buffer = io.BytesIO()
+    if variant_format == 'jpeg':
+        if frame.mode != 'RGB':
+            # JPEG no tiene transparencia: se compone sobre blanco
+            background = Image.new('RGB', frame.size, 'white')
+            background.paste(frame, mask=frame.getchannel('A') if 'A' in frame.getbands() else None)
+            frame = background
+        frame.save(buffer, 'JPEG', quality=config['JPEG_QUALITY'], optimize=True, progressive=True)
+    else:
+        frame.save(buffer, 'WEBP', quality=config['WEBP_QUALITY'], method=4)
+    data = buffer.getvalue()
+    name = f"{config['DIR']}/{hashlib.sha256(data).hexdigest()[:20]}.{VARIANT_EXTENSIONS[variant_format]}"
+    write_once(name, data)
+    return {'format': variant_format, 'width': frame.width, 'height': frame.height, 'name': name, 'bytes': len(data)}
+
+
+def render_variants(image):
+    """Genera las miniaturas (sin ampliar fotos chicas) y devuelve su lista para ``PoolImage.variants``."""
+    config = image_settings()
+    with Image.open(media_path(image.original)) as source:
+        frame = ImageOps.exif_transpose(source)
+        frame = frame.convert('RGBA' if 'A' in frame.getbands() or 'transparency' in frame.info else 'RGB')
+    widths = sorted({min(width, frame.width) for width in config['SIZES']}, reverse=True)
+    frames = []
+    for width in widths:
+        height = max(1, round(frame.height * width / frame.width))
+        if frame.size != (width, height):
+            # Cada tamaño sale del anterior: reducir una imagen ya chica es mucho mas barato
+            frame = frame.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        frames.append(frame)
+    # save() deja sus parametros en la imagen (encoderinfo): cada hilo codifica su propia copia
+    jobs = [(frame.copy(), variant_format) for frame in reversed(frames) for variant_format in VARIANT_FORMATS]
+    with ThreadPoolExecutor(max_workers=config['WORKERS']) as executor:
+        return list(executor.map(lambda job: _encode(*job, config), jobs))
+
+
+def process_image(image):
+    """Genera las miniaturas de ``image`` y actualiza las piscinas que la usan."""
+    if image.status != 'READY':
+        try:
+            image.variants = render_variants(image)
+        except (OSError, ValueError, Image.DecompressionBombError) as exc:
+            image.status, image.error = 'FAILED', str(exc)
+            image.save(update_fields=['status', 'error'])
+            return image
+        image.status, image.error = 'READY', ''
+        image.save(update_fields=['variants', 'status', 'error'])
+    # Casi siempre es una piscina (o pocas, si comparten la foto): guardarlas una por una
+    # invalida solo las etiquetas de su distrito y estado, y reconstruye solo su snapshot
+    with transaction.atomic():
+        for pool in Pool.objects.filter(image=image):
+            pool.image_url, pool.image_srcset = fallback_url(image), srcset(image)
+            pool.save(update_fields=['image_url', 'image_srcset'])
+    return image
+
+
+def attach_image(pool, image):
+    """Asigna ``image`` a ``pool``; si ya tiene miniaturas, copia sus URLs en el mismo guardado."""
+    pool.image = image
+    update_fields = ['image']
+    if image.status == 'READY':
+        pool.image_url, pool.image_srcset = fallback_url(image), srcset(image)
+        update_fields += ['image_url', 'image_srcset']
+    pool.save(update_fields=update_fields)
@@ -0,0 +1,262 @@
+"""Importacion masiva del padron de piscinas de DIGESA (CSV o XLSX).
+
+El archivo se lee fila por fila, se valida por lotes con las reglas de
+``PoolSerializer`` y cada lote se guarda con un solo ``INSERT ... ON CONFLICT``
+sobre ``file_number``. Los errores se reportan por fila sin detener la carga.
+
+El archivo debe traer todas las columnas obligatorias del serializer, aunque solo
+actualice piscinas existentes: el ``INSERT`` necesita la fila completa. Sin ellas
+se rechaza de entrada en vez de fallar fila por fila.
+"""
+import codecs
+import csv
+import datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+import re
+import unicodedata
+
+from django.db import models, transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import SEARCH_FIELDS, Pool, next_change_seq
+from .search import refresh_search_text
+from .serializers import PoolSerializer
+from .signals import pools_bulk_changed
+
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+# Encabezados habituales del padron (normalizados) -> campo del modelo
+COLUMN_ALIASES = {
+    'n_expediente': 'file_number',
+    'nro_expediente': 'file_number',
+    'expediente': 'file_number',
+    'razon_social': 'legal_name',
+    'titular': 'legal_name',
+    'nombre_comercial': 'commercial_name',
+    'tipo': 'pool_type',
+    'tipo_de_piscina': 'pool_type',
+    'direccion': 'address',
+    'distrito': 'district',
+    'aforo': 'capacity',
+    'capacidad': 'capacity',
+    'area': 'area_m2',
+    'area_m2': 'area_m2',
+    'volumen': 'volume_m3',
+    'volumen_m3': 'volume_m3',
+    'resolucion': 'approval_resolution_number',
+    'n_resolucion': 'approval_resolution_number',
+    'fecha_aprobacion': 'approval_date',
+    'fecha_de_aprobacion': 'approval_date',
+    'estado': 'state',
+    'observaciones': 'observations',
+    'fecha_vencimiento': 'expiration_date',
+    'fecha_de_vencimiento': 'expiration_date',
+    'fecha_ultima_inspeccion': 'last_inspection_date',
+    'ultima_inspeccion': 'last_inspection_date',
+    'estado_actual': 'current_state',
+    'salubridad': 'current_state',
+    'latitud': 'latitude',
+    'longitud': 'longitude',
+    'imagen': 'image_url',
+    'calificacion': 'rating',
+}
+IMPORT_FIELDS = [
+    field.name for field in Pool._meta.concrete_fields
+    if field.editable and not field.primary_key and field.name != 'updated_at'
+]
+
+
+class PoolImportSerializer(PoolSerializer):
+    class Meta(PoolSerializer.Meta):
+        fields = IMPORT_FIELDS
+        # La unicidad de file_number la resuelve el upsert, no una consulta por fila
+        extra_kwargs = {'file_number': {'validators': []}}
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+def normalize_header(header):
+    text = unicodedata.normalize('NFKD', str(header or '')).encode('ascii', 'ignore').decode()
+    text = re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+    return text if text in IMPORT_FIELDS else COLUMN_ALIASES.get(text)
+
+
+def read_csv(fileobj):
+    text = codecs.getreader('utf-8-sig')(fileobj)
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    yield header
+    yield from reader
+
+
+def read_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ValueError("XLSX import requires openpyxl.") from exc
+    # read_only recorre la hoja sin cargarla entera en memoria
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, filename):
+    """Genera primero la lista de campos reconocidos y luego ``(numero_de_fila, dict)`` por fila."""
+    if filename.lower().endswith('.xlsx'):
+        rows = read_xlsx(fileobj)
+    elif filename.lower().endswith('.csv'):
+        rows = read_csv(fileobj)
+    else:
+        raise ValueError("Unsupported file type; use .csv or .xlsx.")
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("The file is empty.")
+    columns = [normalize_header(name) for name in header]
+    if 'file_number' not in columns:
+        raise ValueError("The file has no file number column.")
+    # Dos encabezados pueden ser el mismo campo (expediente y n_expediente): gana la ultima columna
+    yield list(dict.fromkeys(name for name in columns if name))
+    for number, values in enumerate(rows, start=2):
+        if not any(value not in (None, '') for value in values):
+            continue
+        yield number, {name: value for name, value in zip(columns, values) if name}
+
+
+def clean_value(field, value):
+    """Adapta valores de Excel/CSV a lo que espera el serializer."""
+    if isinstance(value, str):
+        value = value.strip()
+    if value in (None, ''):
+        return None
+    if isinstance(field, models.DateField) and isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(field, models.DecimalField) and isinstance(value, (float, int)):
+        try:
+            return Decimal(str(value)).quantize(Decimal(1).scaleb(-field.decimal_places), ROUND_HALF_UP)
+        except InvalidOperation:
+            return value
+    if isinstance(field, models.CharField) and isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value
+
+
+def clean_row(row):
+    data = {}
+    for name, value in row.items():
+        field = Pool._meta.get_field(name)
+        value = clean_value(field, value)
+        if value is None:
+            if field.null:
+                data[name] = None
+            # Si no admite nulos se omite: el serializer reporta el faltante o usa el default
+            continue
+        data[name] = value
+    return data
+
+
+def refresh_geohash(queryset, batch_size=2000):
+    """Recalcula ``geohash`` con las coordenadas guardadas (el archivo traia solo una)."""
+    pools = []
+    for pool in queryset.only('id', 'latitude', 'longitude').iterator(chunk_size=batch_size):
+        pool.geohash = pool.compute_geohash()
+        pools.append(pool)
+        if len(pools) >= batch_size:
+            Pool.objects.bulk_update(pools, ['geohash'])
+            pools = []
+    if pools:
+        Pool.objects.bulk_update(pools, ['geohash'])
+
+
+def _import_batch(batch, validator, update_fields, report, dry_run):
+    # Si un file_number se repite gana la ultima fila, igual que entre lotes (ON CONFLICT no admite duplicados)
+    unique = {}
+    for number, row in batch:
+        try:
+            data = validator.run_validation(row)
+        except ValidationError as exc:
+            report.add_error(number, exc.detail)
+            continue
+        unique.pop(data['file_number'], None)
+        unique[data['file_number']] = data
+    if not unique:
+        return
+
+    pools = []
+    for data in unique.values():
+        pool = Pool(**data)
+        pool.geohash = pool.compute_geohash()
+        pool.search_text = pool.compute_search_text()
+        pools.append(pool)
+    existing = Pool.objects.filter(file_number__in=unique).count()
+    if not dry_run:
+        with transaction.atomic():
+            seq = next_change_seq()
+            for pool in pools:
+                pool.change_seq = seq
+            Pool.objects.bulk_create(
+                pools, update_conflicts=True, unique_fields=['file_number'], update_fields=update_fields
+            )
+            if 'search_text' not in update_fields:
+                # El archivo no trae todos los campos de busqueda: se recalcula con los de la base
+                refresh_search_text(Pool.objects.filter(file_number__in=unique))
+            if 'geohash' not in update_fields and {'latitude', 'longitude'} & set(update_fields):
+                # Igual con una sola coordenada: la otra esta en la base
+                refresh_geohash(Pool.objects.filter(file_number__in=unique))
+    report.created += len(pools) - existing
+    report.updated += existing
+
+
+def import_pools(fileobj, filename, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Importa el archivo y devuelve un ``ImportReport``."""
+    report = ImportReport()
+    # Un solo serializer para todo el archivo: los campos de DRF se construyen una vez
+    validator = PoolImportSerializer()
+    rows = read_rows(fileobj, filename)
+    columns = next(rows)
+    missing = [name for name, field in validator.fields.items() if field.required and name not in columns]
+    if missing:
+        raise ValueError(f"The file is missing required columns: {', '.join(missing)}.")
+    # Solo se sobrescriben las columnas presentes en el archivo (entre las opcionales)
+    update_fields = [name for name in columns if name != 'file_number'] + ['updated_at', 'change_seq']
+    if {'latitude', 'longitude'} <= set(columns):
+        update_fields.append('geohash')
+    if set(SEARCH_FIELDS) <= set(columns):
+        update_fields.append('search_text')
+    batch = []
+    for number, row in rows:
+        report.rows += 1
+        batch.append((number, clean_row(row)))
+        if len(batch) >= batch_size:
+            _import_batch(batch, validator, update_fields, report, dry_run)
+            batch = []
+    if batch:
+        _import_batch(batch, validator, update_fields, report, dry_run)
+    if not dry_run and (report.created or report.updated):
+        pools_bulk_changed.send(sender=Pool)
+    return report
@@ -0,0 +1,135 @@
+"""Historial de inspecciones y agregados mensuales por distrito.
+
+``pool_inspections`` solo crece: se indexa por (piscina, fecha) para el historial
+de una piscina y, en PostgreSQL, con un indice BRIN sobre ``inspection_date``,
+diminuto mientras las filas lleguen en orden cronologico. Cada inspeccion suma
+su veredicto y sus mediciones a la fila (distrito, mes) de ``InspectionRollup``,
+asi que la salubridad en el tiempo se lee de a lo sumo distritos x meses filas,
+sin recorrer las inspecciones.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Inspection, InspectionRollup, Pool
+
+MEASUREMENTS = ('free_chlorine', 'ph', 'turbidity')
+# Campos de una inspeccion de los que dependen los agregados y la piscina
+ROLLUP_FIELDS = ('pool_id', 'district', 'inspection_date', 'verdict', *MEASUREMENTS)
+MAX_TREND_MONTHS = 120
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def shift_month(month, delta):
+    index = month.year * 12 + month.month - 1 + delta
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def _apply(values, sign):
+    deltas = {
+        'inspections': F('inspections') + sign,
+        'healthy': F('healthy') + (sign if values['verdict'] == 'HEALTHY' else 0),
+        'unhealthy': F('unhealthy') + (sign if values['verdict'] == 'UNHEALTHY' else 0),
+    }
+    for name in MEASUREMENTS:
+        if values[name] is not None:
+            deltas[f'{name}_sum'] = F(f'{name}_sum') + sign * float(values[name])
+            deltas[f'{name}_count'] = F(f'{name}_count') + sign
+    rollup, _ = InspectionRollup.objects.select_for_update().get_or_create(
+        district=values['district'], month=month_start(values['inspection_date'])
+    )
+    InspectionRollup.objects.filter(pk=rollup.pk).update(**deltas)
+
+
+def update_inspection_rollups(previous, current):
+    """Mueve una inspeccion entre agregados. ``previous``/``current`` son dicts de ``ROLLUP_FIELDS`` o None."""
+    if previous == current:
+        return
+    with transaction.atomic():
+        if previous is not None:
+            _apply(previous, sign=-1)
+        if current is not None:
+            _apply(current, sign=1)
+
+
+def rebuild_inspection_rollups(inspection_model=Inspection, rollup_model=InspectionRollup):
+    """Recalcula todos los agregados con una consulta agrupada (tras cargas masivas)."""
+    annotations = {
+        'inspections': Count('id'),
+        'healthy': Count('id', filter=Q(verdict='HEALTHY')),
+        'unhealthy': Count('id', filter=Q(verdict='UNHEALTHY')),
+    }
+    for name in MEASUREMENTS:
+        annotations[f'{name}_sum'] = Sum(name)
+        annotations[f'{name}_count'] = Count(name)
+    rows = (
+        inspection_model.objects.order_by()
+        .values('district', period=TruncMonth('inspection_date'))
+        .annotate(**annotations)
+    )
+    rollups = []
+    for row in rows:
+        for name in MEASUREMENTS:
+            row[f'{name}_sum'] = float(row[f'{name}_sum'] or 0)
+        rollups.append(rollup_model(month=row.pop('period'), **row))
+    with transaction.atomic():
+        rollup_model.objects.all().delete()
+        rollup_model.objects.bulk_create(rollups, batch_size=2000)
+    return len(rollups)
+
+
+def sync_pool_inspection_state(pool_id):
+    """Copia veredicto y fecha de la ultima inspeccion a la piscina (sin inspecciones no la toca)."""
+    latest = (
+        Inspection.objects.filter(pool_id=pool_id)
+        .order_by('-inspection_date', '-id')
+        .values('inspection_date', 'verdict')
+        .first()
+    )
+    if latest is None:
+        return
+    pool = Pool.objects.filter(pk=pool_id).first()
+    if pool is None or (pool.last_inspection_date, pool.current_state) == (latest['inspection_date'], latest['verdict']):
+        return
+    pool.last_inspection_date = latest['inspection_date']
+    pool.current_state = latest['verdict']
+    # save() con update_fields: las señales de Pool actualizan clusters, estadisticas y cache
+    pool.save(update_fields=['last_inspection_date', 'current_state'])
+
+
+def _average(total, count):
+    return round(total / count, 2) if count else None
+
+
+def health_over_time(district=None, months=12, today=None):
+    """Serie mensual de los ultimos ``months`` meses (incluido el actual), de todos los distritos o de uno."""
+    end = month_start(today or timezone.localdate())
+    start = shift_month(end, 1 - months)
+    rollups = InspectionRollup.objects.filter(month__gte=start, month__lte=end)
+    if district:
+        rollups = rollups.filter(district__iexact=district.strip())
+
+    totals = {}
+    for rollup in rollups:
+        month = totals.setdefault(rollup.month, dict.fromkeys((
+            'inspections', 'healthy', 'unhealthy', *(f'{name}_{part}' for name in MEASUREMENTS for part in ('sum', 'count'))
+        ), 0))
+        for name in month:
+            month[name] += getattr(rollup, name)
+
+    series = []
+    for offset in range(months):
+        month = shift_month(start, offset)
+        row = totals.get(month)
+        entry = {'month': month.strftime('%Y-%m'), 'inspections': 0, 'healthy': 0, 'unhealthy': 0, 'healthy_ratio': None}
+        if row is not None:
+            entry.update(inspections=row['inspections'], healthy=row['healthy'], unhealthy=row['unhealthy'])
+            entry['healthy_ratio'] = _average(row['healthy'], row['inspections'])
+        for name in MEASUREMENTS:
+            entry[f'average_{name}'] = _average(row[f'{name}_sum'], row[f'{name}_count']) if row else None
+        series.append(entry)
+    return {'district': district or None, 'months': months, 'series': series}
@@ -0,0 +1,110 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from apps.pools.models import Pool, filter_district
+from apps.pools.spatial import filter_bbox
+from apps.pools.synthetic import seed_pools
+
+SEQ_SCAN = re.compile(r'Seq Scan on (?P<table>\w+).*?actual time=\S+ rows=(?P<rows>\d+) loops=(?P<loops>\d+)')
+REMOVED = re.compile(r'Rows Removed by Filter: (?P<removed>\d+)')
+
+
+class Rollback(Exception):
+    pass
+
+
+def endpoint_querysets(page_size):
+    """Consultas equivalentes a las de cada endpoint de listado (primera pagina por cursor)."""
+    sample = Pool.objects.order_by('id').values('state', 'current_state', 'district').first()
+    if sample is None:
+        raise CommandError("No pools to audit; use --seed.")
+    pools = Pool.objects.order_by('id')
+    latitude, longitude = -16.3989, -71.5350
+    return [
+        ('all-pools', pools[:page_size], False),
+        ('pools-by-state', pools.filter(state=sample['state'])[:page_size], True),
+        ('pools-by-district', filter_district(pools, sample['district'].lower())[:page_size], True),
+        ('pool-filters', pools.filter(state=sample['state'], current_state=sample['current_state'],
+                                      district=sample['district'])[:page_size], True),
+        ('pool-filters (current_state)', pools.filter(current_state=sample['current_state'])[:page_size], True),
+        ('pool-filters (district)', pools.filter(district=sample['district'])[:page_size], True),
+        ('pools-nearby', filter_bbox(Pool.objects.all(), longitude - 0.01, latitude - 0.01,
+                                     longitude + 0.01, latitude + 0.01), True),
+        ('pool-statistics', Pool.objects.order_by().values('state').annotate(count=Count('id')), False),
+    ]
+
+
+def postgres_seq_scans(plan):
+    """Filas examinadas por cada Seq Scan del plan de EXPLAIN ANALYZE."""
+    scans = []
+    lines = plan.splitlines()
+    for index, line in enumerate(lines):
+        match = SEQ_SCAN.search(line)
+        if not match:
+            continue
+        examined = int(match['rows'])
+        for detail in lines[index + 1:]:
+            if '->' in detail:
+                break
+            removed = REMOVED.search(detail)
+            if removed:
+                examined += int(removed['removed'])
+        scans.append((match['table'], examined * int(match['loops'])))
+    return scans
+
+
+def sqlite_seq_scans(plan, table):
+    # SQLite no tiene EXPLAIN ANALYZE: un "SCAN tabla" sin indice es un recorrido completo
+    return [(table, None) for line in plan.splitlines()
+            if re.search(rf'\bSCAN {table}\b', line) and 'INDEX' not in line]
+
+
+class Command(BaseCommand):
+    help = "Ejecuta EXPLAIN ANALYZE sobre las consultas de los endpoints y falla si hay Seq Scans grandes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Piscinas sinteticas a cargar antes de auditar (se revierten al terminar).")
+        parser.add_argument('--threshold', type=int, default=1000,
+                            help="Maximo de filas que puede examinar un Seq Scan.")
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--verbose-plans', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    seed_pools(options['seed'], seed=99)
+                    if connection.vendor == 'postgresql':
+                        with connection.cursor() as cursor:
+                            cursor.execute(f'ANALYZE {Pool._meta.db_table}')
+                failures = self.audit(options)
+                raise Rollback
+        except Rollback:
+            pass
+        if failures:
+            raise CommandError(f"Sequential scans above threshold: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All audited queries use indexes."))
+
+    def audit(self, options):
+        table = Pool._meta.db_table
+        failures = []
+        for name, queryset, must_use_index in endpoint_querysets(options['page_size']):
+            if connection.vendor == 'postgresql':
+                plan = queryset.explain(analyze=True, buffers=True)
+                scans = [scan for scan in postgres_seq_scans(plan) if scan[0] == table]
+                flagged = [rows for _, rows in scans if rows > options['threshold']]
+            else:
+                plan = queryset.explain()
+                scans = sqlite_seq_scans(plan, table)
+                flagged = scans if must_use_index else []
+            if flagged:
+                failures.append(name)
+            status = self.style.ERROR('SEQ SCAN') if flagged else self.style.SUCCESS('OK')
+            self.stdout.write(f"{name:32} {status}")
+            if options['verbose_plans'] or flagged:
+                self.stdout.write(plan)
+        return failures
@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.pools.benchmarks import compare, run_benchmark
+from apps.pools.models import Pool
+from apps.pools.synthetic import seed_pools
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mide latencia, consultas y bytes de cada endpoint de piscinas y del login JWT."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=5000,
+                            help="Piscinas sinteticas a cargar (0 usa los datos existentes). Se revierten al final.")
+        parser.add_argument('--requests', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--output', default='bench_results.json')
+        parser.add_argument('--baseline', help="JSON de una corrida anterior para detectar regresiones.")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Aumento relativo de p95 permitido frente a la linea base.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['size']:
+                    seed_pools(options['size'], seed=4242)
+                    if connection.vendor == 'postgresql':
+                        with connection.cursor() as cursor:
+                            cursor.execute(f'ANALYZE {Pool._meta.db_table}')
+                try:
+                    report = run_benchmark(options['requests'], options['warmup'], stdout=self.stdout)
+                except ValueError as exc:
+                    raise CommandError(str(exc)) from exc
+                raise Rollback
+        except Rollback:
+            pass
+
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text())
+            regressions = compare(report, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Performance regressions:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,42 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.pools.benchmarks import run_concurrency_benchmark
+from apps.pools.synthetic import clear_synthetic_pools, seed_pools
+
+BENCH_SEED = 9010
+
+
+class Command(BaseCommand):
+    help = "Compara req/s de las lecturas DRF bajo WSGI (N hilos) y de las vistas async bajo ASGI (un event loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=5000,
+                            help="Piscinas sinteticas a cargar (0 usa los datos existentes). Se borran al final.")
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, default=32, help="Clientes simultaneos.")
+        parser.add_argument('--threads', type=int, default=4,
+                            help="Hilos del worker WSGI (equivale a gunicorn --threads).")
+        parser.add_argument('--db-latency', type=float, default=0,
+                            help="Milisegundos agregados a cada consulta para simular la red hasta PostgreSQL.")
+        parser.add_argument('--output', default='bench_async_results.json')
+
+    def handle(self, *args, **options):
+        # Los hilos usan sus propias conexiones: los datos tienen que quedar confirmados
+        if options['size']:
+            seed_pools(options['size'], seed=BENCH_SEED)
+        try:
+            report = run_concurrency_benchmark(
+                options['requests'], options['concurrency'], options['threads'],
+                db_latency=options['db_latency'], stdout=self.stdout,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            if options['size']:
+                clear_synthetic_pools(seed=BENCH_SEED)
+
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
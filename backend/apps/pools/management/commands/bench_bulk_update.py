@@ -0,0 +1,98 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.pools.benchmarks import BENCH_PASSWORD
+from apps.pools.models import Pool
+from apps.pools.synthetic import SYNTHETIC_PREFIX, generate_pools
+from apps.pools.signals import pools_bulk_changed
+
+BENCH_SEED = 9011
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compara items/segundo de N PATCH secuenciales y de un POST a /pool/bulk-update/ con los mismos cambios."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--size', type=int, default=5000, help="Piscinas sinteticas a cargar. Se revierten al final.")
+        parser.add_argument('--min-speedup', type=float, default=10.0,
+                            help="Falla si el lote no es al menos N veces mas rapido.")
+
+    def handle(self, *args, **options):
+        if options['items'] > options['size']:
+            raise CommandError("--items cannot exceed --size.")
+        try:
+            with transaction.atomic():
+                speedup = self.run(options['items'], options['size'])
+                raise Rollback
+        except Rollback:
+            pass
+        if speedup < options['min_speedup']:
+            raise CommandError(f"Bulk update is only {speedup:.1f}x faster (expected {options['min_speedup']:.0f}x).")
+
+    def updates(self, pools, round_number):
+        # Lo que sube un inspector al final del dia: salubridad, fecha de visita y observaciones
+        return [
+            {
+                'current_state': 'UNHEALTHY' if (index + round_number) % 3 == 0 else 'HEALTHY',
+                'last_inspection_date': f'2026-0{round_number + 1}-{index % 28 + 1:02d}',
+                'observations': f'Ronda {round_number}, visita {index}',
+            }
+            for index in range(len(pools))
+        ]
+
+    def run(self, items, size):
+        Pool.objects.bulk_create(generate_pools(size, seed=BENCH_SEED), batch_size=2000)
+        pools_bulk_changed.send(sender=Pool)
+        pools = list(
+            Pool.objects.filter(file_number__startswith=f'{SYNTHETIC_PREFIX}{BENCH_SEED}-')
+            .order_by('id').values_list('id', 'file_number')[:items]
+        )
+        user = get_user_model().objects.create_superuser(
+            'bench-bulk@example.com', BENCH_PASSWORD, username='bench-bulk', first_name='Bench', last_name='User'
+        )
+        client = Client(HTTP_AUTHORIZATION=f'JWT {RefreshToken.for_user(user).access_token}')
+
+        # Dentro de la transaccion del benchmark cada PATCH no paga su propio COMMIT: la linea base es optimista
+        start = time.perf_counter()
+        for (pool_id, _), changes in zip(pools, self.updates(pools, 0)):
+            response = client.patch(
+                reverse('pool-detail-from-all', kwargs={'pk': pool_id}), json.dumps(changes),
+                content_type='application/json',
+            )
+            if response.status_code != 200:
+                raise CommandError(f"PATCH failed with {response.status_code}: {response.content[:200]}")
+        sequential = time.perf_counter() - start
+
+        # La mitad de los items por id y la otra mitad por file_number
+        payload = [
+            {'id': pool_id, **changes} if index % 2 else {'file_number': file_number, **changes}
+            for index, ((pool_id, file_number), changes) in enumerate(zip(pools, self.updates(pools, 1)))
+        ]
+        start = time.perf_counter()
+        response = client.post(reverse('pool-bulk-update'), json.dumps(payload), content_type='application/json')
+        bulk = time.perf_counter() - start
+        if response.status_code != 200 or response.json()['updated'] != len(pools):
+            raise CommandError(f"Bulk update failed with {response.status_code}: {response.content[:200]}")
+        expected = {pool_id: changes['observations'] for (pool_id, _), changes in zip(pools, self.updates(pools, 1))}
+        stored = dict(Pool.objects.filter(pk__in=expected).values_list('id', 'observations'))
+        if stored != expected:
+            raise CommandError("Bulk update did not store the expected values.")
+
+        speedup = sequential / bulk
+        self.stdout.write(f"{'method':<24} {'seconds':>9} {'items/s':>10}")
+        self.stdout.write(f"{'PATCH x ' + str(len(pools)):<24} {sequential:>9.3f} {len(pools) / sequential:>10,.0f}")
+        self.stdout.write(f"{'bulk-update':<24} {bulk:>9.3f} {len(pools) / bulk:>10,.0f}")
+        self.stdout.write(f"speedup: {speedup:.1f}x")
+        return speedup
@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.pools.benchmarks import run_connection_benchmark
+from apps.pools.synthetic import clear_synthetic_pools, seed_pools
+from core.database import CONN_MODES
+
+BENCH_SEED = 9012
+
+
+class Command(BaseCommand):
+    help = ("Compara latencia por request y conexiones abiertas en PostgreSQL con cada DATABASE_CONN_MODE "
+            "bajo carga concurrente.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=2000,
+                            help="Piscinas sinteticas a cargar (0 usa los datos existentes). Se borran al final.")
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, default=32, help="Clientes simultaneos.")
+        parser.add_argument('--threads', type=int, default=8,
+                            help="Hilos del worker WSGI (equivale a gunicorn --threads).")
+        parser.add_argument('--modes', default=','.join(CONN_MODES),
+                            help="Modos a comparar, separados por comas. El pool usa los DATABASE_POOL_* del entorno.")
+        parser.add_argument('--output', default='bench_db_pool_results.json')
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = sorted(set(modes) - set(CONN_MODES))
+        if unknown:
+            raise CommandError(f"Unknown connection modes: {', '.join(unknown)}.")
+        # Los hilos usan sus propias conexiones: los datos tienen que quedar confirmados
+        if options['size']:
+            seed_pools(options['size'], seed=BENCH_SEED)
+        try:
+            report = run_connection_benchmark(
+                modes, options['requests'], options['concurrency'], options['threads'], stdout=self.stdout,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            if options['size']:
+                clear_synthetic_pools(seed=BENCH_SEED)
+
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.pools.models import Pool
+from apps.pools.serializers import PoolRowSerializer, PoolSerializer
+from apps.pools.synthetic import SYNTHETIC_PREFIX, generate_pools
+
+BENCH_SEED = 9009
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compara filas/segundo de PoolSerializer y PoolRowSerializer sobre datos sinteticos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help="Se reporta la mejor de N corridas.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['sizes'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def best_of(self, repeat, func):
+        best, result = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def run(self, sizes, repeat):
+        # Solo se miden las piscinas generadas aqui; todo se revierte al final
+        queryset = Pool.objects.filter(file_number__startswith=f'{SYNTHETIC_PREFIX}{BENCH_SEED}-').order_by('id')
+        loaded = queryset.count()
+        self.stdout.write(f"{'rows':>8} {'PoolSerializer':>16} {'PoolRowSerializer':>18} {'speedup':>8}")
+        for size in sorted(sizes):
+            if size > loaded:
+                Pool.objects.bulk_create(generate_pools(size - loaded, seed=BENCH_SEED, start=loaded), batch_size=2000)
+                loaded = size
+
+            drf_time, drf_data = self.best_of(repeat, lambda: PoolSerializer(queryset.all(), many=True).data)
+            row_serializer = PoolRowSerializer()
+            fast_time, fast_data = self.best_of(
+                repeat, lambda: row_serializer.serialize(row_serializer.values(queryset.all()))
+            )
+            if [dict(row) for row in drf_data] != fast_data:
+                raise CommandError(f"Outputs differ at {size} rows.")
+
+            self.stdout.write(
+                f"{size:>8} {size / drf_time:>12,.0f} r/s {size / fast_time:>14,.0f} r/s {drf_time / fast_time:>7.1f}x"
+            )
@@ -0,0 +1,81 @@
+import gzip
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from apps.pools.models import Pool
+from apps.pools.renderers import ColumnarJSONRenderer, MessagePackRenderer, from_columns, msgpack
+from apps.pools.serializers import PoolRowSerializer
+from apps.pools.synthetic import SYNTHETIC_PREFIX, generate_pools
+
+BENCH_SEED = 9025
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Compara bytes, tiempo de codificacion en el servidor y de decodificacion en el cliente de JSON, "
+            "JSON columnar y MessagePack sobre datos sinteticos.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help="Se reporta la mejor de N corridas.")
+        parser.add_argument('--fields', default='',
+                            help="Campos separados por comas, como ?fields= (p. ej. los del mapa). Por defecto todos.")
+
+    def handle(self, *args, **options):
+        fields = [name.strip() for name in options['fields'].split(',') if name.strip()] or None
+        try:
+            with transaction.atomic():
+                self.run(options['sizes'], options['repeat'], fields)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def best_of(self, repeat, func):
+        best, result = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def formats(self):
+        formats = [
+            ('json', JSONRenderer(), json.loads, lambda data: data),
+            ('columnar', ColumnarJSONRenderer(), json.loads, from_columns),
+        ]
+        if msgpack is not None:
+            formats.append(('msgpack', MessagePackRenderer(), msgpack.unpackb, from_columns))
+        return formats
+
+    def run(self, sizes, repeat, fields):
+        # Solo se miden las piscinas generadas aqui; todo se revierte al final
+        queryset = Pool.objects.filter(file_number__startswith=f'{SYNTHETIC_PREFIX}{BENCH_SEED}-').order_by('id')
+        loaded = queryset.count()
+        row_serializer = PoolRowSerializer(fields=fields)
+        self.stdout.write(
+            f"{'rows':>8} {'format':<9} {'bytes':>12} {'gzip':>11} {'encode':>10} {'parse':>10} {'to rows':>10}"
+        )
+        for size in sorted(sizes):
+            if size > loaded:
+                Pool.objects.bulk_create(generate_pools(size - loaded, seed=BENCH_SEED, start=loaded), batch_size=2000)
+                loaded = size
+            # Las filas son las mismas para los tres formatos; solo se mide lo que cambia entre ellos
+            rows = row_serializer.serialize(row_serializer.values(queryset.all()[:size]))
+            for name, renderer, parse, to_rows in self.formats():
+                encode_time, body = self.best_of(repeat, lambda: renderer.render(rows))
+                parse_time, parsed = self.best_of(repeat, lambda: parse(body))
+                rows_time, decoded = self.best_of(repeat, lambda: to_rows(parsed))
+                if [row['id'] for row in decoded] != [row['id'] for row in rows]:
+                    raise CommandError(f"{name} does not round-trip at {size} rows.")
+                self.stdout.write(
+                    f"{size:>8} {name:<9} {len(body):>12,} {len(gzip.compress(body, 6)):>11,} "
+                    f"{encode_time * 1000:>7.1f} ms {parse_time * 1000:>7.1f} ms {rows_time * 1000:>7.1f} ms"
+                )
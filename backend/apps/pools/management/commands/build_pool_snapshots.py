@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.pools.snapshots import build_snapshots, snapshot_root
+
+
+class Command(BaseCommand):
+    help = "Reconstruye todas las copias estaticas comprimidas de los listados publicos y su manifiesto."
+
+    def handle(self, *args, **options):
+        result = build_snapshots()
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshots written to {snapshot_root()}: {result['written']} files, {result['removed']} old versions removed."
+        ))
@@ -0,0 +1,32 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.pools.importers import DEFAULT_BATCH_SIZE, import_pools
+
+
+class Command(BaseCommand):
+    help = "Importa (o actualiza por file_number) el padron de piscinas desde un archivo CSV o XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Valida el archivo sin guardar nada.")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+        with path.open('rb') as fileobj:
+            try:
+                report = import_pools(fileobj, path.name, options['batch_size'], options['dry_run'])
+            except ValueError as exc:
+                raise CommandError(str(exc)) from exc
+
+        for error in report.errors:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        summary = (
+            f"{report.rows} rows: {report.created} created, {report.updated} updated, {report.failed} failed."
+        )
+        self.stdout.write(self.style.SUCCESS(summary) if not report.failed else self.style.WARNING(summary))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.pools.clustering import rebuild_cluster_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el indice de clusters del mapa desde la tabla de piscinas."
+
+    def handle(self, *args, **options):
+        cells = rebuild_cluster_index()
+        self.stdout.write(self.style.SUCCESS(f"Cluster index rebuilt: {cells} cells."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.pools.synthetic import clear_synthetic_pools, seed_pools
+
+
+class Command(BaseCommand):
+    help = "Carga piscinas sinteticas (distribucion de Arequipa) para pruebas de rendimiento."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--clear', action='store_true', help="Elimina las piscinas sinteticas existentes.")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted = clear_synthetic_pools()
+            self.stdout.write(f"Deleted {deleted} synthetic pools.")
+        if options['count']:
+            created = seed_pools(options['count'], seed=options['seed'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Created {created} synthetic pools."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+from apps.pools.spatial import encode
+
+
+def populate_geohash(apps, schema_editor):
+    Pool = apps.get_model('pools', 'Pool')
+    pools = Pool.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for pool in pools.iterator():
+        pool.geohash = encode(pool.latitude, pool.longitude)
+        pool.save(update_fields=['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0002_pool_image_url_pool_latitude_pool_longitude_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pool',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True, verbose_name='Geohash'),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['geohash'], name='pools_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+def build_cluster_index(apps, schema_editor):
+    from apps.pools.clustering import rebuild_cluster_index
+
+    rebuild_cluster_index(apps.get_model('pools', 'Pool'), apps.get_model('pools', 'PoolCluster'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0003_pool_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoolCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField(verbose_name='Zoom')),
+                ('cell_x', models.PositiveIntegerField(verbose_name='Cell X')),
+                ('cell_y', models.PositiveIntegerField(verbose_name='Cell Y')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+                ('healthy', models.IntegerField(default=0, verbose_name='Healthy')),
+                ('unhealthy', models.IntegerField(default=0, verbose_name='Unhealthy')),
+                ('latitude_sum', models.FloatField(default=0, verbose_name='Latitude Sum')),
+                ('longitude_sum', models.FloatField(default=0, verbose_name='Longitude Sum')),
+            ],
+            options={
+                'verbose_name': 'Pool Cluster',
+                'verbose_name_plural': 'Pool Clusters',
+                'db_table': 'pool_clusters',
+                'constraints': [models.UniqueConstraint(fields=('zoom', 'cell_x', 'cell_y'), name='pool_clusters_cell_unique')],
+            },
+        ),
+        migrations.RunPython(build_cluster_index, migrations.RunPython.noop),
+    ]
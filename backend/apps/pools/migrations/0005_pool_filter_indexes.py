@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:22
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0004_poolcluster'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pool',
+            name='pools_geohash_idx',
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['geohash'], name='pools_geohash_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['state', 'current_state', 'district'], name='pools_state_cur_district_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['current_state', 'district'], name='pools_cur_district_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['district'], name='pools_district_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(django.db.models.functions.text.Upper('district'), name='pools_district_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['expiration_date'], name='pools_expiration_idx'),
+        ),
+    ]
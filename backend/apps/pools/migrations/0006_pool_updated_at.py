@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0005_pool_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pool',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated At'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:43
+
+from django.db import migrations, models
+
+from apps.pools.text import normalize
+
+SEARCH_FIELDS = ('file_number', 'legal_name', 'commercial_name', 'district', 'address')
+
+
+def populate_search_text(apps, schema_editor):
+    Pool = apps.get_model('pools', 'Pool')
+    batch = []
+    for pool in Pool.objects.only('id', *SEARCH_FIELDS).iterator(chunk_size=2000):
+        pool.search_text = normalize(' '.join(str(getattr(pool, name)) for name in SEARCH_FIELDS if getattr(pool, name)))
+        batch.append(pool)
+        if len(batch) >= 2000:
+            Pool.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        Pool.objects.bulk_update(batch, ['search_text'])
+
+
+# Indices GIN solo en PostgreSQL; la expresion del primero es la que genera
+# SearchVector('search_text', config='simple') para que la consulta lo use
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        "CREATE INDEX pools_search_tsv_idx ON pools "
+        "USING gin (to_tsvector('simple'::regconfig, COALESCE(search_text, '')))"
+    )
+    schema_editor.execute('CREATE INDEX pools_search_trgm_idx ON pools USING gin (search_text gin_trgm_ops)')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS pools_search_tsv_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS pools_search_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0006_pool_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pool',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Search Text'),
+        ),
+        migrations.RunPython(populate_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:51
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_inspections(apps, schema_editor):
+    # La ultima inspeccion conocida de cada piscina pasa a ser la primera fila de su historial
+    from apps.pools.inspections import rebuild_inspection_rollups
+
+    Pool = apps.get_model('pools', 'Pool')
+    Inspection = apps.get_model('pools', 'Inspection')
+    pools = Pool.objects.filter(last_inspection_date__isnull=False).values_list(
+        'id', 'district', 'last_inspection_date', 'current_state'
+    )
+    Inspection.objects.bulk_create(
+        (
+            Inspection(pool_id=pool_id, district=district, inspection_date=day, verdict=verdict)
+            for pool_id, district, day, verdict in pools.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+    rebuild_inspection_rollups(Inspection, apps.get_model('pools', 'InspectionRollup'))
+
+
+# BRIN solo en PostgreSQL: ocupa unas paginas y sirve a los rangos de fechas de una tabla que se llena en orden
+def create_date_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE INDEX inspections_date_brin_idx ON pool_inspections USING brin (inspection_date)')
+
+
+def drop_date_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS inspections_date_brin_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0007_pool_search_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InspectionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('district', models.CharField(max_length=100, verbose_name='District')),
+                ('month', models.DateField(verbose_name='Month')),
+                ('inspections', models.IntegerField(default=0, verbose_name='Inspections')),
+                ('healthy', models.IntegerField(default=0, verbose_name='Healthy')),
+                ('unhealthy', models.IntegerField(default=0, verbose_name='Unhealthy')),
+                ('free_chlorine_sum', models.FloatField(default=0, verbose_name='Free Chlorine Sum')),
+                ('free_chlorine_count', models.IntegerField(default=0, verbose_name='Free Chlorine Count')),
+                ('ph_sum', models.FloatField(default=0, verbose_name='pH Sum')),
+                ('ph_count', models.IntegerField(default=0, verbose_name='pH Count')),
+                ('turbidity_sum', models.FloatField(default=0, verbose_name='Turbidity Sum')),
+                ('turbidity_count', models.IntegerField(default=0, verbose_name='Turbidity Count')),
+            ],
+            options={
+                'verbose_name': 'Inspection Rollup',
+                'verbose_name_plural': 'Inspection Rollups',
+                'db_table': 'pool_inspection_rollups',
+                'indexes': [models.Index(fields=['month'], name='inspection_rollups_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('district', 'month'), name='inspection_rollups_district_month_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Inspection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inspection_date', models.DateField(verbose_name='Inspection Date')),
+                ('free_chlorine', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Free Chlorine (mg/L)')),
+                ('ph', models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(14)], verbose_name='pH')),
+                ('turbidity', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Turbidity (NTU)')),
+                ('verdict', models.CharField(choices=[('HEALTHY', 'Healthy'), ('UNHEALTHY', 'Unhealthy')], max_length=20, verbose_name='Verdict')),
+                ('observations', models.TextField(blank=True, null=True, verbose_name='Observations')),
+                ('district', models.CharField(editable=False, max_length=100, verbose_name='District')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('inspector', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inspections', to=settings.AUTH_USER_MODEL, verbose_name='Inspector')),
+                ('pool', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='inspections', to='pools.pool', verbose_name='Pool')),
+            ],
+            options={
+                'verbose_name': 'Inspection',
+                'verbose_name_plural': 'Inspections',
+                'db_table': 'pool_inspections',
+                'indexes': [models.Index(fields=['pool', '-inspection_date', '-id'], name='inspections_pool_date_idx')],
+            },
+        ),
+        migrations.RunPython(create_date_index, drop_date_index),
+        migrations.RunPython(backfill_inspections, migrations.RunPython.noop),
+    ]
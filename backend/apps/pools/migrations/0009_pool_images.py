@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0008_inspections'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoolImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('original', models.CharField(max_length=255, verbose_name='Original')),
+                ('format', models.CharField(max_length=10, verbose_name='Format')),
+                ('width', models.PositiveIntegerField(verbose_name='Width')),
+                ('height', models.PositiveIntegerField(verbose_name='Height')),
+                ('size_bytes', models.PositiveIntegerField(verbose_name='Size (bytes)')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=10, verbose_name='Status')),
+                ('variants', models.JSONField(blank=True, default=list, verbose_name='Variants')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Pool Image',
+                'verbose_name_plural': 'Pool Images',
+                'db_table': 'pool_images',
+            },
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='image_srcset',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Image srcset'),
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pools', to='pools.poolimage', verbose_name='Image'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    # Las piscinas existentes quedan con change_seq 0: entran en la primera sincronizacion completa
+    apps.get_model('pools', 'PoolChangeCounter').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0009_pool_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoolChangeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Value')),
+                ('pruned_through', models.BigIntegerField(default=0, verbose_name='Pruned Through')),
+            ],
+            options={
+                'verbose_name': 'Pool Change Counter',
+                'db_table': 'pool_change_counter',
+            },
+        ),
+        migrations.CreateModel(
+            name='PoolTombstone',
+            fields=[
+                ('pool_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Pool ID')),
+                ('change_seq', models.BigIntegerField(verbose_name='Change Sequence')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Deleted At')),
+            ],
+            options={
+                'verbose_name': 'Pool Tombstone',
+                'verbose_name_plural': 'Pool Tombstones',
+                'db_table': 'pool_tombstones',
+            },
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Change Sequence'),
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['change_seq', 'id'], name='pools_change_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pooltombstone',
+            index=models.Index(fields=['change_seq', 'pool_id'], name='pool_tombstones_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pooltombstone',
+            index=models.Index(fields=['deleted_at'], name='pool_tombstones_deleted_idx'),
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:13
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0010_pool_changes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pool',
+            name='pools_district_upper_idx',
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.functions.text.Trim('district')), name='pools_district_key_idx'),
+        ),
+    ]
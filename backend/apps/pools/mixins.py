@@ -0,0 +1,137 @@
+import functools
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.metrics import serializer_timer
+
+from .models import Pool
+from .renderers import POOL_RENDERERS
+from .serializers import PoolRowSerializer, PoolSerializer
+
+
+def parse_fields_param(request, allowed=None):
+    """Lee ``?fields=id,latitude,...`` y valida los nombres contra los campos publicos de ``PoolSerializer``."""
+    # Acepta tanto el Request de DRF como el HttpRequest de las vistas async
+    raw = getattr(request, 'query_params', request.GET).get('fields')
+    if not raw:
+        return None
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    if not fields:
+        return None
+    if allowed is None:
+        # Solo los campos de la API: search_text y change_seq son columnas internas
+        allowed = PoolSerializer.Meta.fields
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}."})
+    return fields
+
+
+class PoolProjectionMixin:
+    """Reduce el SELECT (``.only()``) y la salida del serializer a ``?fields=``."""
+
+    def get_projection(self):
+        if not hasattr(self, '_projection'):
+            self._projection = parse_fields_param(self.request)
+        return self._projection
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_projection()
+        if fields:
+            queryset = queryset.only(*fields)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_projection()
+        if fields:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+
+class CompactFormatsMixin:
+    """Agrega los formatos columnar y MessagePack a JSON (ver renderers.py)."""
+
+    renderer_classes = POOL_RENDERERS
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+
+def conditional_get(handler):
+    """Decora un ``get`` de una vista con ``ConditionalGetMixin``."""
+
+    @functools.wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(self, request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response.headers['ETag'] = etag
+            # Los clientes pueden guardar la respuesta, pero deben revalidarla siempre
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    return wrapper
+
+
+class PoolFastListMixin:
+    """Listados con ``PoolRowSerializer`` (sin instancias de modelo). Requiere ``PoolProjectionMixin``."""
+
+    def list(self, request, *args, **kwargs):
+        row_serializer = PoolRowSerializer(fields=self.get_projection())
+        # El cursor ordena por id: va en el SELECT aunque ?fields= no lo pida
+        rows = row_serializer.values(self.filter_queryset(self.get_queryset()), 'id')
+        page = self.paginate_queryset(rows)
+        with serializer_timer():
+            data = row_serializer.serialize(page if page is not None else rows)
+        if page is not None:
+            response = self.get_paginated_response(data)
+            # Se quita despues: los enlaces next/previous leen el id de las filas de la pagina
+            row_serializer.strip(data, 'id')
+            return response
+        return Response(row_serializer.strip(data, 'id'))
+
+
+class ConditionalGetMixin:
+    """Agrega ETag a las lecturas y responde ``304 Not Modified`` sin serializar.
+
+    El ETag sale de un agregado barato (``max(updated_at)`` y el numero de filas)
+    del queryset filtrado, mas un hash de la ruta y los parametros. No se envia
+    Last-Modified: ``max(updated_at)`` no cambia al borrar filas y tiene precision
+    de segundos, asi que ``If-Modified-Since`` daria 304 con datos viejos. Las
+    vistas que definen su propio ``get`` deben decorarlo con ``conditional_get``.
+    """
+
+    def get_validator_queryset(self):
+        if hasattr(self, 'filter_queryset'):
+            return self.filter_queryset(self.get_queryset())
+        return Pool.objects.all()
+
+    def get_etag_parts(self, request):
+        query = sorted(request.query_params.lists())
+        return [request.path, repr(query), request.META.get('HTTP_ACCEPT', '')]
+
+    def get_etag(self, request):
+        summary = self.get_validator_queryset().order_by().aggregate(
+            last_modified=Max('updated_at'), count=Count('pk')
+        )
+        last_modified = summary['last_modified']
+        parts = self.get_etag_parts(request) + [
+            str(summary['count']),
+            last_modified.isoformat() if last_modified else '',
+        ]
+        etag = quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+        return etag
+
+    @conditional_get
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
@@ -1,4 +1,76 @@
-from django.db import models
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Trim, Upper
+
+from .spatial import encode as encode_geohash
+from .text import normalize
+
+# Campos de texto que entran en ``Pool.search_text`` (ver search.py)
+SEARCH_FIELDS = ('file_number', 'legal_name', 'commercial_name', 'district', 'address')
+
+class PoolImage(models.Model):
+    """Foto subida, identificada por el SHA-256 de sus bytes (una por contenido, compartible entre piscinas).
+
+    ``variants`` lista las miniaturas generadas: ``{format, width, height, name, bytes}``,
+    con ``name`` relativo a ``MEDIA_ROOT``.
+    """
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+
+    sha256 = models.CharField("SHA-256", max_length=64, unique=True)
+    original = models.CharField("Original", max_length=255)
+    format = models.CharField("Format", max_length=10)
+    width = models.PositiveIntegerField("Width")
+    height = models.PositiveIntegerField("Height")
+    size_bytes = models.PositiveIntegerField("Size (bytes)")
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    variants = models.JSONField("Variants", default=list, blank=True)
+    error = models.TextField("Error", blank=True, default='')
+    created_at = models.DateTimeField("Created At", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Pool Image"
+        verbose_name_plural = "Pool Images"
+        db_table = "pool_images"
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.width}x{self.height}, {self.status})"
+
+
+class PoolChangeCounter(models.Model):
+    """Contador de cambios de piscinas (una sola fila, ver ``next_change_seq``).
+
+    ``pruned_through`` es el mayor numero de cambio de los tombstones ya borrados:
+    un cursor anterior no puede sincronizarse de forma incremental.
+    """
+
+    value = models.BigIntegerField("Value", default=0)
+    pruned_through = models.BigIntegerField("Pruned Through", default=0)
+
+    class Meta:
+        verbose_name = "Pool Change Counter"
+        db_table = "pool_change_counter"
+
+
+def next_change_seq():
+    """Reserva el siguiente numero de cambio; se llama dentro de la transaccion que escribe.
+
+    El UPDATE bloquea la fila del contador hasta el fin de la transaccion, asi que
+    los numeros se confirman en orden: quien ya vio el cambio N no puede perder
+    despues uno menor que se confirmo tarde.
+    """
+    counter = PoolChangeCounter.objects.filter(pk=1)
+    if not counter.update(value=F('value') + 1):
+        PoolChangeCounter.objects.get_or_create(pk=1)
+        counter.update(value=F('value') + 1)
+    return counter.values_list('value', flat=True).get()
+
 
 class Pool(models.Model):
     STATE_CHOICES = [
@@ -32,11 +104,198 @@ class Pool(models.Model):
     longitude = models.DecimalField("Longitude", max_digits=12, decimal_places=9, blank=True, null=True)
     image_url = models.URLField("Image URL", blank=True, null=True)
     rating = models.DecimalField("Rating (1-5)", max_digits=2, decimal_places=1, blank=True, null=True)
+    # Foto subida; al tener miniaturas, image_url pasa a ser su JPEG de respaldo e image_srcset sus WebP
+    image = models.ForeignKey(
+        PoolImage, on_delete=models.SET_NULL, blank=True, null=True, related_name='pools',
+        verbose_name="Image", editable=False,
+    )
+    image_srcset = models.TextField("Image srcset", blank=True, default='', editable=False)
+    geohash = models.CharField("Geohash", max_length=12, blank=True, null=True, editable=False)
+    updated_at = models.DateTimeField("Updated At", auto_now=True, db_index=True)
+    # Numero de la ultima escritura (next_change_seq); /pool/changes/ devuelve las posteriores a un cursor
+    change_seq = models.BigIntegerField("Change Sequence", default=0, editable=False)
+    # Texto normalizado de SEARCH_FIELDS; sus indices GIN (PostgreSQL) se crean en la migracion 0007
+    search_text = models.TextField("Search Text", blank=True, default='', editable=False)
     
     class Meta:
         verbose_name = "Pool"
         verbose_name_plural = "Pools"
         db_table = "pools"
+        indexes = [
+            models.Index(fields=['geohash'], name='pools_geohash_idx'),
+            models.Index(fields=['state', 'current_state', 'district'], name='pools_state_cur_district_idx'),
+            models.Index(fields=['current_state', 'district'], name='pools_cur_district_idx'),
+            models.Index(fields=['district'], name='pools_district_idx'),
+            # Busqueda de distrito sin distinguir mayusculas ni espacios (PoolsByDistrictView)
+            models.Index(Upper(Trim('district')), name='pools_district_key_idx'),
+            models.Index(fields=['expiration_date'], name='pools_expiration_idx'),
+            models.Index(fields=['change_seq', 'id'], name='pools_change_seq_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.file_number} - {self.commercial_name or self.legal_name}"
\ No newline at end of file
+        return f"{self.file_number} - {self.commercial_name or self.legal_name}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Guarda los valores cargados para detectar que cambio al guardar
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return encode_geohash(self.latitude, self.longitude)
+
+    def compute_search_text(self):
+        return normalize(' '.join(str(getattr(self, name)) for name in SEARCH_FIELDS if getattr(self, name)))
+
+    def save(self, *args, **kwargs):
+        self.geohash = self.compute_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(SEARCH_FIELDS) & set(update_fields):
+            self.search_text = self.compute_search_text()
+        if update_fields is not None:
+            extra = {'updated_at', 'change_seq'}
+            if {'latitude', 'longitude'} & set(update_fields):
+                extra.add('geohash')
+            if set(SEARCH_FIELDS) & set(update_fields):
+                extra.add('search_text')
+            kwargs['update_fields'] = {*update_fields, *extra}
+        with transaction.atomic():
+            self.change_seq = next_change_seq()
+            super().save(*args, **kwargs)
+
+
+def filter_district(queryset, district):
+    """Piscinas de ``district`` sin distinguir mayusculas ni espacios (usa ``pools_district_key_idx``)."""
+    return queryset.alias(district_key=Upper(Trim('district'))).filter(district_key=Upper(Value(district.strip())))
+
+
+class PoolCluster(models.Model):
+    """Celda precalculada del indice de clusters del mapa (una fila por zoom y celda)."""
+
+    zoom = models.PositiveSmallIntegerField("Zoom")
+    cell_x = models.PositiveIntegerField("Cell X")
+    cell_y = models.PositiveIntegerField("Cell Y")
+    count = models.IntegerField("Count", default=0)
+    healthy = models.IntegerField("Healthy", default=0)
+    unhealthy = models.IntegerField("Unhealthy", default=0)
+    latitude_sum = models.FloatField("Latitude Sum", default=0)
+    longitude_sum = models.FloatField("Longitude Sum", default=0)
+
+    class Meta:
+        verbose_name = "Pool Cluster"
+        verbose_name_plural = "Pool Clusters"
+        db_table = "pool_clusters"
+        constraints = [
+            models.UniqueConstraint(fields=['zoom', 'cell_x', 'cell_y'], name='pool_clusters_cell_unique'),
+        ]
+
+    def __str__(self):
+        return f"z{self.zoom} ({self.cell_x}, {self.cell_y}): {self.count}"
+
+
+
+class Inspection(models.Model):
+    """Visita de inspeccion con sus mediciones. Solo se agregan filas: el historial no se reescribe.
+
+    ``Pool.current_state`` y ``Pool.last_inspection_date`` se copian de la ultima
+    inspeccion de cada piscina (ver inspections.py).
+    """
+
+    # Sin indice propio: lo cubre inspections_pool_date_idx, que empieza por pool
+    pool = models.ForeignKey(
+        Pool, on_delete=models.CASCADE, related_name='inspections', verbose_name="Pool", db_index=False,
+    )
+    inspector = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True,
+        related_name='inspections', verbose_name="Inspector",
+    )
+    inspection_date = models.DateField("Inspection Date")
+    free_chlorine = models.DecimalField(
+        "Free Chlorine (mg/L)", max_digits=5, decimal_places=2, blank=True, null=True,
+        validators=[MinValueValidator(0)],
+    )
+    ph = models.DecimalField(
+        "pH", max_digits=4, decimal_places=2, blank=True, null=True,
+        validators=[MinValueValidator(0), MaxValueValidator(14)],
+    )
+    turbidity = models.DecimalField(
+        "Turbidity (NTU)", max_digits=6, decimal_places=2, blank=True, null=True,
+        validators=[MinValueValidator(0)],
+    )
+    verdict = models.CharField("Verdict", max_length=20, choices=Pool.CURRENT_STATE_CHOICES)
+    observations = models.TextField("Observations", blank=True, null=True)
+    # Distrito de la piscina al momento de la visita: el historial no cambia si la piscina se reubica
+    district = models.CharField("District", max_length=100, editable=False)
+    created_at = models.DateTimeField("Created At", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Inspection"
+        verbose_name_plural = "Inspections"
+        db_table = "pool_inspections"
+        # El indice BRIN sobre inspection_date (PostgreSQL) se crea en la migracion 0008
+        indexes = [
+            models.Index(fields=['pool', '-inspection_date', '-id'], name='inspections_pool_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.pool_id} @ {self.inspection_date}: {self.verdict}"
+
+    def save(self, *args, **kwargs):
+        if not self.district:
+            self.district = self.pool.district
+        super().save(*args, **kwargs)
+
+
+class InspectionRollup(models.Model):
+    """Agregado mensual de inspecciones por distrito, mantenido en cada alta, cambio o baja."""
+
+    district = models.CharField("District", max_length=100)
+    month = models.DateField("Month")
+    inspections = models.IntegerField("Inspections", default=0)
+    healthy = models.IntegerField("Healthy", default=0)
+    unhealthy = models.IntegerField("Unhealthy", default=0)
+    # Sumas y conteos por medicion (las mediciones son opcionales) para promediar sin releer inspecciones
+    free_chlorine_sum = models.FloatField("Free Chlorine Sum", default=0)
+    free_chlorine_count = models.IntegerField("Free Chlorine Count", default=0)
+    ph_sum = models.FloatField("pH Sum", default=0)
+    ph_count = models.IntegerField("pH Count", default=0)
+    turbidity_sum = models.FloatField("Turbidity Sum", default=0)
+    turbidity_count = models.IntegerField("Turbidity Count", default=0)
+
+    class Meta:
+        verbose_name = "Inspection Rollup"
+        verbose_name_plural = "Inspection Rollups"
+        db_table = "pool_inspection_rollups"
+        constraints = [
+            models.UniqueConstraint(fields=['district', 'month'], name='inspection_rollups_district_month_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='inspection_rollups_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.district} {self.month:%Y-%m}: {self.inspections}"
+
+
+class PoolTombstone(models.Model):
+    """Piscina borrada: /pool/changes/ la informa a los clientes que la tenian."""
+
+    pool_id = models.BigIntegerField("Pool ID", primary_key=True)
+    change_seq = models.BigIntegerField("Change Sequence")
+    deleted_at = models.DateTimeField("Deleted At", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Pool Tombstone"
+        verbose_name_plural = "Pool Tombstones"
+        db_table = "pool_tombstones"
+        indexes = [
+            models.Index(fields=['change_seq', 'pool_id'], name='pool_tombstones_seq_idx'),
+            models.Index(fields=['deleted_at'], name='pool_tombstones_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Pool {self.pool_id} deleted at {self.deleted_at:%Y-%m-%d}"
+
@@ -0,0 +1,25 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PoolCursorPagination(CursorPagination):
+    """Paginacion por cursor (keyset) sobre ``id``: cada pagina cuesta O(page_size)."""
+
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Es opcional: sin cursor ni page_size se devuelve la lista completa como antes
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class PoolSearchPagination(PageNumberPagination):
+    """Paginas numeradas: los resultados de busqueda se ordenan por relevancia, no por ``id``."""
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
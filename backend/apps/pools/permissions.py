@@ -0,0 +1,11 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsInspectorOrAdmin(BasePermission):
+    """Usuarios con rol ``inspector`` o ``admin`` (o staff)."""
+
+    roles = ('inspector', 'admin')
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_staff or getattr(user, 'role', None) in self.roles))
@@ -0,0 +1,128 @@
+"""Formatos compactos para los listados de piscinas, elegidos por ``Accept`` o ``?format=``.
+
+En JSON cada fila repite los nombres de los campos y las coordenadas viajan como
+strings de 9 decimales. Los dos formatos de aqui mandan una columna por campo::
+
+    {"count": 2, "columns": {
+        "id": [12, 13],
+        "district": {"dictionary": ["Cayma"], "codes": [0, 0]},
+        "latitude": [-16.3987656, -16.4012337],
+        ...}}
+
+- ``district``, ``state`` y ``current_state`` van como diccionario mas codigos.
+- Las coordenadas se cuantizan a float32 (~1 m de resolucion, suficiente para el
+  mapa). En JSON se escriben con 7 decimales, que bastan para recuperar el mismo
+  float32 (``Math.fround``). En MessagePack van como un ``bin`` con los float32
+  little-endian (``new Float32Array(bytes.buffer)``); ``NaN`` es ``null``.
+
+Los listados paginados conservan ``next`` y ``previous`` y solo ``results`` pasa a
+columnas. Los errores y las respuestas que no son filas se envian sin cambios.
+"""
+from array import array
+import math
+import sys
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+DICTIONARY_FIELDS = ('district', 'state', 'current_state')
+COORDINATE_FIELDS = ('latitude', 'longitude')
+COORDINATE_DECIMALS = 7
+
+
+def float32_values(values):
+    """``array('f')`` con los valores (``NaN`` en lugar de ``None``)."""
+    return array('f', [math.nan if value is None else float(value) for value in values])
+
+
+def json_coordinates(values):
+    scale = 10 ** COORDINATE_DECIMALS
+    # round(x * scale) / scale es ~2x mas rapido que round(x, decimales)
+    return [None if value != value else round(value * scale) / scale for value in float32_values(values).tolist()]
+
+
+def binary_coordinates(values):
+    quantized = float32_values(values)
+    if sys.byteorder == 'big':
+        quantized.byteswap()
+    return quantized.tobytes()
+
+
+def to_columns(rows, coordinates):
+    names = list(rows[0]) if rows else []
+    columns = {}
+    for name in names:
+        values = [row[name] for row in rows]
+        if name in DICTIONARY_FIELDS:
+            index = {}
+            codes = [index.setdefault(value, len(index)) for value in values]
+            columns[name] = {'dictionary': list(index), 'codes': codes}
+        elif name in COORDINATE_FIELDS:
+            columns[name] = coordinates(values)
+        else:
+            columns[name] = values
+    return {'count': len(rows), 'columns': columns}
+
+
+def is_rows(data):
+    # Las listas de la API son homogeneas: basta mirar la primera fila
+    return isinstance(data, list) and (not data or isinstance(data[0], dict))
+
+
+def columnar(data, coordinates):
+    """Pasa a columnas una lista de filas o el ``results`` de una pagina; lo demas queda igual."""
+    if is_rows(data):
+        return to_columns(data, coordinates)
+    if isinstance(data, dict) and is_rows(data.get('results')):
+        return {**data, 'results': to_columns(data['results'], coordinates)}
+    return data
+
+
+def from_columns(table):
+    """Filas a partir de ``{'count', 'columns'}`` (lo que hace un cliente al decodificar)."""
+    columns = {}
+    for name, column in table['columns'].items():
+        if isinstance(column, dict):
+            dictionary = column['dictionary']
+            column = [dictionary[code] for code in column['codes']]
+        elif isinstance(column, bytes):
+            quantized = array('f')
+            quantized.frombytes(column)
+            if sys.byteorder == 'big':
+                quantized.byteswap()
+            column = [None if value != value else value for value in quantized.tolist()]
+        columns[name] = column
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())] if names else []
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    media_type = 'application/vnd.pools.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(columnar(data, json_coordinates), accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Fechas, Decimal y demas tipos de DRF salen como en JSON
+        return msgpack.packb(columnar(data, binary_coordinates), default=JSONEncoder().default)
+
+
+COMPACT_RENDERERS = [ColumnarJSONRenderer, *([MessagePackRenderer] if msgpack is not None else [])]
+# Para los listados y el dashboard: JSON (y la API navegable) siguen siendo el formato por defecto
+POOL_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, *COMPACT_RENDERERS]
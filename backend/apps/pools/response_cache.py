@@ -0,0 +1,301 @@
+"""Cache de respuestas de los listados publicos de piscinas.
+
+Las claves combinan la vista, el rol del usuario, el host, los parametros
+normalizados y la version de cada etiqueta de invalidacion (``district:<d>``,
+``state:<s>``, ``all``). Guardar o borrar una piscina solo incrementa las
+etiquetas de su distrito y su estado (mas ``all``), asi que las entradas de
+otros distritos siguen siendo validas; las viejas salen por LRU o por TTL.
+
+Las versiones de las etiquetas viven en el mismo backend que las respuestas, asi
+que la invalidacion solo llega a los procesos que comparten ese backend. Por eso
+el valor por defecto es ``DjangoCacheBackend`` sobre el cache compartido
+(``CACHES``); ``LocMemBackend`` sirve solo con un proceso. Las versiones se leen
+con ``get_many`` y se incrementan con ``set_many``: con Redis, un viaje por
+request y otro por escritura.
+"""
+from collections import OrderedDict
+import hashlib
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.response import Response
+
+# Etiqueta para listados que dependen de todas las piscinas
+ALL_TAG = 'all'
+# Etiqueta que incluyen todas las claves; se incrementa tras escrituras masivas
+GLOBAL_TAG = '*'
+
+DEFAULT_SETTINGS = {
+    'BACKEND': 'apps.pools.response_cache.DjangoCacheBackend',
+    'OPTIONS': {},
+    'TIMEOUT': 300,
+}
+
+
+class LocMemBackend:
+    """LRU en memoria del proceso acotado a ``max_entries``."""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self.lock:
+            expires = time.monotonic() + timeout if timeout else None
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_many(self, keys):
+        values = {key: self.get(key) for key in keys}
+        return {key: value for key, value in values.items() if value is not None}
+
+    def set_many(self, values, timeout=None):
+        for key, value in values.items():
+            self.set(key, value, timeout)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class FileBackend:
+    """Un archivo por clave en ``location``, compartido entre workers.
+
+    Cada lectura actualiza el mtime del archivo; al superar ``max_entries`` se
+    borran los de mtime mas antiguo.
+    """
+
+    def __init__(self, location=None, max_entries=5000):
+        self.location = Path(location or Path(tempfile.gettempdir()) / 'ips-pool-responses')
+        self.max_entries = max_entries
+        self.location.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key):
+        return self.location / f'{hashlib.md5(key.encode()).hexdigest()}.cache'
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as cached:
+                expires, value = pickle.load(cached)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires is not None and expires < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return value
+
+    def set(self, key, value, timeout=None):
+        expires = time.time() + timeout if timeout else None
+        handle, temporary = tempfile.mkstemp(dir=self.location, prefix='.tmp-')
+        with os.fdopen(handle, 'wb') as output:
+            pickle.dump((expires, value), output, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.path(key))
+        self.cull()
+
+    def get_many(self, keys):
+        values = {key: self.get(key) for key in keys}
+        return {key: value for key, value in values.items() if value is not None}
+
+    def set_many(self, values, timeout=None):
+        for key, value in values.items():
+            self.set(key, value, timeout)
+
+    def cull(self):
+        entries = list(self.location.glob('*.cache'))
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda path: path.stat().st_mtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            path.unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.location.glob('*.cache'):
+            path.unlink(missing_ok=True)
+
+
+class DjangoCacheBackend:
+    """Usa un alias de ``CACHES`` (por ejemplo Redis) y su propia politica de expulsion."""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(key, value, timeout)
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def set_many(self, values, timeout=None):
+        self.cache.set_many(values, timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class DummyBackend:
+    """No guarda nada; desactiva el cache sin tocar las vistas."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def get_many(self, keys):
+        return {}
+
+    def set_many(self, values, timeout=None):
+        pass
+
+    def clear(self):
+        pass
+
+
+class ResponseCache:
+    def __init__(self, backend, timeout=None, prefix='pools:responses'):
+        self.backend = backend
+        self.timeout = timeout
+        self.prefix = prefix
+
+    def version_key(self, tag):
+        return f'{self.prefix}:version:{tag}'
+
+    def versions(self, tags):
+        """Versiones de ``tags`` con una lectura (y una escritura para las que faltan)."""
+        keys = [self.version_key(tag) for tag in tags]
+        versions = self.backend.get_many(keys)
+        missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+        if missing:
+            self.backend.set_many(missing)
+        versions.update(missing)
+        return [versions[key] for key in keys]
+
+    def invalidate(self, *tags):
+        self.backend.set_many({self.version_key(tag): uuid.uuid4().hex for tag in set(tags)})
+
+    def key(self, parts, tags):
+        versions = self.versions([GLOBAL_TAG, *tags])
+        digest = hashlib.md5(repr((parts, versions)).encode()).hexdigest()
+        return f'{self.prefix}:{digest}'
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value):
+        self.backend.set(key, value, self.timeout)
+
+
+def district_tag(district):
+    return f'district:{district.strip().casefold()}'
+
+
+def state_tag(state):
+    return f'state:{state.strip().casefold()}'
+
+
+def pool_tags(values):
+    """Etiquetas afectadas por una piscina con estos ``state`` y ``district``."""
+    tags = [ALL_TAG]
+    if values.get('district'):
+        tags.append(district_tag(values['district']))
+    if values.get('state'):
+        tags.append(state_tag(values['state']))
+    return tags
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        config = {**DEFAULT_SETTINGS, **getattr(settings, 'POOL_RESPONSE_CACHE', {})}
+        backend = import_string(config['BACKEND'])(**config['OPTIONS'])
+        _response_cache = ResponseCache(backend, timeout=config['TIMEOUT'])
+    return _response_cache
+
+
+@receiver(setting_changed)
+def reset_response_cache(setting, **kwargs):
+    global _response_cache
+    if setting == 'POOL_RESPONSE_CACHE':
+        _response_cache = None
+
+
+def invalidate_pools(*values):
+    """Invalida las respuestas que pueden contener piscinas con estos valores."""
+    tags = [tag for pool in values if pool for tag in pool_tags(pool)]
+    if tags:
+        get_response_cache().invalidate(*tags)
+
+
+def invalidate_all_pools():
+    get_response_cache().invalidate(GLOBAL_TAG)
+
+
+class PoolResponseCacheMixin:
+    """Cachea ``list()`` por rol y parametros normalizados.
+
+    Las vistas definen ``get_cache_tags()`` (por defecto ``[ALL_TAG]``) y pueden
+    normalizar los kwargs de la URL con ``get_cache_kwargs()``.
+    """
+
+    def get_cache_tags(self):
+        return [ALL_TAG]
+
+    def get_cache_kwargs(self):
+        return sorted(self.kwargs.items())
+
+    def get_cache_role(self):
+        user = self.request.user
+        if not user or not user.is_authenticated:
+            return 'anonymous'
+        return getattr(user, 'role', 'user')
+
+    def list(self, request, *args, **kwargs):
+        response_cache = get_response_cache()
+        parts = (
+            type(self).__name__,
+            self.get_cache_role(),
+            request.get_host(),
+            self.get_cache_kwargs(),
+            sorted(request.query_params.lists()),
+        )
+        key = response_cache.key(parts, self.get_cache_tags())
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            response_cache.set(key, response.data)
+        return response
@@ -0,0 +1,211 @@
+"""Busqueda de texto sobre piscinas, tolerante a tildes y errores de tipeo.
+
+Cada piscina guarda en ``search_text`` sus campos de texto normalizados (sin
+tildes, en minusculas, solo letras y numeros). En PostgreSQL la busqueda usa
+``to_tsvector('simple', search_text)`` y la similitud por trigramas de
+``pg_trgm``, ambas con indice GIN (migracion 0007). En otras bases de datos se
+usa ``SearchIndex``, un indice invertido de trigramas en memoria del proceso.
+"""
+from collections import Counter, defaultdict
+from itertools import chain
+import threading
+
+from django.db import connection
+from django.db.models import F, Q
+
+from .models import SEARCH_FIELDS, Pool
+from .text import normalize, trigrams
+
+# Minimo de trigramas de la palabra buscada presentes en la palabra del texto (pg_trgm.word_similarity_threshold)
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+
+def refresh_search_text(queryset, batch_size=2000):
+    """Recalcula ``search_text`` de las piscinas del queryset (tras escrituras masivas parciales)."""
+    pools = []
+    for pool in queryset.only('id', *SEARCH_FIELDS).iterator(chunk_size=batch_size):
+        pool.search_text = pool.compute_search_text()
+        pools.append(pool)
+        if len(pools) >= batch_size:
+            Pool.objects.bulk_update(pools, ['search_text'])
+            pools = []
+    if pools:
+        Pool.objects.bulk_update(pools, ['search_text'])
+
+
+class SearchIndex:
+    """Indice invertido en memoria: palabra -> piscinas y trigrama -> palabras.
+
+    Una consulta solo compara sus palabras con las del vocabulario que comparten
+    algun trigrama, asi que el costo depende del vocabulario y no de las filas.
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.postings = defaultdict(set)
+        self.word_trigrams = {}
+        self.trigram_words = defaultdict(set)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, queryset=None):
+        index = cls()
+        queryset = Pool.objects.all() if queryset is None else queryset
+        for pool_id, search_text in queryset.values_list('id', 'search_text').iterator(chunk_size=5000):
+            index.add(pool_id, search_text)
+        return index
+
+    def add(self, pool_id, search_text):
+        with self.lock:
+            self._remove(pool_id)
+            words = set(search_text.split())
+            self.documents[pool_id] = words
+            for word in words:
+                self.postings[word].add(pool_id)
+                if word not in self.word_trigrams:
+                    grams = trigrams(word)
+                    self.word_trigrams[word] = grams
+                    for gram in grams:
+                        self.trigram_words[gram].add(word)
+
+    def remove(self, pool_id):
+        with self.lock:
+            self._remove(pool_id)
+
+    def _remove(self, pool_id):
+        for word in self.documents.pop(pool_id, ()):
+            postings = self.postings[word]
+            postings.discard(pool_id)
+            if not postings:
+                del self.postings[word]
+                for gram in self.word_trigrams.pop(word):
+                    self.trigram_words[gram].discard(word)
+
+    def similar_words(self, word):
+        """``{palabra_del_vocabulario: puntaje}`` de las palabras parecidas a ``word``.
+
+        Filtra como ``word_similarity`` de pg_trgm (trigramas de ``word`` presentes
+        en la candidata, asi un prefijo como "yanah" encuentra "yanahuara") y
+        puntua con el promedio de esa medida y la similitud completa, para que
+        la coincidencia exacta quede primero.
+        """
+        grams = trigrams(word)
+        # Counter cuenta en C: importa cuando un trigrama comun esta en miles de palabras
+        shared = Counter(chain.from_iterable(self.trigram_words.get(gram, ()) for gram in grams))
+        similar = {}
+        for candidate, common in shared.items():
+            word_similarity = common / len(grams)
+            if word_similarity >= WORD_SIMILARITY_THRESHOLD:
+                similarity = common / (len(grams) + len(self.word_trigrams[candidate]) - common)
+                similar[candidate] = (word_similarity + similarity) / 2
+        return similar
+
+    def search(self, query):
+        """``[(pool_id, rank), ...]`` ordenado por relevancia.
+
+        Cada palabra de la consulta debe parecerse a alguna palabra de la piscina.
+        Los candidatos salen de la palabra con menos piscinas y el rank es el
+        promedio, por palabra de la consulta, del mejor puntaje en la piscina.
+        """
+        words = list(dict.fromkeys(normalize(query).split()))
+        if not words:
+            return []
+        with self.lock:
+            expansions = [self.similar_words(word) for word in words]
+            if not all(expansions):
+                return []
+            sizes = [sum(len(self.postings[word]) for word in similar) for similar in expansions]
+            rarest = expansions.pop(sizes.index(min(sizes)))
+            scores = {}
+            # Palabras de mayor a menor puntaje: cada piscina se queda con la primera que contiene
+            for word, score in sorted(rarest.items(), key=lambda item: -item[1]):
+                for pool_id in self.postings[word]:
+                    scores.setdefault(pool_id, score)
+            for similar in expansions:
+                remaining = set(scores)
+                for word, score in sorted(similar.items(), key=lambda item: -item[1]):
+                    matched = remaining & self.postings[word]
+                    for pool_id in matched:
+                        scores[pool_id] += score
+                    remaining -= matched
+                for pool_id in remaining:
+                    del scores[pool_id]
+        ranked = [(pool_id, score / len(words)) for pool_id, score in scores.items()]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index():
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex.build()
+        return _search_index
+
+
+def update_search_index(pool_id, search_text):
+    # Solo se mantiene si ya se construyo en este proceso; si no, se construira al buscar
+    if _search_index is not None:
+        if search_text is None:
+            _search_index.remove(pool_id)
+        else:
+            _search_index.add(pool_id, search_text)
+
+
+def reset_search_index():
+    global _search_index
+    with _search_index_lock:
+        _search_index = None
+
+
+class RankedRows:
+    """Resultados del indice en memoria con la interfaz que necesita el paginador.
+
+    Solo se leen de la base de datos las filas del segmento pedido.
+    """
+
+    def __init__(self, matches, fields):
+        self.matches = matches
+        self.fields = fields
+
+    def __len__(self):
+        return len(self.matches)
+
+    def count(self):
+        return len(self.matches)
+
+    def __getitem__(self, item):
+        matches = self.matches[item] if isinstance(item, slice) else [self.matches[item]]
+        rows = Pool.objects.filter(pk__in=[pool_id for pool_id, _ in matches])
+        rows = rows.values(*dict.fromkeys(['id', *self.fields]))
+        by_id = {row['id']: row for row in rows}
+        ranked = []
+        for pool_id, rank in matches:
+            row = by_id.get(pool_id)
+            if row is not None:
+                ranked.append({name: row[name] for name in self.fields} | {'rank': rank})
+        return ranked if isinstance(item, slice) else ranked[0]
+
+
+def search_pools(query, fields):
+    """Piscinas que coinciden con ``query`` ordenadas por relevancia, como filas de ``fields`` + ``rank``."""
+    normalized = normalize(query)
+    if connection.vendor != 'postgresql':
+        return RankedRows(get_search_index().search(normalized), fields)
+
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+
+    # Misma expresion que el indice pools_search_tsv_idx
+    document = SearchVector('search_text', config='simple')
+    ts_query = SearchQuery(normalized, config='simple')
+    return (
+        Pool.objects.annotate(document=document)
+        .filter(Q(document=ts_query) | Q(search_text__trigram_word_similar=normalized))
+        .annotate(rank=SearchRank(F('document'), ts_query) + TrigramWordSimilarity(normalized, 'search_text'))
+        .order_by('-rank', 'id')
+        .values(*fields, 'rank')
+    )
@@ -1,7 +1,99 @@
-from rest_framework import serializers
-from .models import Pool
+from datetime import date
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import Inspection, Pool
 
 class PoolSerializer(serializers.ModelSerializer):
     class Meta:
         model = Pool
-        fields = '__all__'
\ No newline at end of file
+        # search_text es un indice interno de la busqueda; change_seq viaja en el cursor de /pool/changes/
+        fields = [field.name for field in Pool._meta.concrete_fields if field.name not in ('search_text', 'change_seq')]
+
+    def __init__(self, *args, **kwargs):
+        # Permite proyectar solo algunos campos: PoolSerializer(pools, many=True, fields=['id', 'latitude'])
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class InspectionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Inspection
+        fields = [
+            'id', 'pool', 'inspector', 'inspection_date', 'free_chlorine', 'ph', 'turbidity',
+            'verdict', 'observations', 'created_at',
+        ]
+        # La piscina sale de la URL y el inspector del usuario autenticado
+        read_only_fields = ['pool', 'inspector']
+
+
+class PoolRowSerializer:
+    """Serializacion de solo lectura para listados, a partir de ``.values()``.
+
+    Produce lo mismo que ``PoolSerializer`` pero sin instanciar modelos ni pasar por
+    ``to_representation`` de cada campo: los conversores por campo se eligen una vez
+    y solo se aplican a decimales y fechas.
+    """
+
+    def __init__(self, fields=None):
+        declared = PoolSerializer(fields=fields).fields
+        self.field_names = list(declared)
+        self.converters = []
+        for name, field in declared.items():
+            converter = self.converter_for(field)
+            if converter is not None:
+                self.converters.append((name, converter))
+
+    @staticmethod
+    def converter_for(field):
+        if isinstance(field, serializers.DecimalField):
+            coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+            if coerce_to_string and not field.localize and not field.normalize_output:
+                # La base de datos ya devuelve el Decimal con la escala de la columna
+                return '{:f}'.format
+            return field.to_representation
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+            if output_format is None or output_format.lower() != ISO_8601 or tz is None:
+                return field.to_representation
+            # Lo mismo que DateTimeField.to_representation, con la zona horaria resuelta una vez
+            def datetime_to_iso(value):
+                text = value.astimezone(tz).isoformat()
+                return text[:-6] + 'Z' if text.endswith('+00:00') else text
+            return datetime_to_iso
+        if isinstance(field, serializers.DateField):
+            output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+            if output_format is None or output_format.lower() != ISO_8601:
+                return field.to_representation
+            return date.isoformat
+        return None
+
+    def values(self, queryset, *extra):
+        """``.values()`` de los campos; ``extra`` son columnas que hacen falta para ordenar o paginar."""
+        if not self.field_names:
+            # .values() sin nombres devolveria todas las columnas, incluidas las internas
+            raise ValueError("PoolRowSerializer needs at least one field.")
+        return queryset.values(*self.field_names, *(name for name in extra if name not in self.field_names))
+
+    def strip(self, rows, *extra):
+        """Quita de ``rows`` las columnas ``extra`` que no son campos del serializer."""
+        hidden = [name for name in extra if name not in self.field_names]
+        if hidden:
+            for row in rows:
+                for name in hidden:
+                    del row[name]
+        return rows
+
+    def serialize(self, rows):
+        converters = self.converters
+        rows = list(rows)
+        for row in rows:
+            for name, converter in converters:
+                value = row[name]
+                if value is not None:
+                    row[name] = converter(value)
+        return rows
@@ -0,0 +1,125 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .changefeed import FEED_FIELDS, pool_event, publish_on_commit
+from .changes import record_tombstones
+from .clustering import move_pools_in_clusters, rebuild_cluster_index, update_pool_clusters
+from .inspections import ROLLUP_FIELDS, sync_pool_inspection_state, update_inspection_rollups
+from .models import SEARCH_FIELDS, Inspection, Pool
+from .response_cache import invalidate_all_pools, invalidate_pools
+from .search import reset_search_index, update_search_index
+from .snapshots import schedule_rebuild
+from .statistics import invalidate_statistics_cache
+
+# Se envia tras escrituras masivas (bulk_create, bulk_update, update) que no emiten post_save.
+# ``fields`` (opcional) limita que indices derivados se reconstruyen; sin el, todos.
+# ``changes`` (opcional) son pares (antes, despues) de TRACKED_FIELDS por piscina: con ellos los
+# clusters y el cache de respuestas se actualizan solo donde hace falta.
+pools_bulk_changed = Signal()
+
+# Campos cuyo valor anterior se necesita para mantener los indices derivados y el feed de cambios
+TRACKED_FIELDS = ('id', 'latitude', 'longitude', 'current_state', 'state', 'district', 'rating')
+# Campos de los que depende el indice de clusters
+CLUSTER_FIELDS = ('latitude', 'longitude', 'current_state')
+
+
+def tracked_values(instance):
+    return {name: getattr(instance, name) for name in TRACKED_FIELDS}
+
+
+def _cluster_point(values):
+    if not values or values['latitude'] is None or values['longitude'] is None:
+        return None
+    return values['latitude'], values['longitude'], values['current_state']
+
+
+def invalidate_caches(values=None):
+    """Invalida las estadisticas y las respuestas de piscinas con ``values`` (``None``: todas)."""
+    invalidate_statistics_cache()
+    if values is None:
+        invalidate_all_pools()
+    else:
+        invalidate_pools(*values)
+
+
+def invalidate_caches_on_commit(values=None):
+    # Antes del commit, otro request podria volver a cachear los datos viejos con la version nueva
+    transaction.on_commit(lambda: invalidate_caches(values), robust=True)
+
+
+@receiver(pre_save, sender=Pool)
+def remember_previous_values(sender, instance, **kwargs):
+    instance._previous_values = None
+    if instance._state.adding:
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if all(name in loaded for name in TRACKED_FIELDS):
+        instance._previous_values = {name: loaded[name] for name in TRACKED_FIELDS}
+    else:
+        instance._previous_values = Pool.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+
+
+@receiver(post_save, sender=Pool)
+def pool_saved(sender, instance, update_fields=None, **kwargs):
+    current = tracked_values(instance)
+    update_pool_clusters(_cluster_point(instance._previous_values), _cluster_point(current))
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **current}
+    invalidate_caches_on_commit([instance._previous_values, current])
+    if update_fields is None or 'search_text' in update_fields:
+        update_search_index(instance.pk, instance.search_text)
+    publish_on_commit([pool_event(instance._previous_values, current)])
+    schedule_rebuild([(instance._previous_values or {}).get('district'), current['district']])
+
+
+@receiver(post_delete, sender=Pool)
+def pool_deleted(sender, instance, **kwargs):
+    record_tombstones([instance.pk])
+    update_pool_clusters(_cluster_point(tracked_values(instance)), None)
+    invalidate_caches_on_commit([tracked_values(instance)])
+    update_search_index(instance.pk, None)
+    publish_on_commit([pool_event(tracked_values(instance), None)])
+    schedule_rebuild([instance.district])
+
+
+@receiver(pools_bulk_changed)
+def rebuild_after_bulk_change(sender, fields=None, changes=None, **kwargs):
+    if fields is None or set(fields) & set(CLUSTER_FIELDS):
+        if changes is None:
+            rebuild_cluster_index()
+        else:
+            move_pools_in_clusters([(_cluster_point(previous), _cluster_point(current)) for previous, current in changes])
+    invalidate_caches_on_commit(None if changes is None else [values for change in changes for values in change])
+    if fields is None or set(fields) & {*SEARCH_FIELDS, 'search_text'}:
+        reset_search_index()
+    if changes is not None:
+        publish_on_commit([pool_event(previous, current) for previous, current in changes])
+    elif fields is None or set(fields) & set(FEED_FIELDS):
+        publish_on_commit([{'type': 'resync'}])
+    schedule_rebuild(None if changes is None else [values['district'] for change in changes for values in change if values])
+
+def _rollup_values(instance):
+    return {name: getattr(instance, name) for name in ROLLUP_FIELDS}
+
+
+@receiver(pre_save, sender=Inspection)
+def remember_previous_inspection(sender, instance, **kwargs):
+    # Las inspecciones casi nunca se editan: leer la fila anterior solo en ese caso es barato
+    instance._previous_values = None
+    if not instance._state.adding:
+        instance._previous_values = Inspection.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+
+
+@receiver(post_save, sender=Inspection)
+def inspection_saved(sender, instance, **kwargs):
+    previous = instance._previous_values
+    update_inspection_rollups(previous, _rollup_values(instance))
+    sync_pool_inspection_state(instance.pool_id)
+    if previous is not None and previous['pool_id'] != instance.pool_id:
+        sync_pool_inspection_state(previous['pool_id'])
+
+
+@receiver(post_delete, sender=Inspection)
+def inspection_deleted(sender, instance, **kwargs):
+    update_inspection_rollups(_rollup_values(instance), None)
+    sync_pool_inspection_state(instance.pool_id)
@@ -0,0 +1,232 @@
+"""Copias estaticas comprimidas de los listados publicos de piscinas.
+
+``/pool/all/``, ``/pool/statistics/`` y ``/pool/district/<d>/`` cambian poco y se
+leen mucho. Este modulo guarda sus respuestas en ``MEDIA_ROOT/<DIR>/v/`` como
+JSON con el hash del contenido en el nombre, mas su version ``.gz`` y ``.br``.
+WhiteNoise las sirve precomprimidas segun ``Accept-Encoding`` y con cache
+``immutable`` (ver ``WHITENOISE_IMMUTABLE_MEDIA_DIRS``), sin pasar por DRF ni
+por la base de datos.
+
+``<DIR>/manifest.json`` apunta a la version vigente de cada archivo, con rutas
+relativas al manifiesto::
+
+    {"seq": 1534, "generated_at": "...", "files": {
+        "all": {"file": "v/all.3f2a....json", "seq": 1534},
+        "statistics": {"file": "v/statistics.91bc....json", "seq": 1534},
+        "district/cayma": {"file": "v/district-cayma.07de....json", "seq": 1520}}}
+
+El manifiesto no cambia de nombre, asi que se sirve con el cache corto de
+WhiteNoise. Cada escritura de piscinas programa al confirmarse
+``tasks.rebuild_pool_snapshots`` con los distritos afectados, que reconstruye
+``all``, ``statistics`` y solo esos distritos. ``seq`` es el ``change_seq``
+global (ver changes.py) leido antes de renderizar: si una reconstruccion
+posterior ya cubrio el cambio, la tarea no hace nada, asi que una rafaga de
+escrituras dentro de ``DELAY`` segundos se resuelve con un solo render.
+"""
+from contextlib import contextmanager
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import Lower, Trim
+from django.utils import timezone
+from django.utils.text import slugify
+
+from rest_framework.renderers import JSONRenderer
+
+from .models import Pool, PoolChangeCounter, filter_district
+from .serializers import PoolRowSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'DIR': 'snapshots',
+    # Segundos que espera la tarea despues de una escritura, para juntar rafagas
+    'DELAY': 5,
+    # Segundos que se conservan las versiones viejas (clientes con el manifiesto anterior)
+    'KEEP_SECONDS': 3600,
+    'GZIP_LEVEL': 9,
+    # 11 comprime ~4% mas pero tarda casi el triple con el listado completo
+    'BROTLI_QUALITY': 10,
+}
+MANIFEST_NAME = 'manifest.json'
+VERSIONS_DIR = 'v'
+
+
+def snapshot_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'POOL_SNAPSHOTS', {})}
+
+
+def snapshot_root():
+    return Path(settings.MEDIA_ROOT) / snapshot_settings()['DIR']
+
+
+def district_key(district):
+    return f'district/{district.strip().casefold()}'
+
+
+def current_seq():
+    return PoolChangeCounter.objects.filter(pk=1).values_list('value', flat=True).first() or 0
+
+
+def schedule_rebuild(districts=None):
+    """Al confirmar la transaccion, programa la reconstruccion de ``all``, ``statistics`` y ``districts``.
+
+    ``districts=None`` reconstruye todos los distritos (escrituras masivas sin detalle).
+    Sin un broker real (``CELERY_TASK_ALWAYS_EAGER``) no se programa nada: la tarea
+    correria dentro del request, renderizando y comprimiendo todo en cada escritura,
+    y ``DELAY`` no juntaria las rafagas. Ahi se usa ``manage.py build_pool_snapshots``.
+    """
+    config = snapshot_settings()
+    if not config['ENABLED'] or getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        return
+    if districts is not None:
+        districts = sorted({district for district in districts if district})
+
+    def enqueue():
+        from .tasks import rebuild_pool_snapshots
+
+        rebuild_pool_snapshots.apply_async(
+            kwargs={'districts': districts, 'seq': current_seq()}, countdown=config['DELAY'],
+        )
+
+    transaction.on_commit(enqueue, robust=True)
+
+
+def snapshot_data(name):
+    """Lo que devuelve la vista que corresponde a ``name``, leido de la base de datos.
+
+    No se pasa por las vistas: el cache de respuestas es local a cada proceso y en
+    el worker de Celery podria tener una version anterior a la escritura. Las filas
+    van ordenadas para que el mismo contenido de siempre el mismo hash.
+    """
+    if name == 'statistics':
+        # Misma consulta que PoolStatisticsView
+        return list(Pool.objects.values('state').annotate(count=Count('id')).order_by('state'))
+    queryset = Pool.objects.all()
+    if name.startswith('district/'):
+        # Mismo filtro que PoolsByDistrictView
+        queryset = filter_district(queryset, name.split('/', 1)[1])
+    row_serializer = PoolRowSerializer()
+    return row_serializer.serialize(row_serializer.values(queryset.order_by('id')))
+
+
+def render(name):
+    """Bytes JSON de ``name``, con el mismo formato que ``JSONRenderer`` en la API."""
+    return JSONRenderer().render(snapshot_data(name))
+
+
+def write_atomic(path, data):
+    handle, temporary = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    # mkstemp crea el archivo con 0600: el servidor web (otro usuario) no podria leerlo
+    os.fchmod(handle, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+    with os.fdopen(handle, 'wb') as output:
+        output.write(data)
+    os.replace(temporary, path)
+
+
+def write_snapshot(versions, name, data, config):
+    """Escribe ``data`` y sus versiones comprimidas con nombre por contenido; devuelve el nombre."""
+    stem = slugify(name.replace('/', '-')) or 'district'
+    filename = f"{stem}.{hashlib.sha256(data).hexdigest()[:20]}.json"
+    path = versions / filename
+    if path.exists():
+        return filename
+    # Las versiones comprimidas primero: WhiteNoise las busca al ver el .json por primera vez
+    encoded = {'.gz': gzip.compress(data, config['GZIP_LEVEL'], mtime=0)}
+    if brotli is not None:
+        encoded['.br'] = brotli.compress(data, quality=config['BROTLI_QUALITY'])
+    for suffix, compressed in encoded.items():
+        if len(compressed) < len(data):
+            write_atomic(versions / f'{filename}{suffix}', compressed)
+    write_atomic(path, data)
+    return filename
+
+
+def read_manifest(root):
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {'seq': 0, 'files': {}}
+
+
+@contextmanager
+def build_lock(root):
+    # Las tareas de distintos workers actualizan el mismo manifiesto
+    with open(root / '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def collect_garbage(versions, files, keep_seconds):
+    """Borra las versiones que el manifiesto ya no usa y tienen mas de ``keep_seconds``."""
+    in_use = {Path(entry['file']).name for entry in files.values()}
+    limit = time.time() - keep_seconds
+    removed = 0
+    for path in versions.iterdir():
+        name = path.name
+        for suffix in ('.gz', '.br'):
+            name = name.removesuffix(suffix)
+        if name in in_use or path.name.startswith('.tmp-'):
+            continue
+        if path.stat().st_mtime < limit:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def build_snapshots(districts=None, seq=None):
+    """Renderiza ``all``, ``statistics`` y ``districts`` (``None``: todos) y actualiza el manifiesto.
+
+    Con ``seq`` se omiten los archivos ya construidos con un ``change_seq`` igual o mayor.
+    """
+    config = snapshot_settings()
+    root = snapshot_root()
+    versions = root / VERSIONS_DIR
+    versions.mkdir(parents=True, exist_ok=True)
+    with build_lock(root):
+        manifest = read_manifest(root)
+        files = manifest['files']
+        if districts is None:
+            existing = set(
+                Pool.objects.annotate(key=Lower(Trim('district'))).exclude(key='')
+                .values_list('key', flat=True).distinct()
+            )
+            keys = {district_key(district) for district in existing}
+            # Distritos que ya no tienen piscinas
+            for name in [name for name in files if name.startswith('district/') and name not in keys]:
+                del files[name]
+        else:
+            keys = {district_key(district) for district in districts if district and district.strip()}
+        names = ['all', 'statistics', *sorted(keys)]
+        if seq is not None:
+            names = [name for name in names if files.get(name, {}).get('seq', -1) < seq]
+        if not names and districts is not None:
+            return {'written': 0, 'removed': 0}
+
+        built = current_seq()
+        for name in names:
+            files[name] = {'file': f'{VERSIONS_DIR}/{write_snapshot(versions, name, render(name), config)}', 'seq': built}
+        manifest = {
+            'seq': max(manifest.get('seq', 0), built),
+            'generated_at': timezone.now().isoformat(),
+            'files': dict(sorted(files.items())),
+        }
+        write_atomic(root / MANIFEST_NAME, json.dumps(manifest, separators=(',', ':')).encode())
+        removed = collect_garbage(versions, files, config['KEEP_SECONDS'])
+    return {'written': len(names), 'removed': removed}
@@ -0,0 +1,146 @@
+"""Geohash para indexar ``Pool.latitude``/``Pool.longitude`` sin PostGIS.
+
+Cada piscina guarda su geohash (12 caracteres) en una columna indexada. Un prefijo
+de geohash es una celda rectangular, por lo que una consulta por viewport se
+traduce en unos pocos rangos de prefijo que usan el indice B-tree.
+"""
+import heapq
+import math
+
+from django.db.models import Q
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude, longitude = float(latitude), float(longitude)
+    chars = []
+    bit = value = 0
+    even = True
+    while len(chars) < precision:
+        bounds, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(BASE32[value])
+            bit = value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Alto y ancho (en grados) de una celda de geohash de la precision dada."""
+    bits = 5 * precision
+    lat_bits = bits // 2
+    lng_bits = bits - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def covering_cells(min_lng, min_lat, max_lng, max_lat, max_cells=16):
+    """Prefijos de geohash que cubren el rectangulo, usando la mayor precision posible."""
+    cells = ['']
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = cell_size(precision)
+        rows = math.floor((max_lat + 90.0) / height) - math.floor((min_lat + 90.0) / height) + 1
+        cols = math.floor((max_lng + 180.0) / width) - math.floor((min_lng + 180.0) / width) + 1
+        if rows * cols > max_cells:
+            break
+        cells = _cells_at(min_lng, min_lat, max_lng, max_lat, precision)
+    return cells
+
+
+def _cells_at(min_lng, min_lat, max_lng, max_lat, precision):
+    height, width = cell_size(precision)
+    first_row = math.floor((min_lat + 90.0) / height)
+    last_row = math.floor((max_lat + 90.0) / height)
+    first_col = math.floor((min_lng + 180.0) / width)
+    last_col = math.floor((max_lng + 180.0) / width)
+    cells = set()
+    for row in range(first_row, last_row + 1):
+        latitude = min(-90.0 + (row + 0.5) * height, 90.0)
+        for col in range(first_col, last_col + 1):
+            longitude = min(-180.0 + (col + 0.5) * width, 180.0)
+            cells.add(encode(latitude, longitude, precision))
+    return sorted(cells)
+
+
+def bbox_around(latitude, longitude, radius_km):
+    """Rectangulo (min_lng, min_lat, max_lng, max_lat) que contiene el circulo dado."""
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    if abs(latitude) + delta_lat >= 90.0 or cos_lat < 1e-9:
+        # El circulo incluye un polo: cubre todas las longitudes
+        delta_lng = 180.0
+    else:
+        delta_lng = min(180.0, delta_lat / cos_lat)
+    return (
+        max(-180.0, longitude - delta_lng),
+        max(-90.0, latitude - delta_lat),
+        min(180.0, longitude + delta_lng),
+        min(90.0, latitude + delta_lat),
+    )
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def prefix_upper_bound(prefix):
+    """Menor geohash que ya no empieza con ``prefix`` (None si no existe)."""
+    prefix = prefix.rstrip(BASE32[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + BASE32[BASE32.index(prefix[-1]) + 1]
+
+
+def filter_bbox(queryset, min_lng, min_lat, max_lng, max_lat):
+    """Filtra por viewport usando primero el indice de geohash y luego los limites exactos."""
+    prefixes = [prefix for prefix in covering_cells(min_lng, min_lat, max_lng, max_lat) if prefix]
+    if prefixes:
+        # Rangos [prefijo, siguiente prefijo) en vez de LIKE: el B-tree los usa en cualquier motor
+        cells = Q()
+        for prefix in prefixes:
+            cell = Q(geohash__gte=prefix)
+            upper = prefix_upper_bound(prefix)
+            if upper is not None:
+                cell &= Q(geohash__lt=upper)
+            cells |= cell
+        queryset = queryset.filter(cells)
+    return queryset.filter(
+        latitude__gte=str(min_lat),
+        latitude__lte=str(max_lat),
+        longitude__gte=str(min_lng),
+        longitude__lte=str(max_lng),
+    )
+
+
+def nearest(queryset, latitude, longitude, k, initial_radius_km=1.0):
+    """Devuelve ``[(distancia_km, pool), ...]`` con las k piscinas mas cercanas.
+
+    Busca en radios crecientes: solo se ordenan los candidatos del radio actual,
+    nunca la tabla completa.
+    """
+    max_radius = math.pi * EARTH_RADIUS_KM
+    radius = initial_radius_km
+    while True:
+        candidates = filter_bbox(queryset, *bbox_around(latitude, longitude, radius))
+        scored = []
+        for pool in candidates:
+            distance = haversine_km(latitude, longitude, pool.latitude, pool.longitude)
+            if distance <= radius:
+                scored.append((distance, pool.pk, pool))
+        if len(scored) >= k or radius >= max_radius:
+            return [(distance, pool) for distance, _, pool in heapq.nsmallest(k, scored)]
+        radius = min(radius * 4, max_radius)
@@ -0,0 +1,124 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+import uuid
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Pool
+
+STATISTICS_VERSION_KEY = 'pools:statistics:version'
+STATISTICS_CACHE_TIMEOUT = 60 * 15
+# Con un cache local las invalidaciones de otros procesos (p. ej. Celery) no llegan: solo vence el TTL
+LOCAL_STATISTICS_CACHE_TIMEOUT = 60
+DEFAULT_EXPIRING_DAYS = 30
+
+
+def statistics_cache_is_shared():
+    """``False`` si el cache por defecto vive en la memoria de cada proceso."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _statistics_version():
+    version = cache.get(STATISTICS_VERSION_KEY)
+    if version is None:
+        # Si la version se perdio del cache, una nueva deja inalcanzables las entradas viejas
+        cache.add(STATISTICS_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(STATISTICS_VERSION_KEY)
+    return version
+
+
+def invalidate_statistics_cache():
+    cache.set(STATISTICS_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _average(total, count):
+    if not count:
+        return None
+    return float(round(total / count, 2))
+
+
+def compute_dashboard_statistics(days=DEFAULT_EXPIRING_DAYS):
+    """Calcula todas las cifras del dashboard con una sola consulta agrupada."""
+    today = timezone.localdate()
+    expiring = Q(expiration_date__gte=today, expiration_date__lte=today + timedelta(days=days))
+    rows = (
+        Pool.objects.order_by()
+        .values('state', 'current_state', 'district', 'rating')
+        .annotate(count=Count('id'), expiring=Count('id', filter=expiring))
+    )
+
+    by_state = defaultdict(int)
+    by_current_state = defaultdict(int)
+    breakdown = defaultdict(int)
+    districts = {}
+    histogram = defaultdict(int)
+    total = expiring_total = rated = 0
+    rating_sum = Decimal('0')
+
+    for row in rows:
+        count = row['count']
+        total += count
+        expiring_total += row['expiring']
+        by_state[row['state']] += count
+        by_current_state[row['current_state']] += count
+        breakdown[(row['state'], row['current_state'], row['district'])] += count
+
+        district = districts.setdefault(row['district'], {
+            'district': row['district'],
+            'total': 0,
+            'healthy': 0,
+            'unhealthy': 0,
+            'rated': 0,
+            'rating_sum': Decimal('0'),
+        })
+        district['total'] += count
+        if row['current_state'] == 'HEALTHY':
+            district['healthy'] += count
+        elif row['current_state'] == 'UNHEALTHY':
+            district['unhealthy'] += count
+
+        if row['rating'] is not None:
+            rated += count
+            rating_sum += row['rating'] * count
+            district['rated'] += count
+            district['rating_sum'] += row['rating'] * count
+            histogram[str(row['rating'])] += count
+
+    district_list = []
+    for district in sorted(districts.values(), key=lambda d: d['district']):
+        rating_total = district.pop('rating_sum')
+        district['average_rating'] = _average(rating_total, district['rated'])
+        district_list.append(district)
+
+    return {
+        'total': total,
+        'healthy': by_current_state.get('HEALTHY', 0),
+        'unhealthy': by_current_state.get('UNHEALTHY', 0),
+        'by_state': dict(by_state),
+        'by_current_state': dict(by_current_state),
+        'by_district': district_list,
+        'breakdown': [
+            {'state': state, 'current_state': current_state, 'district': district, 'count': count}
+            for (state, current_state, district), count in sorted(breakdown.items())
+        ],
+        'rating_histogram': dict(sorted(histogram.items())),
+        'rated': rated,
+        'average_rating': _average(rating_sum, rated),
+        'expiring_days': days,
+        'expiring_soon': expiring_total,
+    }
+
+
+def get_dashboard_statistics(days=DEFAULT_EXPIRING_DAYS):
+    key = f'pools:statistics:{_statistics_version()}:{days}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_dashboard_statistics(days)
+        timeout = STATISTICS_CACHE_TIMEOUT if statistics_cache_is_shared() else LOCAL_STATISTICS_CACHE_TIMEOUT
+        cache.set(key, stats, timeout)
+    return stats
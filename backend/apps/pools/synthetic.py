@@ -0,0 +1,124 @@
+"""Generador de piscinas sinteticas para pruebas de rendimiento.
+
+Reproduce la distribucion de Arequipa: distritos con peso segun su tamaño,
+coordenadas alrededor del centro de cada distrito y textos de longitud realista.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+import random
+
+from django.db import connection, transaction
+
+from .changes import record_tombstones
+from .models import Pool, next_change_seq
+from .signals import pools_bulk_changed
+
+SYNTHETIC_PREFIX = 'SYN-'
+
+# (distrito, peso, latitud, longitud)
+DISTRICTS = [
+    ('Arequipa', 14, -16.3989, -71.5350),
+    ('Cayma', 10, -16.3667, -71.5500),
+    ('Cerro Colorado', 12, -16.3750, -71.5833),
+    ('Yanahuara', 6, -16.3880, -71.5420),
+    ('Sachaca', 4, -16.4250, -71.5667),
+    ('José Luis Bustamante y Rivero', 9, -16.4280, -71.5250),
+    ('Paucarpata', 10, -16.4300, -71.5000),
+    ('Mariano Melgar', 5, -16.4050, -71.5080),
+    ('Miraflores', 5, -16.3950, -71.5200),
+    ('Alto Selva Alegre', 6, -16.3770, -71.5170),
+    ('Socabaya', 6, -16.4580, -71.5290),
+    ('Jacobo Hunter', 4, -16.4400, -71.5580),
+    ('Tiabaya', 2, -16.4500, -71.5900),
+    ('Sabandía', 2, -16.4580, -71.4950),
+    ('Characato', 2, -16.4670, -71.4830),
+    ('Uchumayo', 2, -16.4240, -71.6710),
+    ('Yura', 1, -16.2500, -71.6800),
+]
+POOL_TYPES = ['Pública', 'Privada', 'Club', 'Hotel', 'Condominio', 'Gimnasio']
+STREETS = ['Av. Ejército', 'Calle Mercaderes', 'Av. Dolores', 'Av. Independencia', 'Calle Santa Catalina',
+           'Av. Cayma', 'Av. Aviación', 'Calle Jerusalén', 'Av. Parra', 'Av. Kennedy', 'Av. Lambramani']
+NAME_WORDS = ['Club', 'Centro', 'Recreo', 'Campestre', 'Los Pinos', 'El Sol', 'Misti', 'Chachani',
+              'Aqua', 'Sport', 'Los Andes', 'Familiar', 'Turistico', 'San Lazaro', 'Colonial']
+OBSERVATION_WORDS = ['cloro', 'residual', 'dentro', 'del', 'rango', 'pH', 'adecuado', 'turbidez', 'elevada',
+                     'se', 'recomienda', 'limpieza', 'de', 'filtros', 'vestuarios', 'señalizacion', 'pendiente']
+
+
+def _text(rng, words, minimum, maximum):
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(minimum, maximum)))
+
+
+def generate_pools(count, seed=0, start=0):
+    """Genera ``count`` piscinas sin guardar (con geohash y search_text ya calculados)."""
+    rng = random.Random(seed)
+    names, weights = [d[0] for d in DISTRICTS], [d[1] for d in DISTRICTS]
+    centers = {d[0]: (d[2], d[3]) for d in DISTRICTS}
+    today = date.today()
+    for number in range(start, start + count):
+        district = rng.choices(names, weights)[0]
+        latitude, longitude = centers[district]
+        approval_date = today - timedelta(days=rng.randint(30, 3650))
+        expiration_date = approval_date + timedelta(days=rng.choice([365, 730, 1095]))
+        area = Decimal(rng.randint(2000, 150000)) / 100
+        pool = Pool(
+            file_number=f'{SYNTHETIC_PREFIX}{seed}-{number:07d}',
+            legal_name=f'{_text(rng, NAME_WORDS, 2, 4)} S.A.C.',
+            commercial_name=_text(rng, NAME_WORDS, 1, 3) if rng.random() < 0.8 else None,
+            pool_type=rng.choice(POOL_TYPES),
+            address=f'{rng.choice(STREETS)} {rng.randint(1, 2500)}, {district}',
+            district=district,
+            capacity=rng.randint(10, 400),
+            area_m2=area,
+            volume_m3=(area * Decimal(rng.uniform(1.2, 2.2))).quantize(Decimal('0.01')),
+            approval_resolution_number=f'RD-{rng.randint(1, 9999):04d}-{approval_date.year}-DIGESA',
+            approval_date=approval_date,
+            state='RES_EXPIRED' if expiration_date < today else 'RES_VALID',
+            observations=_text(rng, OBSERVATION_WORDS, 0, 60) or None,
+            expiration_date=expiration_date,
+            last_inspection_date=today - timedelta(days=rng.randint(0, 400)),
+            current_state='HEALTHY' if rng.random() < 0.75 else 'UNHEALTHY',
+            latitude=Decimal(f'{rng.gauss(latitude, 0.012):.9f}'),
+            longitude=Decimal(f'{rng.gauss(longitude, 0.012):.9f}'),
+            image_url=f'https://picsum.photos/seed/{seed}-{number}/640/480' if rng.random() < 0.6 else None,
+            rating=Decimal(rng.randint(10, 50)) / 10 if rng.random() < 0.85 else None,
+        )
+        pool.geohash = pool.compute_geohash()
+        pool.search_text = pool.compute_search_text()
+        yield pool
+
+
+def _insert(batch):
+    with transaction.atomic():
+        seq = next_change_seq()
+        for pool in batch:
+            pool.change_seq = seq
+        Pool.objects.bulk_create(batch)
+
+
+def seed_pools(count, seed=0, batch_size=1000):
+    """Inserta piscinas sinteticas con ``bulk_create`` y reconstruye los indices derivados."""
+    start = Pool.objects.filter(file_number__startswith=f'{SYNTHETIC_PREFIX}{seed}-').count()
+    batch = []
+    for pool in generate_pools(count, seed=seed, start=start):
+        batch.append(pool)
+        if len(batch) >= batch_size:
+            _insert(batch)
+            batch = []
+    if batch:
+        _insert(batch)
+    pools_bulk_changed.send(sender=Pool)
+    return count
+
+
+def clear_synthetic_pools(seed=None):
+    # DELETE directo: sin cargar las filas ni emitir una señal por piscina
+    prefix = SYNTHETIC_PREFIX if seed is None else f'{SYNTHETIC_PREFIX}{seed}-'
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Los clientes offline que las sincronizaron las borran por sus tombstones
+        record_tombstones(Pool.objects.filter(file_number__startswith=prefix).values_list('id', flat=True))
+        cursor.execute(
+            f'DELETE FROM {Pool._meta.db_table} WHERE file_number LIKE %s', [f'{prefix}%']
+        )
+        deleted = cursor.rowcount
+    pools_bulk_changed.send(sender=Pool)
+    return deleted
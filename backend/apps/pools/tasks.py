@@ -0,0 +1,88 @@
+"""Tareas periodicas de Celery (programadas en ``CELERY_BEAT_SCHEDULE``)."""
+from celery import shared_task
+from django.db import transaction
+from django.db.models import Subquery
+from django.utils import timezone
+
+from .changes import prune_tombstones
+from .clustering import rebuild_cluster_index
+from .images import process_image
+from .inspections import rebuild_inspection_rollups
+from .models import Pool, PoolImage, next_change_seq
+from .signals import pools_bulk_changed
+from .snapshots import build_snapshots
+from .statistics import (
+    DEFAULT_EXPIRING_DAYS, get_dashboard_statistics, invalidate_statistics_cache, statistics_cache_is_shared,
+)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _update_in_batches(queryset, batch_size, **values):
+    """Un ``UPDATE ... WHERE id IN (SELECT id ... LIMIT n)`` por lote hasta que no queden filas."""
+    updated = 0
+    while True:
+        batch = Subquery(queryset.order_by('pk').values('pk')[:batch_size])
+        with transaction.atomic():
+            count = Pool.objects.filter(pk__in=batch).update(**values, change_seq=next_change_seq())
+        updated += count
+        if count < batch_size:
+            return updated
+
+
+@shared_task
+def expire_resolutions(batch_size=DEFAULT_BATCH_SIZE):
+    """Sincroniza ``state`` con ``expiration_date``: vencidas a RES_EXPIRED y renovadas a RES_VALID.
+
+    Las señales invalidan los caches de estadisticas y respuestas desde el worker:
+    eso solo llega a los procesos web con un cache compartido (ver ``CACHES``).
+    Con uno local, las estadisticas se ven al vencer ``LOCAL_STATISTICS_CACHE_TIMEOUT``.
+    """
+    today = timezone.localdate()
+    now = timezone.now()
+    expired = _update_in_batches(
+        Pool.objects.filter(state='RES_VALID', expiration_date__lt=today),
+        batch_size, state='RES_EXPIRED', updated_at=now,
+    )
+    renewed = _update_in_batches(
+        Pool.objects.filter(state='RES_EXPIRED', expiration_date__gte=today),
+        batch_size, state='RES_VALID', updated_at=now,
+    )
+    if expired or renewed:
+        pools_bulk_changed.send(sender=Pool, fields={'state'})
+    return {'expired': expired, 'renewed': renewed}
+
+
+@shared_task
+def refresh_pool_aggregates():
+    """Reconstruye clusters y agregados de inspecciones (corrige desvios de escrituras sin señales)
+    y, si el cache es compartido, precalcula el dashboard."""
+    rebuild_cluster_index()
+    rollups = rebuild_inspection_rollups()
+    if statistics_cache_is_shared():
+        # Con un cache local solo se invalidaria y calentaria la copia del worker
+        invalidate_statistics_cache()
+        get_dashboard_statistics(DEFAULT_EXPIRING_DAYS)
+    return {'pools': Pool.objects.count(), 'inspection_rollups': rollups}
+
+
+@shared_task
+def process_pool_image(image_id):
+    """Genera las miniaturas de una foto subida (ver images.py)."""
+    image = PoolImage.objects.filter(pk=image_id).first()
+    if image is None:
+        return None
+    image = process_image(image)
+    return {'id': image.pk, 'status': image.status, 'variants': len(image.variants)}
+
+
+@shared_task
+def prune_pool_tombstones(days=None):
+    """Borra los tombstones vencidos (``POOL_TOMBSTONE_RETENTION_DAYS``)."""
+    return {'deleted': prune_tombstones(days)}
+
+
+@shared_task
+def rebuild_pool_snapshots(districts=None, seq=None):
+    """Reconstruye las copias estaticas de los listados publicos (ver snapshots.py)."""
+    return build_snapshots(districts, seq)
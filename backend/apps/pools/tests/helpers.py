@@ -0,0 +1,23 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from apps.pools.models import Pool
+
+
+def make_pool(number, **fields):
+    """Crea una piscina valida; ``fields`` reemplaza los valores por defecto."""
+    values = {
+        'file_number': f'EXP-{number}', 'legal_name': f'Titular {number}', 'pool_type': 'public',
+        'address': f'Calle {number}', 'district': 'Cayma', 'capacity': 10,
+        'area_m2': Decimal('1.00'), 'volume_m3': Decimal('2.00'),
+    }
+    values.update(fields)
+    return Pool.objects.create(**values)
+
+
+def make_user(username, role='citizen', **fields):
+    return get_user_model().objects.create_user(
+        f'{username}@example.com', 'pw12345678', username=username, first_name='Nombre', last_name='Apellido',
+        role=role, **fields,
+    )
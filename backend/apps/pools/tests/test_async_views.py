@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from .helpers import make_pool
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        self.pools = [
+            make_pool(1, district='Cayma', state='RES_VALID', latitude=Decimal('-16.398766'), rating=4),
+            make_pool(2, district=' cayma ', state='RES_EXPIRED'),
+            make_pool(3, district='Yanahuara', state='RES_VALID', commercial_name='Piscina Ñaña'),
+        ]
+
+    async def assertSameAsDrf(self, path, **params):
+        response = await self.async_client.get(f'/pool/async{path}', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        expected = await self.async_client.get(f'/pool{path}', params)
+        self.assertEqual(response.json(), expected.json())
+        return response.json()
+
+    async def test_lists_match_the_drf_views(self):
+        rows = await self.assertSameAsDrf('/all/')
+        self.assertEqual([row['id'] for row in rows], [pool.pk for pool in self.pools])
+        await self.assertSameAsDrf('/all/', fields='file_number,latitude,rating')
+        rows = await self.assertSameAsDrf('/state/RES_VALID/')
+        self.assertEqual(len(rows), 2)
+        rows = await self.assertSameAsDrf('/district/CAYMA/')
+        self.assertEqual(len(rows), 2)
+        await self.assertSameAsDrf('/statistics/')
+
+    async def test_detail(self):
+        row = await self.assertSameAsDrf(f'/all/{self.pools[2].pk}/')
+        self.assertEqual(row['commercial_name'], 'Piscina Ñaña')
+        response = await self.async_client.get('/pool/async/all/999999/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_invalid_fields(self):
+        response = await self.async_client.get('/pool/async/all/', {'fields': 'search_text'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
+        response = await self.async_client.post('/pool/async/all/')
+        self.assertEqual(response.status_code, 405)
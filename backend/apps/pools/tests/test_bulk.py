@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.pools.bulk import bulk_update_pools
+from apps.pools.models import Pool
+
+from .helpers import make_pool, make_user
+
+
+class BulkUpdateTests(TestCase):
+    def setUp(self):
+        self.pools = [make_pool(number) for number in range(4)]
+
+    def test_groups_values_and_writes_each_pool(self):
+        report = bulk_update_pools([
+            {'id': self.pools[0].pk, 'capacity': 50, 'current_state': 'HEALTHY'},
+            {'id': self.pools[1].pk, 'capacity': 60, 'current_state': 'HEALTHY'},
+            {'file_number': 'EXP-2', 'capacity': 50, 'current_state': 'UNHEALTHY'},
+        ])
+        self.assertEqual((report.updated, report.failed), (3, 0))
+        self.assertEqual([row['status'] for row in report.results], ['updated'] * 3)
+        rows = dict(Pool.objects.values_list('file_number', 'capacity'))
+        self.assertEqual(rows, {'EXP-0': 50, 'EXP-1': 60, 'EXP-2': 50, 'EXP-3': 10})
+        states = dict(Pool.objects.values_list('file_number', 'current_state'))
+        self.assertEqual((states['EXP-0'], states['EXP-1'], states['EXP-2']), ('HEALTHY', 'HEALTHY', 'UNHEALTHY'))
+
+    def test_shares_updated_at_and_change_seq(self):
+        before = Pool.objects.get(pk=self.pools[3].pk).change_seq
+        bulk_update_pools([{'id': pool.pk, 'capacity': 20 + index} for index, pool in enumerate(self.pools[:3])])
+        changed = Pool.objects.filter(pk__in=[pool.pk for pool in self.pools[:3]])
+        self.assertEqual(len(set(changed.values_list('change_seq', flat=True))), 1)
+        self.assertEqual(len(set(changed.values_list('updated_at', flat=True))), 1)
+        self.assertGreater(changed.first().change_seq, before)
+        self.assertEqual(Pool.objects.get(pk=self.pools[3].pk).change_seq, before)
+
+    def test_refreshes_geohash_and_search_text(self):
+        bulk_update_pools([{
+            'id': self.pools[0].pk, 'latitude': '-16.398765600', 'longitude': '-71.536969300',
+            'legal_name': 'Club Acuático',
+        }])
+        pool = Pool.objects.get(pk=self.pools[0].pk)
+        self.assertEqual(pool.geohash, pool.compute_geohash())
+        self.assertIn('acuatico', pool.search_text)
+
+    def test_reports_invalid_items_and_writes_the_rest(self):
+        report = bulk_update_pools([
+            {'id': self.pools[0].pk, 'capacity': 30},
+            {'id': 999999, 'capacity': 30},
+            {'capacity': 30},
+            {'id': self.pools[0].pk, 'capacity': 40},
+            {'id': self.pools[1].pk, 'area_m2': 'abc'},
+        ])
+        self.assertEqual((report.updated, report.failed), (1, 4))
+        self.assertEqual([row['status'] for row in report.results], ['updated', 'error', 'error', 'error', 'error'])
+        self.assertEqual(Pool.objects.get(pk=self.pools[0].pk).capacity, 30)
+        self.assertEqual(Pool.objects.get(pk=self.pools[1].pk).area_m2, Decimal('1.00'))
+
+    def test_atomic_skips_everything_on_error(self):
+        report = bulk_update_pools([
+            {'id': self.pools[0].pk, 'capacity': 30},
+            {'id': self.pools[1].pk, 'file_number': 'EXP-2'},
+        ], atomic=True)
+        self.assertEqual((report.updated, report.failed), (0, 1))
+        self.assertEqual([row['status'] for row in report.results], ['skipped', 'error'])
+        self.assertEqual(Pool.objects.get(pk=self.pools[0].pk).capacity, 10)
+
+    def test_renames_conflicting_within_the_batch(self):
+        report = bulk_update_pools([
+            {'id': self.pools[0].pk, 'file_number': 'EXP-NEW'},
+            {'id': self.pools[1].pk, 'file_number': 'EXP-NEW'},
+        ])
+        self.assertEqual(report.failed, 2)
+        self.assertFalse(Pool.objects.filter(file_number='EXP-NEW').exists())
+
+
+class PoolWritePermissionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.pool = make_pool(1)
+
+    def test_citizens_cannot_patch_or_bulk_update(self):
+        self.client.force_authenticate(make_user('vecino'))
+        response = self.client.patch(f'/pool/all/{self.pool.pk}/', {'capacity': 99}, format='json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post('/pool/bulk-update/', [{'id': self.pool.pk, 'capacity': 99}], format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Pool.objects.get(pk=self.pool.pk).capacity, 10)
+
+    def test_anonymous_users_cannot_patch(self):
+        response = self.client.patch(f'/pool/all/{self.pool.pk}/', {'capacity': 99}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_inspectors_can_patch_and_anyone_can_read(self):
+        self.client.force_authenticate(make_user('inspector1', role='inspector'))
+        response = self.client.patch(f'/pool/all/{self.pool.pk}/', {'capacity': 99}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['capacity'], 99)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(f'/pool/all/{self.pool.pk}/').json()['capacity'], 99)
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.pools.changefeed import LocalHub, drain, feed_settings, follow, get_hub, opening, pool_event
+from apps.pools.models import Pool
+from apps.pools.signals import pools_bulk_changed
+
+from .helpers import make_pool
+
+VALUES = {'id': 7, 'current_state': 'HEALTHY', 'state': 'RES_VALID', 'rating': 4, 'latitude': None, 'longitude': None}
+
+
+def events(message):
+    """Eventos de los mensajes SSE ``pools`` de ``message``."""
+    found = []
+    for block in message.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line)
+        if fields.get('event') == 'pools':
+            found += json.loads(fields['data'])
+    return found
+
+
+class PoolEventTests(SimpleTestCase):
+    def test_events(self):
+        self.assertEqual(pool_event(None, VALUES), {
+            'type': 'create', 'id': 7,
+            'pool': {'current_state': 'HEALTHY', 'state': 'RES_VALID', 'rating': 4, 'latitude': None, 'longitude': None},
+        })
+        self.assertEqual(pool_event(VALUES, None), {'type': 'delete', 'id': 7})
+        changed = {**VALUES, 'current_state': 'UNHEALTHY'}
+        self.assertEqual(pool_event(VALUES, changed), {'type': 'update', 'id': 7, 'changes': {'current_state': 'UNHEALTHY'}})
+        # Un cambio que no esta en FEED_FIELDS no genera evento
+        self.assertIsNone(pool_event({**VALUES, 'district': 'Cayma'}, {**VALUES, 'district': 'Yanahuara'}))
+
+
+class LocalHubTests(SimpleTestCase):
+    def setUp(self):
+        self.hub = LocalHub(buffer_size=3)
+        self.config = {**feed_settings(), 'MAX_BATCHES': 2}
+
+    def test_new_clients_start_at_the_last_batch(self):
+        self.hub.publish([{'type': 'delete', 'id': 1}])
+        position, first = opening(self.hub, None, self.config)
+        self.assertIn('event: ready', first)
+        self.assertEqual(drain(self.hub, position, self.config), (position, ''))
+
+    def test_reconnecting_clients_receive_what_they_missed(self):
+        _, token = self.hub.current()
+        for pk in (1, 2, 3):
+            self.hub.publish([{'type': 'delete', 'id': pk}])
+
+        position, first = opening(self.hub, token, self.config)
+        self.assertNotIn('event:', first)
+        position, message = drain(self.hub, position, self.config)
+        # MAX_BATCHES lotes por mensaje, unidos en un solo arreglo
+        self.assertEqual(message.count('event: pools'), 2)
+        self.assertEqual([event['id'] for event in events(message)], [1, 2, 3])
+        self.assertEqual(position, 3)
+
+    def test_clients_behind_the_buffer_resync(self):
+        _, token = self.hub.current()
+        for pk in range(5):
+            self.hub.publish([{'type': 'delete', 'id': pk}])
+        self.assertIn('event: resync', opening(self.hub, token, self.config)[1])
+        self.assertIn('event: resync', opening(self.hub, 'other-process-1', self.config)[1])
+        self.assertIn('event: resync', drain(self.hub, 0, self.config)[1])
+
+    def test_follow_wakes_up_on_publish(self):
+        async def stream():
+            position, first = opening(self.hub, None, self.config)
+            messages = follow(self.hub, position, first, self.config)
+            await anext(messages)
+            asyncio.get_running_loop().call_later(0.01, self.hub.publish, [{'type': 'delete', 'id': 9}])
+            return await asyncio.wait_for(anext(messages), 1)
+
+        self.assertEqual(events(asyncio.run(stream())), [{'type': 'delete', 'id': 9}])
+
+
+@override_settings(POOL_CHANGE_FEED={'BUFFER_SIZE': 100})
+class PoolChangeFeedTests(TestCase):
+    def setUp(self):
+        self.config = feed_settings()
+        self.position, _ = get_hub().current()
+
+    def published(self):
+        position, message = drain(get_hub(), self.position, self.config)
+        self.position = position
+        return events(message)
+
+    def test_writes_publish_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pool = make_pool(1, rating=3)
+        (created,) = self.published()
+        self.assertEqual((created['type'], created['id'], created['pool']['rating']), ('create', pool.pk, 3))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            pool.current_state = 'UNHEALTHY'
+            pool.save()
+        self.assertEqual(self.published(), [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.published(), [{'type': 'update', 'id': pool.pk, 'changes': {'current_state': 'UNHEALTHY'}}])
+
+        pk = pool.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            pool.delete()
+        self.assertEqual(self.published(), [{'type': 'delete', 'id': pk}])
+
+    def test_bulk_changes_without_details_ask_for_a_resync(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pools_bulk_changed.send(sender=Pool, fields=['current_state'])
+            pools_bulk_changed.send(sender=Pool, fields=['observations'])
+        self.assertEqual(self.published(), [{'type': 'resync'}])
+
+    def test_stream_view_returns_pending_batches_under_wsgi(self):
+        response = self.client.get('/pool/live/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        token = response.content.decode().split('id: ')[1].split('\n')[0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pool = make_pool(1)
+        response = self.client.get('/pool/live/', HTTP_LAST_EVENT_ID=token)
+        self.assertEqual([event['id'] for event in events(response.content.decode())], [pool.pk])
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.pools.bulk import bulk_update_pools
+from apps.pools.changes import parse_cursor, prune_tombstones
+from apps.pools.models import Pool, PoolTombstone
+
+from .helpers import make_pool
+
+
+class PoolChangesTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.pools = [make_pool(number) for number in range(5)]
+
+    def sync(self, since=None, **params):
+        """Recorre todas las paginas desde ``since``: ``(cursor, changed, deleted, paginas)``."""
+        changed, deleted, pages = [], [], 0
+        while True:
+            if since:
+                params['since'] = since
+            response = self.client.get('/pool/changes/', params)
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            changed += body['changed']
+            deleted += body['deleted']
+            since = body['cursor']
+            pages += 1
+            if not body['has_more']:
+                return since, changed, deleted, pages
+
+    def test_full_sync_in_pages(self):
+        cursor, changed, deleted, pages = self.sync(page_size=2)
+        self.assertEqual([row['id'] for row in changed], [pool.pk for pool in self.pools])
+        self.assertEqual((deleted, pages), ([], 3))
+        self.assertEqual(parse_cursor(cursor)[1], self.pools[-1].pk)
+
+    def test_sync_after_cursor_returns_only_new_changes(self):
+        cursor, *_ = self.sync()
+        self.assertEqual(self.sync(cursor)[1:3], ([], []))
+
+        self.pools[2].capacity = 99
+        self.pools[2].save()
+        deleted_pk = self.pools[4].pk
+        self.pools[4].delete()
+        cursor, changed, deleted, _ = self.sync(cursor)
+        self.assertEqual([(row['id'], row['capacity']) for row in changed], [(self.pools[2].pk, 99)])
+        self.assertEqual(deleted, [deleted_pk])
+        self.assertEqual(self.sync(cursor)[1:3], ([], []))
+
+    def test_rows_sharing_a_change_seq_are_paged_by_id(self):
+        cursor, *_ = self.sync()
+        bulk_update_pools([{'id': pool.pk, 'capacity': 50} for pool in self.pools])
+        self.assertEqual(len(set(Pool.objects.values_list('change_seq', flat=True))), 1)
+
+        _, changed, _, pages = self.sync(cursor, page_size=2)
+        self.assertEqual([row['id'] for row in changed], [pool.pk for pool in self.pools])
+        self.assertEqual(pages, 3)
+
+    def test_fields_keep_the_id(self):
+        _, changed, _, _ = self.sync(fields='capacity')
+        self.assertEqual(changed[0], {'id': self.pools[0].pk, 'capacity': 10})
+
+    def test_deleting_twice_updates_the_tombstone(self):
+        pk = self.pools[0].pk
+        self.pools[0].delete()
+        cursor, *_ = self.sync()
+        make_pool(0, id=pk).delete()
+        self.assertEqual(PoolTombstone.objects.filter(pool_id=pk).count(), 1)
+        self.assertEqual(self.sync(cursor)[2], [pk])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/pool/changes/', {'since': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get('/pool/changes/', {'page_size': 0}).status_code, 400)
+        self.assertEqual(self.client.get('/pool/changes/', {'page_size': 'x'}).status_code, 400)
+
+
+class TombstonePruningTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.pools = [make_pool(number) for number in range(3)]
+
+    def test_cursor_older_than_pruned_tombstones_expires(self):
+        first, second = self.pools[0].pk, self.pools[1].pk
+        old_cursor = self.client.get('/pool/changes/').json()['cursor']
+        self.pools[0].delete()
+        PoolTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=100))
+        self.pools[2].save()
+        # Este cursor ya paso el tombstone que se va a borrar
+        recent_cursor = self.client.get('/pool/changes/', {'since': old_cursor}).json()['cursor']
+        self.pools[1].delete()
+
+        self.assertEqual(prune_tombstones(days=90), 1)
+        self.assertEqual(list(PoolTombstone.objects.values_list('pool_id', flat=True)), [second])
+
+        self.assertEqual(self.client.get('/pool/changes/', {'since': old_cursor}).status_code, 410)
+        response = self.client.get('/pool/changes/', {'since': recent_cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['deleted'], [second])
+        self.assertEqual(response.json()['changed'], [])
+        self.assertNotIn(first, self.client.get('/pool/changes/').json()['deleted'])
+        # Sincronizar desde cero siempre funciona
+        self.assertEqual(len(self.client.get('/pool/changes/').json()['changed']), 1)
+
+    def test_nothing_to_prune(self):
+        self.pools[0].delete()
+        self.assertEqual(prune_tombstones(days=90), 0)
+        self.assertEqual(PoolTombstone.objects.count(), 1)
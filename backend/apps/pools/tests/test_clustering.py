@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.pools.bulk import bulk_update_pools
+from apps.pools.clustering import (
+    MAX_CLUSTER_ZOOM, rebuild_cluster_index, tile_bounds, tile_clusters, tile_position,
+)
+from apps.pools.models import PoolCluster
+
+from .helpers import make_pool
+
+
+def cluster_index():
+    """Celdas no vacias del indice, con las sumas redondeadas (son floats acumulados)."""
+    return {
+        (cell.zoom, cell.cell_x, cell.cell_y): (
+            cell.count, cell.healthy, cell.unhealthy, round(cell.latitude_sum, 6), round(cell.longitude_sum, 6),
+        )
+        for cell in PoolCluster.objects.filter(count__gt=0)
+    }
+
+
+class TileMathTests(SimpleTestCase):
+    def test_tile_bounds_contain_their_positions(self):
+        zoom = 12
+        x, y = (int(value) for value in tile_position(-16.398766, -71.536969, zoom))
+        min_lng, min_lat, max_lng, max_lat = tile_bounds(zoom, x, y)
+        self.assertTrue(min_lng <= -71.536969 < max_lng)
+        self.assertTrue(min_lat <= -16.398766 < max_lat)
+        self.assertEqual(tile_bounds(0, 0, 0)[::2], (-180.0, 180.0))
+
+
+class ClusterIndexTests(TestCase):
+    def setUp(self):
+        self.pools = [
+            make_pool(1, latitude=Decimal('-16.398766'), longitude=Decimal('-71.536969')),
+            make_pool(2, latitude=Decimal('-16.390000'), longitude=Decimal('-71.530000'), current_state='UNHEALTHY'),
+            make_pool(3, latitude=Decimal('-12.046374'), longitude=Decimal('-77.042793')),
+            make_pool(4),
+        ]
+
+    def assertIndexMatchesRebuild(self):
+        incremental = cluster_index()
+        rebuild_cluster_index()
+        self.assertEqual(incremental, cluster_index())
+
+    def test_new_pools_add_one_cell_per_zoom(self):
+        self.assertEqual(PoolCluster.objects.filter(zoom=0).get().count, 3)
+        self.assertEqual(PoolCluster.objects.filter(zoom=MAX_CLUSTER_ZOOM).count(), 3)
+        self.assertEqual(set(PoolCluster.objects.values_list('zoom', flat=True)), set(range(MAX_CLUSTER_ZOOM + 1)))
+        self.assertIndexMatchesRebuild()
+
+    def test_saves_deletes_and_bulk_changes_keep_the_index_in_sync(self):
+        first, second, lima, without_location = self.pools
+        first.current_state = 'UNHEALTHY'
+        first.save()
+        second.latitude, second.longitude = Decimal('-16.500000'), Decimal('-71.600000')
+        second.save()
+        without_location.latitude, without_location.longitude = Decimal('-13.531950'), Decimal('-71.967463')
+        without_location.save()
+        lima.delete()
+        self.assertIndexMatchesRebuild()
+
+        report = bulk_update_pools([
+            {'id': first.pk, 'current_state': 'HEALTHY'},
+            {'id': second.pk, 'latitude': '-16.410000', 'longitude': '-71.540000'},
+        ])
+        self.assertEqual(report.failed, 0)
+        self.assertIndexMatchesRebuild()
+
+    def test_tile_clusters(self):
+        (cluster,) = tile_clusters(0, 0, 0)
+        self.assertEqual((cluster['count'], cluster['healthy'], cluster['unhealthy']), (3, 2, 1))
+        self.assertAlmostEqual(cluster['latitude'], (-16.398766 - 16.39 - 12.046374) / 3, places=5)
+
+        # Con mas zoom Arequipa y Lima quedan en celdas distintas
+        zoom = 8
+        x, y = (int(value) for value in tile_position(-16.398766, -71.536969, zoom))
+        clusters = tile_clusters(zoom, x, y)
+        self.assertEqual([(cluster['count'], cluster['unhealthy']) for cluster in clusters], [(2, 1)])
+
+
+class ClusterTileViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.pool = make_pool(1, latitude=Decimal('-16.398766'), longitude=Decimal('-71.536969'))
+
+    def test_clusters_up_to_the_max_zoom_and_pools_beyond(self):
+        response = self.client.get('/pool/clusters/0/0/0/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['clusters'][0]['count'], 1)
+
+        zoom = MAX_CLUSTER_ZOOM + 2
+        x, y = (int(value) for value in tile_position(-16.398766, -71.536969, zoom))
+        clusters = self.client.get(f'/pool/clusters/{zoom}/{x}/{y}/').json()['clusters']
+        self.assertEqual([cluster['id'] for cluster in clusters], [self.pool.pk])
+
+    def test_tiles_out_of_range(self):
+        self.assertEqual(self.client.get('/pool/clusters/1/2/0/').status_code, 400)
+        self.assertEqual(self.client.get('/pool/clusters/23/0/0/').status_code, 400)
@@ -0,0 +1,59 @@
+import csv
+from decimal import Decimal
+import gzip
+import io
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.pools.exporters import EXPORT_FIELDS
+
+from .helpers import make_pool
+
+
+class PoolExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.located = make_pool(
+            1, latitude=Decimal('-16.398766'), longitude=Decimal('-71.536969'), commercial_name='Club Ñandú',
+        )
+        self.unlocated = make_pool(2, district='Yanahuara')
+
+    def export(self, export_format, **params):
+        response = self.client.get(f'/pool/export/{export_format}/', params)
+        self.assertEqual(response.status_code, 200, getattr(response, 'content', b''))
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, body = self.export('csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="pools.csv"')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(list(rows[0]), EXPORT_FIELDS)
+        self.assertEqual([row['file_number'] for row in rows], ['EXP-1', 'EXP-2'])
+        self.assertEqual(rows[0]['commercial_name'], 'Club Ñandú')
+        self.assertEqual((rows[0]['latitude'], rows[1]['latitude']), ('-16.398766000', ''))
+
+    def test_ndjson_matches_the_api_format(self):
+        _, body = self.export('ndjson', district='Cayma', fields='id,capacity,area_m2,latitude,updated_at')
+        (record,) = [json.loads(line) for line in body.splitlines()]
+        api = self.client.get(f'/pool/all/{self.located.pk}/').json()
+        self.assertEqual(record, {name: api[name] for name in record})
+
+    def test_geojson(self):
+        _, body = self.export('geojson', fields='file_number,latitude,longitude')
+        features = json.loads(body)['features']
+        self.assertEqual(features[0]['geometry'], {'type': 'Point', 'coordinates': [-71.536969, -16.398766]})
+        self.assertEqual(features[0]['properties'], {'file_number': 'EXP-1'})
+        self.assertIsNone(features[1]['geometry'])
+
+    def test_gzip_when_accepted(self):
+        response = self.client.get('/pool/export/ndjson/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(len(body.splitlines()), 2)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get('/pool/export/xml/').status_code, 404)
+        self.assertEqual(self.client.get('/pool/export/csv/', {'fields': 'search_text'}).status_code, 400)
@@ -0,0 +1,77 @@
+import io
+import stat
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from apps.pools import signals
+from apps.pools.images import attach_image, media_path, process_image, render_variants, store_upload, write_once
+
+from .helpers import make_pool
+
+
+def png_upload(size=(400, 300)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'teal').save(buffer, 'PNG')
+    return SimpleUploadedFile('piscina.png', buffer.getvalue())
+
+
+class TemporaryMediaMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(MEDIA_ROOT=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class WriteOnceTests(TemporaryMediaMixin, SimpleTestCase):
+    def test_variants_are_readable_by_other_users(self):
+        write_once('pools/ab/abc-160.webp', b'RIFF')
+        path = media_path('pools/ab/abc-160.webp')
+        self.assertEqual(stat.S_IMODE(path.stat().st_mode), 0o644)
+
+        # El nombre depende del contenido: no se vuelve a escribir
+        write_once('pools/ab/abc-160.webp', b'other')
+        self.assertEqual(path.read_bytes(), b'RIFF')
+
+
+
+class RenderVariantsTests(TemporaryMediaMixin, TestCase):
+    def test_every_size_in_every_format(self):
+        image, created = store_upload(png_upload())
+        self.assertTrue(created)
+        variants = render_variants(image)
+        self.assertEqual(
+            sorted((variant['format'], variant['width']) for variant in variants),
+            [(variant_format, width) for variant_format in ('jpeg', 'webp') for width in (160, 320, 400)],
+        )
+        for variant in variants:
+            with Image.open(media_path(variant['name'])) as encoded:
+                self.assertEqual(encoded.width, variant['width'])
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+class ProcessImageTests(TemporaryMediaMixin, TestCase):
+    def test_invalidates_only_the_pools_using_the_image(self):
+        pool = make_pool(1, district='Cayma')
+        make_pool(2, district='Yanahuara')
+        image, _ = store_upload(png_upload())
+        attach_image(pool, image)
+
+        with mock.patch.object(signals, 'invalidate_all_pools') as invalidate_all, \
+                mock.patch.object(signals, 'invalidate_pools') as invalidate_pools, \
+                mock.patch.object(signals, 'schedule_rebuild') as schedule_rebuild, \
+                self.captureOnCommitCallbacks(execute=True):
+            process_image(image)
+
+        invalidate_all.assert_not_called()
+        self.assertEqual({values['district'] for values in invalidate_pools.call_args.args}, {'Cayma'})
+        schedule_rebuild.assert_called_once_with(['Cayma', 'Cayma'])
+        pool.refresh_from_db()
+        self.assertTrue(pool.image_url.endswith('.jpg'))
+        self.assertIn(' 320w', pool.image_srcset)
@@ -0,0 +1,68 @@
+from decimal import Decimal
+import io
+
+from django.test import TestCase
+
+from apps.pools.importers import import_pools, read_rows
+from apps.pools.models import Pool
+
+from .helpers import make_pool
+
+
+REQUIRED = 'expediente,titular,tipo,direccion,distrito,aforo,area,volumen'
+
+
+def csv_file(*lines):
+    return io.BytesIO('\n'.join(lines).encode())
+
+
+class ImportPoolsTests(TestCase):
+    def test_creates_and_updates_by_file_number(self):
+        make_pool(1, capacity=5)
+        report = import_pools(csv_file(
+            'N° Expediente,Razón social,Tipo,Dirección,Distrito,Aforo,Área,Volumen',
+            'EXP-1,Titular 1,public,Calle 1,Cayma,40,1.00,2.00',
+            'EXP-2,Club Acuático,private,Calle 2,Yanahuara,20,3.50,7.00',
+        ), 'padron.csv')
+        self.assertEqual((report.created, report.updated, report.failed), (1, 1, 0))
+        self.assertEqual(Pool.objects.get(file_number='EXP-1').capacity, 40)
+        self.assertIn('acuatico', Pool.objects.get(file_number='EXP-2').search_text)
+
+    def test_single_coordinate_column_refreshes_the_geohash(self):
+        pool = make_pool(1, latitude=Decimal('-16.398765600'), longitude=Decimal('-71.536969300'))
+        report = import_pools(
+            csv_file(f'{REQUIRED},latitud', 'EXP-1,Titular 1,public,Calle 1,Cayma,10,1,2,-12.046374000'), 'padron.csv',
+        )
+        self.assertEqual(report.updated, 1)
+        pool = Pool.objects.get(pk=pool.pk)
+        self.assertEqual(pool.latitude, Decimal('-12.046374000'))
+        self.assertEqual(pool.geohash, pool.compute_geohash())
+
+    def test_duplicate_headers_for_the_same_field(self):
+        # PostgreSQL rechaza un ON CONFLICT que asigna dos veces la misma columna
+        columns = next(read_rows(csv_file('expediente,n_expediente,aforo,capacidad'), 'padron.csv'))
+        self.assertEqual(columns, ['file_number', 'capacity'])
+
+        make_pool(1)
+        report = import_pools(csv_file(
+            f'{REQUIRED},n_expediente,capacidad', 'EXP-X,Titular 1,public,Calle 1,Cayma,10,1,2,EXP-1,25',
+        ), 'padron.csv')
+        self.assertEqual((report.updated, report.failed), (1, 0))
+        self.assertEqual(Pool.objects.get(file_number='EXP-1').capacity, 25)
+        self.assertFalse(Pool.objects.filter(file_number='EXP-X').exists())
+
+    def test_missing_required_columns_reject_the_file(self):
+        make_pool(1)
+        with self.assertRaisesMessage(ValueError, 'missing required columns: legal_name, pool_type, address'):
+            import_pools(csv_file('expediente,aforo', 'EXP-1,40'), 'padron.csv')
+        self.assertEqual(Pool.objects.get(file_number='EXP-1').capacity, 10)
+
+    def test_dry_run_writes_nothing(self):
+        report = import_pools(csv_file(
+            REQUIRED,
+            'EXP-9,Titular,public,Calle,Cayma,10,1,2',
+            'EXP-10,Titular,public,Calle,Cayma,-10,1,2',
+        ), 'padron.csv', dry_run=True)
+        self.assertEqual((report.created, report.failed), (1, 1))
+        self.assertEqual(report.errors[0]['row'], 3)
+        self.assertFalse(Pool.objects.exists())
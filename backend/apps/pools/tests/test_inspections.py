@@ -0,0 +1,100 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.pools.inspections import rebuild_inspection_rollups
+from apps.pools.models import Inspection, InspectionRollup, Pool
+
+from .helpers import make_pool, make_user
+
+ROLLUP_COLUMNS = (
+    'district', 'month', 'inspections', 'healthy', 'unhealthy',
+    'free_chlorine_sum', 'free_chlorine_count', 'ph_sum', 'ph_count', 'turbidity_sum', 'turbidity_count',
+)
+
+
+def rollups():
+    """Agregados con alguna inspeccion (los vaciados por deltas quedan en cero)."""
+    rows = InspectionRollup.objects.filter(inspections__gt=0).values_list(*ROLLUP_COLUMNS)
+    return sorted(tuple(round(value, 6) if isinstance(value, float) else value for value in row) for row in rows)
+
+
+def inspect(pool, day, verdict='HEALTHY', **measurements):
+    return Inspection.objects.create(pool=pool, inspection_date=day, verdict=verdict, **measurements)
+
+
+class InspectionRollupTests(TestCase):
+    def setUp(self):
+        self.cayma = make_pool(1, district='Cayma')
+        self.yanahuara = make_pool(2, district='Yanahuara')
+        self.first = inspect(self.cayma, date(2026, 3, 10), 'HEALTHY', free_chlorine=Decimal('1.20'), ph=Decimal('7.20'))
+        self.second = inspect(self.cayma, date(2026, 4, 2), 'UNHEALTHY', turbidity=Decimal('3.50'))
+        inspect(self.yanahuara, date(2026, 3, 15), 'HEALTHY', ph=Decimal('7.00'))
+
+    def assertMatchesRebuild(self):
+        incremental = rollups()
+        rebuild_inspection_rollups()
+        self.assertEqual(incremental, rollups())
+
+    def test_new_inspections_add_to_their_month(self):
+        march = InspectionRollup.objects.get(district='Cayma', month=date(2026, 3, 1))
+        self.assertEqual((march.inspections, march.healthy, march.free_chlorine_count), (1, 1, 1))
+        self.assertMatchesRebuild()
+
+    def test_moving_an_inspection_to_another_month(self):
+        self.first.inspection_date = date(2026, 5, 20)
+        self.first.verdict = 'UNHEALTHY'
+        self.first.save()
+        self.assertEqual(InspectionRollup.objects.get(district='Cayma', month=date(2026, 3, 1)).inspections, 0)
+        may = InspectionRollup.objects.get(district='Cayma', month=date(2026, 5, 1))
+        self.assertEqual((may.inspections, may.unhealthy, may.ph_count), (1, 1, 1))
+        self.assertMatchesRebuild()
+
+    def test_moving_an_inspection_to_another_pool(self):
+        self.second.pool = self.yanahuara
+        self.second.save()
+        # El distrito es el de la visita: el agregado no cambia, la piscina si
+        self.assertMatchesRebuild()
+        cayma = Pool.objects.get(pk=self.cayma.pk)
+        self.assertEqual((cayma.current_state, cayma.last_inspection_date), ('HEALTHY', date(2026, 3, 10)))
+        yanahuara = Pool.objects.get(pk=self.yanahuara.pk)
+        self.assertEqual((yanahuara.current_state, yanahuara.last_inspection_date), ('UNHEALTHY', date(2026, 4, 2)))
+
+    def test_deleting_inspections(self):
+        self.second.delete()
+        self.assertEqual(InspectionRollup.objects.get(district='Cayma', month=date(2026, 4, 1)).inspections, 0)
+        self.assertEqual(Pool.objects.get(pk=self.cayma.pk).last_inspection_date, date(2026, 3, 10))
+        self.assertMatchesRebuild()
+
+        self.first.delete()
+        march = InspectionRollup.objects.get(district='Cayma', month=date(2026, 3, 1))
+        self.assertEqual((march.inspections, march.free_chlorine_count, march.ph_sum), (0, 0, 0))
+        self.assertMatchesRebuild()
+
+
+class PoolInspectionsViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.pool = make_pool(1)
+        self.url = f'/pool/all/{self.pool.pk}/inspections/'
+        self.visit = {'inspection_date': '2026-06-01', 'verdict': 'HEALTHY'}
+
+    def test_history_is_public(self):
+        inspect(self.pool, date(2026, 5, 1))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_only_inspectors_and_admins_register_visits(self):
+        self.assertEqual(self.client.post(self.url, self.visit, format='json').status_code, 401)
+        self.client.force_authenticate(make_user('vecino'))
+        self.assertEqual(self.client.post(self.url, self.visit, format='json').status_code, 403)
+        self.assertFalse(Inspection.objects.exists())
+
+        inspector = make_user('inspector1', role='inspector')
+        self.client.force_authenticate(inspector)
+        response = self.client.post(self.url, self.visit, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Inspection.objects.get().inspector, inspector)
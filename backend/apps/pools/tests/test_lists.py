@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .helpers import make_pool
+
+
+class FieldsPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.pools = [make_pool(number, latitude=Decimal('-16.400000000') + number) for number in range(5)]
+
+    def test_fields_without_id_can_be_paginated(self):
+        response = self.client.get('/pool/all/', {'fields': 'latitude', 'page_size': 3})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['results'], [{'latitude': str(pool.latitude)} for pool in self.pools[:3]])
+
+        response = self.client.get(body['next'])
+        self.assertEqual([row['latitude'] for row in response.json()['results']],
+                         [str(pool.latitude) for pool in self.pools[3:]])
+
+    def test_district_list_with_fields_and_page_size(self):
+        response = self.client.get('/pool/district/cayma/', {'fields': 'latitude', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(set(response.json()['results'][0]), {'latitude'})
+
+    def test_async_list_with_fields_and_page_size(self):
+        response = self.client.get('/pool/async/all/', {'fields': 'latitude', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{'latitude': str(pool.latitude)} for pool in self.pools[:2]])
+
+    def test_fields_without_page_size_omit_id(self):
+        response = self.client.get('/pool/all/', {'fields': 'latitude'})
+        self.assertEqual(response.json(), [{'latitude': str(pool.latitude)} for pool in self.pools])
+
+
+class FieldsValidationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        make_pool(1, rating=Decimal('4.5'))
+
+    def test_internal_columns_are_rejected(self):
+        for name in ('search_text', 'change_seq'):
+            response = self.client.get('/pool/all/', {'fields': name})
+            self.assertEqual(response.status_code, 400, name)
+            self.assertIn('fields', response.json())
+
+    def test_empty_fields_return_the_full_rows(self):
+        response = self.client.get('/pool/all/', {'fields': ','})
+        self.assertEqual(response.status_code, 200)
+        row = response.json()[0]
+        self.assertEqual(row['rating'], '4.5')
+        self.assertNotIn('search_text', row)
+        self.assertNotIn('change_seq', row)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.pools = [make_pool(number) for number in range(2)]
+
+    def test_only_the_etag_validates(self):
+        response = self.client.get('/pool/all/')
+        self.assertNotIn('Last-Modified', response.headers)
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/pool/all/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.pools[1].delete()
+        self.assertEqual(self.client.get('/pool/all/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # Sin Last-Modified, If-Modified-Since no basta para un 304
+        since = 'Wed, 01 Jan 2100 00:00:00 GMT'
+        self.assertEqual(self.client.get('/pool/all/', HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
@@ -0,0 +1,85 @@
+from decimal import Decimal
+import json
+import unittest
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.pools.renderers import ColumnarJSONRenderer, MessagePackRenderer, from_columns, msgpack
+
+from .helpers import make_pool
+
+ROWS = [
+    {'id': 1, 'district': 'Cayma', 'latitude': Decimal('-16.398765600'), 'longitude': None},
+    {'id': 2, 'district': 'Cayma', 'latitude': Decimal('-16.401233700'), 'longitude': Decimal('-71.536969300')},
+    {'id': 3, 'district': 'Yanahuara', 'latitude': None, 'longitude': Decimal('-71.541200000')},
+]
+
+
+class ColumnarRendererTests(SimpleTestCase):
+    def assertRowsClose(self, rows, expected):
+        """Las coordenadas vuelven cuantizadas a float32: ~1 m de error."""
+        self.assertEqual(len(rows), len(expected))
+        for row, original in zip(rows, expected):
+            for name, value in original.items():
+                if name in ('latitude', 'longitude') and value is not None:
+                    self.assertAlmostEqual(row[name], float(value), delta=1e-5)
+                else:
+                    self.assertEqual(row[name], value)
+
+    def test_json_columns(self):
+        body = json.loads(ColumnarJSONRenderer().render(ROWS))
+        self.assertEqual(body['count'], 3)
+        self.assertEqual(body['columns']['id'], [1, 2, 3])
+        self.assertEqual(body['columns']['district'], {'dictionary': ['Cayma', 'Yanahuara'], 'codes': [0, 0, 1]})
+        self.assertEqual(body['columns']['latitude'][0], -16.3987656)
+        self.assertIsNone(body['columns']['latitude'][2])
+        self.assertRowsClose(from_columns(body), ROWS)
+
+    @unittest.skipIf(msgpack is None, 'msgpack is not installed')
+    def test_msgpack_columns(self):
+        body = msgpack.unpackb(MessagePackRenderer().render(ROWS))
+        # 4 bytes por coordenada, float32 little-endian
+        self.assertEqual(len(body['columns']['latitude']), 12)
+        self.assertRowsClose(from_columns(body), ROWS)
+
+    def test_only_rows_become_columns(self):
+        page = {'next': 'https://example.com/?cursor=abc', 'previous': None, 'results': ROWS[:1]}
+        body = json.loads(ColumnarJSONRenderer().render(page))
+        self.assertEqual((body['next'], body['previous']), (page['next'], None))
+        self.assertEqual(body['results']['columns']['id'], [1])
+
+        error = {'detail': 'Not found.'}
+        self.assertEqual(json.loads(ColumnarJSONRenderer().render(error)), error)
+        self.assertEqual(from_columns(json.loads(ColumnarJSONRenderer().render([]))), [])
+
+
+class CompactFormatViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.pools = [make_pool(number, latitude=Decimal('-16.398765600'), longitude=Decimal('-71.536969300'))
+                      for number in range(3)]
+
+    def test_format_by_accept_and_query_parameter(self):
+        expected = self.client.get('/pool/all/').json()
+        response = self.client.get('/pool/all/', HTTP_ACCEPT='application/vnd.pools.columnar+json')
+        self.assertEqual(response['Content-Type'], 'application/vnd.pools.columnar+json')
+        rows = from_columns(response.json())
+        self.assertEqual([row['id'] for row in rows], [row['id'] for row in expected])
+        self.assertEqual(rows[0]['district'], expected[0]['district'])
+
+        response = self.client.get('/pool/all/', {'format': 'columnar'})
+        self.assertEqual(response['Content-Type'], 'application/vnd.pools.columnar+json')
+        self.assertEqual(response.json()['count'], 3)
+
+    @unittest.skipIf(msgpack is None, 'msgpack is not installed')
+    def test_msgpack_page_keeps_the_links(self):
+        response = self.client.get('/pool/all/', {'format': 'msgpack', 'page_size': 2, 'fields': 'id,latitude'})
+        self.assertEqual(response['Content-Type'], 'application/x-msgpack')
+        body = msgpack.unpackb(response.content)
+        self.assertIsNotNone(body['next'])
+        rows = from_columns(body['results'])
+        self.assertEqual([row['id'] for row in rows], [pool.pk for pool in self.pools[:2]])
+        self.assertAlmostEqual(rows[0]['latitude'], -16.3987656, delta=1e-5)
@@ -0,0 +1,95 @@
+import multiprocessing
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.pools.models import Pool
+from apps.pools.response_cache import (
+    ALL_TAG, DjangoCacheBackend, FileBackend, ResponseCache, district_tag, get_response_cache,
+)
+from apps.pools.signals import pools_bulk_changed
+
+from .helpers import make_pool
+
+
+def invalidate_in_child(location, tag):
+    ResponseCache(FileBackend(location)).invalidate(tag)
+
+
+class SharedBackendTests(TestCase):
+    def test_file_backend_invalidation_from_another_process(self):
+        with tempfile.TemporaryDirectory() as location:
+            response_cache = ResponseCache(FileBackend(location))
+            key = response_cache.key(('view',), [district_tag('Cayma')])
+            response_cache.set(key, ['stale'])
+
+            # fork: el hijo abre su propio FileBackend sobre el mismo directorio
+            child = multiprocessing.get_context('fork').Process(
+                target=invalidate_in_child, args=(location, district_tag('cayma')),
+            )
+            child.start()
+            child.join()
+            self.assertEqual(child.exitcode, 0)
+
+            self.assertNotEqual(response_cache.key(('view',), [district_tag('Cayma')]), key)
+
+    def test_django_cache_backend_invalidation_from_another_instance(self):
+        cache.clear()
+        reader, writer = ResponseCache(DjangoCacheBackend()), ResponseCache(DjangoCacheBackend())
+        key = reader.key(('view',), [ALL_TAG, district_tag('Cayma')])
+        other = reader.key(('view',), [ALL_TAG, district_tag('Yanahuara')])
+
+        writer.invalidate(district_tag('Cayma'))
+
+        self.assertNotEqual(reader.key(('view',), [ALL_TAG, district_tag('Cayma')]), key)
+        self.assertEqual(reader.key(('view',), [ALL_TAG, district_tag('Yanahuara')]), other)
+
+    def test_versions_are_read_and_bumped_in_batches(self):
+        backend = DjangoCacheBackend()
+        response_cache = ResponseCache(backend)
+        tags = [ALL_TAG, district_tag('Cayma'), district_tag('Yanahuara')]
+        with mock.patch.object(backend, 'get', wraps=backend.get) as get, \
+                mock.patch.object(backend, 'set', wraps=backend.set) as set_:
+            key = response_cache.key(('view',), tags)
+            response_cache.invalidate(*tags)
+            self.assertNotEqual(response_cache.key(('view',), tags), key)
+        get.assert_not_called()
+        set_.assert_not_called()
+
+
+class ResponseCacheViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.pool = make_pool(1, district='Cayma')
+        make_pool(2, district='Yanahuara')
+
+    def test_default_backend_is_shared(self):
+        self.assertIsInstance(get_response_cache().backend, DjangoCacheBackend)
+
+    def test_save_invalidates_cached_lists(self):
+        self.assertEqual(self.client.get('/pool/district/cayma/').json()[0]['capacity'], 10)
+        self.pool.capacity = 20
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.pool.save()
+        # Hasta el commit la version no cambia
+        self.assertEqual(self.client.get('/pool/district/cayma/').json()[0]['capacity'], 10)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get('/pool/district/cayma/').json()[0]['capacity'], 20)
+        self.assertEqual({row['capacity'] for row in self.client.get('/pool/all/').json()}, {10, 20})
+
+    def test_update_without_signals_is_served_from_cache(self):
+        self.client.get('/pool/district/yanahuara/')
+        Pool.objects.filter(district='Yanahuara').update(capacity=30)
+        self.assertEqual(self.client.get('/pool/district/yanahuara/').json()[0]['capacity'], 10)
+
+    def test_bulk_change_without_details_invalidates_every_list(self):
+        self.client.get('/pool/district/yanahuara/')
+        Pool.objects.filter(district='Yanahuara').update(capacity=30)
+        with self.captureOnCommitCallbacks(execute=True):
+            pools_bulk_changed.send(sender=Pool, fields=['capacity'])
+        self.assertEqual(self.client.get('/pool/district/yanahuara/').json()[0]['capacity'], 30)
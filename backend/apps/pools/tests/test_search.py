@@ -0,0 +1,69 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.pools.search import SearchIndex, reset_search_index
+from apps.pools.text import normalize
+
+from .helpers import make_pool
+
+
+class SearchIndexTests(TestCase):
+    def index(self, documents):
+        index = SearchIndex()
+        for pool_id, text in documents.items():
+            index.add(pool_id, normalize(text))
+        return index
+
+    def test_exact_word_ranks_above_similar_words(self):
+        index = self.index({1: 'Piscina Yanahuara', 2: 'Piscina Yanahuaras Club', 3: 'Club Cayma'})
+        ranked = index.search('yanahuara')
+        self.assertEqual([pool_id for pool_id, _ in ranked], [1, 2])
+        self.assertGreater(ranked[0][1], ranked[1][1])
+
+    def test_accents_typos_and_prefixes(self):
+        index = self.index({1: 'Club Acuático San José', 2: 'Complejo Yanahuara'})
+        self.assertEqual([pool_id for pool_id, _ in index.search(normalize('acuatico'))], [1])
+        self.assertEqual([pool_id for pool_id, _ in index.search(normalize('yanahura'))], [2])
+        self.assertEqual([pool_id for pool_id, _ in index.search(normalize('yanah'))], [2])
+
+    def test_every_query_word_must_match(self):
+        index = self.index({1: 'Club Cayma', 2: 'Club Yanahuara'})
+        self.assertEqual([pool_id for pool_id, _ in index.search('club cayma')], [1])
+        self.assertEqual(index.search('club paucarpata'), [])
+
+    def test_removed_documents_disappear(self):
+        index = self.index({1: 'Club Cayma', 2: 'Club Cayma Norte'})
+        index.remove(1)
+        self.assertEqual([pool_id for pool_id, _ in index.search('cayma')], [2])
+
+
+class PoolSearchViewTests(TestCase):
+    """En SQLite la vista usa el indice en memoria (el camino sin PostgreSQL)."""
+
+    def setUp(self):
+        reset_search_index()
+        self.addCleanup(reset_search_index)
+        self.client = APIClient()
+        self.exact = make_pool(1, commercial_name='Piscina Municipal Cayma')
+        self.fuzzy = make_pool(2, commercial_name='Club Caymas', district='Yanahuara')
+
+    def search(self, query, **params):
+        return self.client.get('/pool/search/', {'q': query, **params})
+
+    def test_results_are_ranked(self):
+        response = self.search('cayma')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([row['id'] for row in results], [self.exact.pk, self.fuzzy.pk])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.search('cayma')
+        self.fuzzy.commercial_name = 'Club Sachaca'
+        self.fuzzy.save()
+        self.exact.delete()
+        self.assertEqual(self.search('cayma').json()['results'], [])
+        self.assertEqual([row['id'] for row in self.search('sachaca').json()['results']], [self.fuzzy.pk])
+
+    def test_short_queries_are_rejected(self):
+        self.assertEqual(self.search('a').status_code, 400)
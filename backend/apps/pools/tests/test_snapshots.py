@@ -0,0 +1,52 @@
+from pathlib import Path
+import stat
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.pools import snapshots, tasks
+
+from .helpers import make_pool
+
+
+class ScheduleRebuildTests(TestCase):
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_save_does_not_rebuild_inline_without_a_broker(self):
+        with mock.patch.object(snapshots, 'build_snapshots') as build, \
+                mock.patch.object(tasks.rebuild_pool_snapshots, 'apply_async') as enqueue, \
+                self.captureOnCommitCallbacks(execute=True):
+            make_pool(1)
+        build.assert_not_called()
+        enqueue.assert_not_called()
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+    def test_save_enqueues_the_rebuild_with_a_broker(self):
+        with mock.patch.object(tasks.rebuild_pool_snapshots, 'apply_async') as enqueue, \
+                self.captureOnCommitCallbacks(execute=True):
+            make_pool(1, district='Cayma')
+        enqueue.assert_called_once()
+        self.assertEqual(enqueue.call_args.kwargs['kwargs']['districts'], ['Cayma'])
+        self.assertEqual(enqueue.call_args.kwargs['countdown'], snapshots.snapshot_settings()['DELAY'])
+
+
+class WriteAtomicTests(SimpleTestCase):
+    def test_files_are_readable_by_other_users(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'pools.json'
+            snapshots.write_atomic(path, b'[]')
+            self.assertEqual(stat.S_IMODE(path.stat().st_mode), 0o644)
+            self.assertEqual(path.read_bytes(), b'[]')
+
+
+class SnapshotDataTests(TestCase):
+    def test_district_ignores_case_and_surrounding_spaces(self):
+        padded = make_pool(1, district=' Cayma ')
+        upper = make_pool(2, district='CAYMA')
+        make_pool(3, district='Yanahuara')
+
+        rows = snapshots.snapshot_data(snapshots.district_key(' Cayma'))
+        self.assertEqual([row['id'] for row in rows], [padded.pk, upper.pk])
+        # Igual que la vista que reemplaza
+        response = self.client.get('/pool/district/cayma/')
+        self.assertEqual(sorted(row['id'] for row in response.json()), [padded.pk, upper.pk])
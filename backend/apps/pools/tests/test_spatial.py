@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.pools.models import Pool
+from apps.pools.spatial import encode, filter_bbox, haversine_km, nearest, prefix_upper_bound
+
+from .helpers import make_pool
+
+
+def make_located_pool(number, latitude, longitude, **fields):
+    return make_pool(number, latitude=Decimal(latitude), longitude=Decimal(longitude), **fields)
+
+
+class GeohashTests(SimpleTestCase):
+    def test_encode(self):
+        self.assertEqual(encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(encode(-16.398766, -71.536969, 5), '6mj4s')
+
+    def test_prefix_upper_bound(self):
+        self.assertEqual(prefix_upper_bound('6mj4'), '6mj5')
+        self.assertEqual(prefix_upper_bound('6mz'), '6n')
+        self.assertIsNone(prefix_upper_bound('zz'))
+
+
+class SpatialQueryTests(TestCase):
+    def setUp(self):
+        # Plaza de Armas de Arequipa y puntos a distancias conocidas hacia el norte
+        self.center = make_located_pool(1, '-16.398766', '-71.536969')
+        self.near = make_located_pool(2, '-16.390000', '-71.536969')
+        self.far = make_located_pool(3, '-16.300000', '-71.536969')
+        self.other_city = make_located_pool(4, '-12.046374', '-77.042793')
+        make_pool(5)
+
+    def test_filter_bbox_uses_exact_bounds(self):
+        pools = filter_bbox(Pool.objects.all(), -71.6, -16.42, -71.5, -16.38)
+        self.assertEqual(sorted(pool.pk for pool in pools), [self.center.pk, self.near.pk])
+
+    def test_nearest_orders_by_distance_and_widens_the_radius(self):
+        matches = nearest(Pool.objects.all(), -16.398, -71.536969, 3, initial_radius_km=0.5)
+        self.assertEqual([pool.pk for _, pool in matches], [self.center.pk, self.near.pk, self.far.pk])
+        distances = [distance for distance, _ in matches]
+        self.assertEqual(distances, sorted(distances))
+        self.assertAlmostEqual(distances[2], haversine_km(-16.398, -71.536969, -16.3, -71.536969))
+
+        # Pide mas de las que hay con coordenadas: devuelve todas, sin las que no tienen
+        self.assertEqual(len(nearest(Pool.objects.all(), -16.398, -71.536969, 10)), 4)
+
+    def test_nearby_view(self):
+        client = APIClient()
+        response = client.get('/pool/nearby/', {'near': '-16.398,-71.536969', 'k': 2, 'fields': 'file_number'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([row['file_number'] for row in response.json()], ['EXP-1', 'EXP-2'])
+        self.assertLess(response.json()[0]['distance_km'], response.json()[1]['distance_km'])
+
+        response = client.get('/pool/nearby/', {'bbox': '-71.6,-16.42,-71.5,-16.38', 'fields': 'id'})
+        self.assertEqual(sorted(row['id'] for row in response.json()), [self.center.pk, self.near.pk])
+
+    def test_nearby_view_validates_parameters(self):
+        client = APIClient()
+        self.assertEqual(client.get('/pool/nearby/').status_code, 400)
+        self.assertEqual(client.get('/pool/nearby/', {'near': '-16.4'}).status_code, 400)
+        self.assertEqual(client.get('/pool/nearby/', {'near': '-96,0'}).status_code, 400)
+        self.assertEqual(client.get('/pool/nearby/', {'near': '-16.4,-71.5', 'k': 101}).status_code, 400)
+        self.assertEqual(client.get('/pool/nearby/', {'bbox': '-71.5,-16.38,-71.6,-16.42'}).status_code, 400)
@@ -0,0 +1,56 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.pools import statistics, tasks
+from apps.pools.models import Pool
+
+from .helpers import make_pool
+
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class RefreshPoolAggregatesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_pool(1)
+
+    def test_warms_the_shared_statistics_cache(self):
+        tasks.refresh_pool_aggregates()
+        with mock.patch.object(statistics, 'compute_dashboard_statistics') as compute:
+            self.assertEqual(statistics.get_dashboard_statistics()['total'], 1)
+        compute.assert_not_called()
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_skips_the_statistics_cache_when_it_is_local(self):
+        with mock.patch.object(tasks, 'get_dashboard_statistics') as warm, \
+                mock.patch.object(tasks, 'invalidate_statistics_cache') as invalidate:
+            tasks.refresh_pool_aggregates()
+        warm.assert_not_called()
+        invalidate.assert_not_called()
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_local_statistics_cache_uses_the_short_timeout(self):
+        with mock.patch.object(statistics.cache, 'set') as cache_set:
+            statistics.get_dashboard_statistics()
+        self.assertEqual(cache_set.call_args.args[2], statistics.LOCAL_STATISTICS_CACHE_TIMEOUT)
+
+
+class ExpireResolutionsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_expired_resolutions_invalidate_the_shared_statistics(self):
+        today = timezone.localdate()
+        make_pool(1, state='RES_VALID', expiration_date=today - timedelta(days=1))
+        make_pool(2, state='RES_VALID', expiration_date=today + timedelta(days=10))
+        self.assertEqual(statistics.get_dashboard_statistics()['by_state'], {'RES_VALID': 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(tasks.expire_resolutions(), {'expired': 1, 'renewed': 0})
+
+        self.assertEqual(Pool.objects.get(file_number='EXP-1').state, 'RES_EXPIRED')
+        self.assertEqual(statistics.get_dashboard_statistics()['by_state'], {'RES_VALID': 1, 'RES_EXPIRED': 1})
@@ -0,0 +1,20 @@
+"""Normalizacion de texto para la busqueda (sin dependencias de modelos)."""
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    """``'Cerro  Colorado (Yanahuará)'`` -> ``'cerro colorado yanahuara'``."""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', stripped.casefold()).strip()
+
+
+def trigrams(word):
+    # Igual que pg_trgm: dos espacios al inicio y uno al final
+    padded = f'  {word} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
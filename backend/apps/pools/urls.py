@@ -3,18 +3,56 @@ from .views import (
     PoolsByStateView,
     PoolsByDistrictView,
     PoolStatisticsView,
+    PoolDashboardStatisticsView,
     PoolFilterView,
+    PoolsNearbyView,
+    PoolClusterTileView,
     AllPoolsView,
+    PoolChangesView,
     PoolListOrDetailView,
-    PoolCreateView
+    PoolCreateView,
+    PoolImportView,
+    PoolBulkUpdateView,
+    PoolImageUploadView,
+    PoolExportView,
+    PoolSearchView,
+    PoolHealthTrendView,
+    PoolInspectionsView,
+)
+from .async_views import (
+    AsyncAllPoolsView,
+    AsyncPoolDetailView,
+    AsyncPoolsByStateView,
+    AsyncPoolsByDistrictView,
+    AsyncPoolStatisticsView,
+    PoolChangeStreamView,
 )
 
 urlpatterns = [
     path('all/', AllPoolsView.as_view(), name='all-pools'),
+    path('changes/', PoolChangesView.as_view(), name='pool-changes'),
     path('create/', PoolCreateView.as_view(), name='pool-create'),
+    path('import/', PoolImportView.as_view(), name='pool-import'),
+    path('bulk-update/', PoolBulkUpdateView.as_view(), name='pool-bulk-update'),
+    path('export/<str:export_format>/', PoolExportView.as_view(), name='pool-export'),
     path('all/<int:pk>/', PoolListOrDetailView.as_view(), name='pool-detail-from-all'),
+    path('all/<int:pk>/inspections/', PoolInspectionsView.as_view(), name='pool-inspections'),
+    path('all/<int:pk>/image/', PoolImageUploadView.as_view(), name='pool-image-upload'),
     path('state/<str:state>/', PoolsByStateView.as_view(), name='pools-by-state'),
     path('district/<str:district>/', PoolsByDistrictView.as_view(), name='pools-by-district'),
     path('statistics/', PoolStatisticsView.as_view(), name='pool-statistics'),
+    path('statistics/dashboard/', PoolDashboardStatisticsView.as_view(), name='pool-dashboard-statistics'),
+    path('statistics/health/', PoolHealthTrendView.as_view(), name='pool-health-trend'),
     path('filters/', PoolFilterView.as_view(), name='pool-filters'),
+    path('search/', PoolSearchView.as_view(), name='pool-search'),
+    path('nearby/', PoolsNearbyView.as_view(), name='pools-nearby'),
+    path('clusters/<int:z>/<int:x>/<int:y>/', PoolClusterTileView.as_view(), name='pool-cluster-tile'),
+
+    # Lecturas nativas de ASGI (ver README: despliegue con uvicorn)
+    path('async/all/', AsyncAllPoolsView.as_view(), name='async-all-pools'),
+    path('async/all/<int:pk>/', AsyncPoolDetailView.as_view(), name='async-pool-detail'),
+    path('async/state/<str:state>/', AsyncPoolsByStateView.as_view(), name='async-pools-by-state'),
+    path('async/district/<str:district>/', AsyncPoolsByDistrictView.as_view(), name='async-pools-by-district'),
+    path('async/statistics/', AsyncPoolStatisticsView.as_view(), name='async-pool-statistics'),
+    path('live/', PoolChangeStreamView.as_view(), name='pool-live'),
 ]
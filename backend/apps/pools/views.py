@@ -1,72 +1,443 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.generics import ListAPIView
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.generics import ListAPIView, ListCreateAPIView, get_object_or_404
+from django.db import transaction
 from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Pool
-from .serializers import PoolSerializer
+from .models import Inspection, Pool, filter_district
+from .images import attach_image, image_payload, store_upload
+from .tasks import process_pool_image
+from .serializers import InspectionSerializer, PoolRowSerializer, PoolSerializer
+from .mixins import (
+    CompactFormatsMixin,
+    ConditionalGetMixin,
+    PoolFastListMixin,
+    PoolProjectionMixin,
+    conditional_get,
+    parse_fields_param,
+)
+from .pagination import PoolCursorPagination, PoolSearchPagination
+from .spatial import filter_bbox, nearest
+from .clustering import MAX_CLUSTER_ZOOM, MAX_TILE_ZOOM, tile_bounds, tile_clusters
+from .exporters import EXPORT_FIELDS, EXPORTERS
+from .importers import import_pools
+from .bulk import bulk_update_pools
+from .permissions import IsInspectorOrAdmin
+from .statistics import DEFAULT_EXPIRING_DAYS, get_dashboard_statistics
+from .inspections import MAX_TREND_MONTHS, health_over_time
+from .changes import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, CursorExpired, changes_since
+from .response_cache import ALL_TAG, PoolResponseCacheMixin, district_tag, state_tag
+from .search import search_pools
+from .text import normalize
+from core.metrics import serializer_timer
 from rest_framework.generics import CreateAPIView
 
 # Vista para listar piscinas por estado
-class PoolsByStateView(APIView):
+class PoolsByStateView(
+    CompactFormatsMixin, PoolResponseCacheMixin, PoolFastListMixin, PoolProjectionMixin, ListAPIView
+):
+    serializer_class = PoolSerializer
+    pagination_class = PoolCursorPagination
     #permission_classes = [IsAuthenticated]
 
-    def get(self, request, state):
-        pools = Pool.objects.filter(state=state)
-        serializer = PoolSerializer(pools, many=True)
-        return Response(serializer.data)
+    def get_cache_tags(self):
+        return [state_tag(self.kwargs['state'])]
+
+    def get_queryset(self):
+        return Pool.objects.filter(state=self.kwargs['state'])
 
 
 # Vista para listar piscinas por distrito
-class PoolsByDistrictView(ListAPIView):
+class PoolsByDistrictView(
+    CompactFormatsMixin, PoolResponseCacheMixin, PoolFastListMixin, PoolProjectionMixin, ListAPIView
+):
     serializer_class = PoolSerializer
+    pagination_class = PoolCursorPagination
     #permission_classes = [IsAuthenticated]
 
+    def get_cache_tags(self):
+        return [district_tag(self.kwargs['district'])]
+
+    def get_cache_kwargs(self):
+        # La busqueda no distingue mayusculas: CAYMA y cayma comparten entrada
+        return [('district', self.kwargs['district'].strip().casefold())]
+
     def get_queryset(self):
-        district = self.kwargs['district']
-        return Pool.objects.filter(district__iexact=district)
+        # Misma normalizacion que la clave del cache (get_cache_kwargs) y las copias estaticas
+        return filter_district(Pool.objects.all(), self.kwargs['district'])
 
 
 # Vista para estadísticas de piscinas por estado
-class PoolStatisticsView(APIView):
+class PoolStatisticsView(ConditionalGetMixin, APIView):
     #permission_classes = [IsAuthenticated]
 
+    @conditional_get
     def get(self, request):
         stats = Pool.objects.values('state').annotate(count=Count('id'))
         return Response(stats)
 
 
+# Vista con todas las cifras del dashboard agregadas en el servidor
+class PoolDashboardStatisticsView(CompactFormatsMixin, ConditionalGetMixin, APIView):
+    #permission_classes = [IsAuthenticated]
+
+    def get_etag_parts(self, request):
+        # La ventana de vencimientos depende del dia actual
+        return super().get_etag_parts(request) + [timezone.localdate().isoformat()]
+
+    @conditional_get
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', DEFAULT_EXPIRING_DAYS))
+        except ValueError:
+            return Response({"detail": "days must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= days <= 365:
+            return Response({"detail": "days must be between 0 and 365."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_dashboard_statistics(days))
+
+
+# Salubridad mes a mes (?district=&months=), leida de los agregados mensuales de inspecciones
+class PoolHealthTrendView(APIView):
+    #permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            months = int(request.query_params.get('months', 12))
+        except ValueError:
+            return Response({"detail": "months must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= months <= MAX_TREND_MONTHS:
+            return Response(
+                {"detail": f"months must be between 1 and {MAX_TREND_MONTHS}."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(health_over_time(request.query_params.get('district'), months))
+
+
 # Vista genérica con filtro avanzado y paginación
-class PoolFilterView(ListAPIView):
+class PoolFilterView(
+    CompactFormatsMixin, ConditionalGetMixin, PoolResponseCacheMixin, PoolFastListMixin, PoolProjectionMixin,
+    ListAPIView,
+):
     queryset = Pool.objects.all()
     serializer_class = PoolSerializer
+    pagination_class = PoolCursorPagination
     #permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['state', 'current_state', 'district']
 
-class AllPoolsView(ListAPIView):
+    def get_cache_tags(self):
+        # Con district o state basta la etiqueta de ese grupo; si no, depende de todas
+        params = self.request.query_params
+        if params.get('district'):
+            return [district_tag(params['district'])]
+        if params.get('state'):
+            return [state_tag(params['state'])]
+        return [ALL_TAG]
+
+
+# Busqueda publica por nombre, expediente, distrito o direccion (?q=), ordenada por relevancia
+class PoolSearchView(APIView):
+    #permission_classes = [IsAuthenticated]
+    result_fields = [
+        'id', 'file_number', 'legal_name', 'commercial_name', 'district', 'address',
+        'state', 'current_state', 'latitude', 'longitude', 'rating',
+    ]
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        if len(normalize(query)) < 2:
+            return Response({"detail": "q must have at least 2 characters."}, status=status.HTTP_400_BAD_REQUEST)
+        row_serializer = PoolRowSerializer(fields=parse_fields_param(request) or self.result_fields)
+        paginator = PoolSearchPagination()
+        page = paginator.paginate_queryset(search_pools(query, row_serializer.field_names), request, view=self)
+        with serializer_timer():
+            data = row_serializer.serialize(page)
+            for row in data:
+                row['rank'] = round(row['rank'], 4)
+        return paginator.get_paginated_response(data)
+
+# Vista para el mapa: piscinas dentro de un viewport (?bbox=) o las k mas cercanas (?near=&k=)
+class PoolsNearbyView(CompactFormatsMixin, PoolFastListMixin, PoolProjectionMixin, ListAPIView):
     queryset = Pool.objects.all()
     serializer_class = PoolSerializer
+    pagination_class = PoolCursorPagination
     #permission_classes = [IsAuthenticated]
-    
-class PoolListOrDetailView(APIView):
+    max_k = 100
+
+    def parse_numbers(self, name, count):
+        raw = self.request.query_params.get(name, '')
+        try:
+            values = [float(value) for value in raw.split(',')]
+        except ValueError:
+            values = []
+        if len(values) != count:
+            raise ValidationError({name: f"Expected {count} comma-separated numbers."})
+        return values
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if 'bbox' not in self.request.query_params:
+            return queryset
+        min_lng, min_lat, max_lng, max_lat = self.parse_numbers('bbox', 4)
+        if min_lng > max_lng or min_lat > max_lat:
+            raise ValidationError({'bbox': "Expected minLng,minLat,maxLng,maxLat."})
+        return filter_bbox(queryset, min_lng, min_lat, max_lng, max_lat)
+
+    def list(self, request, *args, **kwargs):
+        if 'near' not in request.query_params:
+            if 'bbox' not in request.query_params:
+                raise ValidationError({'detail': "Either bbox or near is required."})
+            return super().list(request, *args, **kwargs)
+
+        latitude, longitude = self.parse_numbers('near', 2)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({'near': "Coordinates out of range."})
+        try:
+            k = int(request.query_params.get('k', 10))
+        except ValueError:
+            raise ValidationError({'k': "k must be an integer."})
+        if not 1 <= k <= self.max_k:
+            raise ValidationError({'k': f"k must be between 1 and {self.max_k}."})
+
+        fields = self.get_projection()
+        queryset = Pool.objects.all()
+        if fields:
+            queryset = queryset.only(*fields, 'latitude', 'longitude')
+        results = []
+        matches = nearest(queryset, latitude, longitude, k)
+        with serializer_timer():
+            for distance, pool in matches:
+                data = self.get_serializer(pool).data
+                data['distance_km'] = round(distance, 3)
+                results.append(data)
+        return Response(results)
+
+
+# Vista de clusters por tile para el mapa
+class PoolClusterTileView(APIView):
+    #permission_classes = [IsAuthenticated]
+
+    def get(self, request, z, x, y):
+        if z > MAX_TILE_ZOOM or x >= 1 << z or y >= 1 << z:
+            return Response({"detail": "Tile out of range."}, status=status.HTTP_400_BAD_REQUEST)
+        if z <= MAX_CLUSTER_ZOOM:
+            clusters = tile_clusters(z, x, y)
+        else:
+            # Con tanto zoom el tile es pequeño: se devuelven las piscinas individuales
+            pools = filter_bbox(Pool.objects.all(), *tile_bounds(z, x, y)).values(
+                'id', 'latitude', 'longitude', 'current_state'
+            )
+            clusters = [
+                {
+                    'id': pool['id'],
+                    'latitude': float(pool['latitude']),
+                    'longitude': float(pool['longitude']),
+                    'count': 1,
+                    'healthy': int(pool['current_state'] == 'HEALTHY'),
+                    'unhealthy': int(pool['current_state'] == 'UNHEALTHY'),
+                }
+                for pool in pools
+            ]
+        return Response({'z': z, 'x': x, 'y': y, 'clusters': clusters})
+
+
+class AllPoolsView(CompactFormatsMixin, ConditionalGetMixin, PoolFastListMixin, PoolProjectionMixin, ListAPIView):
+    queryset = Pool.objects.all()
+    serializer_class = PoolSerializer
+    pagination_class = PoolCursorPagination
     #permission_classes = [IsAuthenticated]
 
+
+class PoolChangesView(APIView):
+    """Piscinas creadas o modificadas y ids de las borradas despues de ``?since=<cursor>`` (ver changes.py).
+
+    Sin ``since`` devuelve todo el padron por paginas. El cliente aplica primero
+    ``deleted`` y despues ``changed``, guarda ``cursor`` y repite mientras ``has_more``.
+    """
+    #permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            page_size = int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return Response({"detail": "page_size must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            return Response(
+                {"detail": f"page_size must be between 1 and {MAX_PAGE_SIZE}."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        row_serializer = PoolRowSerializer(fields=parse_fields_param(request))
+        try:
+            with serializer_timer():
+                return Response(changes_since(request.query_params.get('since'), row_serializer, page_size))
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except CursorExpired:
+            return Response(
+                {"detail": "The cursor is too old; sync again without since."}, status=status.HTTP_410_GONE
+            )
+
+
+class PoolListOrDetailView(ConditionalGetMixin, APIView):
+    #permission_classes = [IsAuthenticated]
+
+    def get_permissions(self):
+        # Leer es publico; editar, como en la actualizacion por lotes, solo inspectores y administradores
+        if self.request.method == 'PATCH':
+            return [IsInspectorOrAdmin()]
+        return super().get_permissions()
+
+    def get_validator_queryset(self):
+        pk = self.kwargs.get('pk')
+        return Pool.objects.filter(pk=pk) if pk is not None else Pool.objects.all()
+
+    @conditional_get
     def get(self, request, pk=None):
+        fields = parse_fields_param(request)
+        pools = Pool.objects.only(*fields) if fields else Pool.objects.all()
         if pk is not None:
             try:
-                pool = Pool.objects.get(pk=pk)
-                serializer = PoolSerializer(pool)
-                return Response(serializer.data)
+                pool = pools.get(pk=pk)
+                with serializer_timer():
+                    data = PoolSerializer(pool, fields=fields).data
+                return Response(data)
             except Pool.DoesNotExist:
                 return Response({"detail": "Pool not found."}, status=status.HTTP_404_NOT_FOUND)
         else:
-            pools = Pool.objects.all()
-            serializer = PoolSerializer(pools, many=True)
-            return Response(serializer.data)
+            paginator = PoolCursorPagination()
+            page = paginator.paginate_queryset(pools, request, view=self)
+            if page is not None:
+                with serializer_timer():
+                    data = PoolSerializer(page, many=True, fields=fields).data
+                return paginator.get_paginated_response(data)
+            with serializer_timer():
+                data = PoolSerializer(pools, many=True, fields=fields).data
+            return Response(data)
+
+    def patch(self, request, pk=None):
+        pool = Pool.objects.filter(pk=pk).first()
+        if pool is None:
+            return Response({"detail": "Pool not found."}, status=status.HTTP_404_NOT_FOUND)
+        serializer = PoolSerializer(pool, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+
+# Historial de inspecciones de una piscina (mas recientes primero) y registro de nuevas visitas
+class PoolInspectionsView(ListCreateAPIView):
+    serializer_class = InspectionSerializer
+    pagination_class = PoolSearchPagination
+    #permission_classes = [IsAuthenticated]
+
+    def get_permissions(self):
+        # El historial es publico; registrar visitas, solo inspectores y administradores
+        if self.request.method == 'POST':
+            return [IsInspectorOrAdmin()]
+        return super().get_permissions()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # 404 antes de validar el cuerpo si la piscina no existe
+        self.pool = get_object_or_404(Pool.objects.only('id', 'district'), pk=self.kwargs['pk'])
+
+    def get_queryset(self):
+        return Inspection.objects.filter(pool=self.pool).order_by('-inspection_date', '-id')
+
+    def perform_create(self, serializer):
+        # IsInspectorOrAdmin garantiza un usuario autenticado al escribir
+        serializer.save(pool=self.pool, inspector=self.request.user)
+
         
 class PoolCreateView(CreateAPIView):
     queryset = Pool.objects.all()
     serializer_class = PoolSerializer
-    # permission_classes = [IsAuthenticated]  # Si deseas proteger con login
\ No newline at end of file
+    # permission_classes = [IsAuthenticated]  # Si deseas proteger con login
+
+
+# Vista para importar el padron de DIGESA (CSV o XLSX) de una sola vez
+class PoolImportView(APIView):
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "A file is required."}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        try:
+            report = import_pools(upload, upload.name, dry_run=dry_run)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict())
+
+
+# Vista para subir la foto de una piscina; las miniaturas se generan en segundo plano
+class PoolImageUploadView(APIView):
+    permission_classes = [IsInspectorOrAdmin]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, pk):
+        pool = Pool.objects.filter(pk=pk).first()
+        if pool is None:
+            return Response({"detail": "Pool not found."}, status=status.HTTP_404_NOT_FOUND)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "A file is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            image, created = store_upload(upload)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if image.status == 'FAILED':
+            return Response({"detail": "The image could not be processed."}, status=status.HTTP_400_BAD_REQUEST)
+        attach_image(pool, image)
+        if image.status == 'PENDING':
+            # Una foto repetida (mismo hash) ya tiene miniaturas o ya esta en cola
+            transaction.on_commit(lambda: process_pool_image.delay(image.pk), robust=True)
+        return Response(image_payload(image), status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+# Vista para aplicar muchas actualizaciones parciales (por id o file_number) en una sola transaccion
+class PoolBulkUpdateView(APIView):
+    permission_classes = [IsInspectorOrAdmin]
+
+    def post(self, request):
+        # Acepta la lista directamente o {"items": [...]}
+        items = request.data.get('items') if isinstance(request.data, dict) else request.data
+        atomic = request.query_params.get('atomic') in ('1', 'true')
+        try:
+            report = bulk_update_pools(items, atomic=atomic)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        failed = atomic and report.failed
+        return Response(report.as_dict(), status=status.HTTP_400_BAD_REQUEST if failed else status.HTTP_200_OK)
+
+
+# Vista para descargar el padron completo (o filtrado) en streaming
+class PoolExportView(APIView):
+    #permission_classes = [IsAuthenticated]
+    filterset_fields = ['state', 'current_state', 'district']
+
+    def get(self, request, export_format):
+        if export_format not in EXPORTERS:
+            return Response({"detail": "Unknown export format."}, status=status.HTTP_404_NOT_FOUND)
+        exporter, content_type = EXPORTERS[export_format]
+        queryset = DjangoFilterBackend().filter_queryset(request, Pool.objects.all(), self)
+        fields = parse_fields_param(request) or EXPORT_FIELDS
+
+        content = (chunk.encode('utf-8') for chunk in exporter(queryset, fields))
+        gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if gzip:
+            content = compress_sequence(content)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        if gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response.headers['Content-Disposition'] = f'attachment; filename="pools.{export_format}"'
+        return response
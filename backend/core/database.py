@@ -0,0 +1,48 @@
+"""Manejo de conexiones a PostgreSQL segun ``<PREFIJO>_CONN_MODE``.
+
+- ``none`` (por defecto): cada request abre y cierra su conexion (TCP,
+  autenticacion y configuracion de la sesion cada vez).
+- ``persistent``: cada hilo conserva su conexion ``CONN_MAX_AGE`` segundos y
+  la verifica antes de reutilizarla despues de un error.
+- ``pool``: psycopg_pool mantiene entre ``POOL_MIN_SIZE`` y ``POOL_MAX_SIZE``
+  conexiones por proceso, compartidas por todos los hilos (y por las vistas
+  async bajo ASGI). Cada conexion se verifica al entregarla y se recicla al
+  cumplir ``POOL_MAX_LIFETIME`` segundos o tras ``POOL_MAX_IDLE`` sin uso.
+
+El pool es opcional: cada proceso abre ``POOL_MIN_SIZE`` conexiones al iniciar,
+asi que el total (workers x ``POOL_MAX_SIZE``) debe caber en ``max_connections``.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+CONN_MODES = ('none', 'persistent', 'pool')
+
+
+def connection_settings(env, prefix='DATABASE', mode=None):
+    """Claves de ``DATABASES[alias]`` que definen como se abren y reutilizan las conexiones."""
+    mode = mode or env(f'{prefix}_CONN_MODE', default='none')
+    if mode not in CONN_MODES:
+        raise ImproperlyConfigured(f"{prefix}_CONN_MODE must be one of: {', '.join(CONN_MODES)}.")
+    health_checks = env.bool(f'{prefix}_CONN_HEALTH_CHECKS', default=True)
+    if mode == 'none':
+        return {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': {}}
+    if mode == 'persistent':
+        return {
+            'CONN_MAX_AGE': env.int(f'{prefix}_CONN_MAX_AGE', default=60),
+            'CONN_HEALTH_CHECKS': health_checks,
+            'OPTIONS': {},
+        }
+
+    # Django no admite CONN_MAX_AGE junto con el pool: la conexion vuelve al pool al terminar cada request
+    pool = {
+        'min_size': env.int(f'{prefix}_POOL_MIN_SIZE', default=2),
+        'max_size': env.int(f'{prefix}_POOL_MAX_SIZE', default=10),
+        # Segundos que espera un request por una conexion libre antes de fallar
+        'timeout': env.float(f'{prefix}_POOL_TIMEOUT', default=10.0),
+        'max_lifetime': env.float(f'{prefix}_POOL_MAX_LIFETIME', default=1800.0),
+        'max_idle': env.float(f'{prefix}_POOL_MAX_IDLE', default=300.0),
+        'name': prefix.lower(),
+    }
+    if pool['min_size'] > pool['max_size']:
+        raise ImproperlyConfigured(f"{prefix}_POOL_MIN_SIZE cannot exceed {prefix}_POOL_MAX_SIZE.")
+    # Con CONN_HEALTH_CHECKS Django pasa ConnectionPool.check_connection al pool
+    return {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': health_checks, 'OPTIONS': {'pool': pool}}
@@ -0,0 +1,239 @@
+"""Metricas por vista (tiempo total, tiempo en base de datos, consultas, serializacion y bytes).
+
+Cada worker de gunicorn acumula sus histogramas en memoria y cada
+``METRICS_FLUSH_INTERVAL`` segundos los vuelca a ``METRICS_DIR/worker-<pid>.json``
+(escritura atomica). El endpoint ``/metrics/`` suma los archivos de todos los
+workers y responde en el formato de texto de Prometheus. Al sumar borra los
+archivos de workers que ya no existen (por pid, o sin escribirse en
+``METRICS_STALE_SECONDS``): tras reinicios de gunicorn no se acumulan.
+
+El endpoint pide ``Authorization: Bearer <METRICS_TOKEN>`` o un usuario staff
+con sesion. Detras de un proxy ``REMOTE_ADDR`` es la IP del proxy, asi que no
+sirve para restringirlo.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import hmac
+import json
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+HISTOGRAMS = {
+    'request_duration_seconds': ("Wall time per request.", DURATION_BUCKETS),
+    'db_duration_seconds': ("Time spent in database queries per request.", DURATION_BUCKETS),
+    'serializer_duration_seconds': ("Time spent serializing pools per request.", DURATION_BUCKETS),
+    'response_size_bytes': ("Response body size.", SIZE_BUCKETS),
+}
+COUNTERS = {
+    'db_queries_total': "Database queries issued.",
+}
+PREFIX = 'ips_http_'
+DEFAULT_STALE_SECONDS = 24 * 60 * 60
+
+_request_metrics = ContextVar('request_metrics', default=None)
+
+
+def metrics_dir():
+    return Path(getattr(settings, 'METRICS_DIR', Path(tempfile.gettempdir()) / 'ips-metrics'))
+
+
+class MetricsStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.series = {}
+        self.last_flush = time.monotonic()
+
+    def observe(self, labels, values):
+        """``values``: nombre de histograma o contador -> valor observado."""
+        with self.lock:
+            if self.pid != os.getpid():
+                # Proceso hijo tras un fork (gunicorn --preload): no heredar datos del padre
+                self.reset()
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = {
+                    name: {'buckets': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0}
+                    for name, (_, buckets) in HISTOGRAMS.items()
+                }
+                series.update({name: 0 for name in COUNTERS})
+            for name, value in values.items():
+                if name in COUNTERS:
+                    series[name] += value
+                    continue
+                histogram = series[name]
+                histogram['buckets'][bisect_left(HISTOGRAMS[name][1], value)] += 1
+                histogram['sum'] += value
+                histogram['count'] += 1
+            due = time.monotonic() - self.last_flush >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        if due:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(labels), json.loads(json.dumps(series))] for labels, series in self.series.items()]
+
+    def flush(self):
+        directory = metrics_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(self.snapshot())
+        handle, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        with os.fdopen(handle, 'w') as output:
+            output.write(data)
+        os.replace(temporary, directory / f'worker-{os.getpid()}.json')
+        self.last_flush = time.monotonic()
+
+
+store = MetricsStore()
+
+
+@contextmanager
+def track_request():
+    """Activa la medicion para el request actual y devuelve el acumulador."""
+    current = {'db_duration_seconds': 0.0, 'db_queries_total': 0, 'serializer_duration_seconds': 0.0}
+    token = _request_metrics.set(current)
+    try:
+        yield current
+    finally:
+        _request_metrics.reset(token)
+
+
+@contextmanager
+def serializer_timer():
+    """Suma el tiempo del bloque como tiempo de serializacion del request actual.
+
+    Las consultas que se ejecuten dentro del bloque (querysets perezosos) se descuentan.
+    """
+    current = _request_metrics.get()
+    if current is None:
+        yield
+        return
+    start = time.perf_counter()
+    db_start = current['db_duration_seconds']
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start - (current['db_duration_seconds'] - db_start)
+        current['serializer_duration_seconds'] += elapsed
+
+
+def query_timer(execute, sql, params, many, context):
+    """``execute_wrapper`` de Django que suma el tiempo y el numero de consultas."""
+    current = _request_metrics.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current['db_duration_seconds'] += time.perf_counter() - start
+        current['db_queries_total'] += 1
+
+
+def worker_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Existe, pero es de otro usuario
+        return True
+    return True
+
+
+def is_stale(path, limit):
+    """El archivo es de un worker que ya no corre o lleva mas de ``limit`` segundos sin escribirse."""
+    try:
+        pid = int(path.stem.removeprefix('worker-'))
+    except ValueError:
+        return True
+    if pid == os.getpid():
+        return False
+    try:
+        return not worker_alive(pid) or path.stat().st_mtime < limit
+    except OSError:
+        return True
+
+
+def collect():
+    """Suma los archivos de todos los workers (incluido el actual, recien volcado) y borra los viejos."""
+    store.flush()
+    merged = {}
+    limit = time.time() - getattr(settings, 'METRICS_STALE_SECONDS', DEFAULT_STALE_SECONDS)
+    for path in metrics_dir().glob('worker-*.json'):
+        if is_stale(path, limit):
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            workers = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for labels, series in workers:
+            target = merged.setdefault(tuple(labels), None)
+            if target is None:
+                merged[tuple(labels)] = series
+                continue
+            for name, value in series.items():
+                if name in COUNTERS:
+                    target[name] += value
+                else:
+                    target[name]['sum'] += value['sum']
+                    target[name]['count'] += value['count']
+                    target[name]['buckets'] = [a + b for a, b in zip(target[name]['buckets'], value['buckets'])]
+    return merged
+
+
+def _labels(labels, extra=''):
+    view, method, status = labels
+    text = f'view="{view}",method="{method}",status="{status}"'
+    return '{' + text + (',' + extra if extra else '') + '}'
+
+
+def render_prometheus(merged):
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        metric = PREFIX + name
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+        for labels, series in sorted(merged.items()):
+            histogram = series[name]
+            cumulative = 0
+            for bound, count in zip([*buckets, '+Inf'], histogram['buckets']):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f'{metric}_bucket{_labels(labels, le)} {cumulative}')
+            lines.append(f'{metric}_sum{_labels(labels)} {histogram["sum"]}')
+            lines.append(f'{metric}_count{_labels(labels)} {histogram["count"]}')
+    for name, help_text in COUNTERS.items():
+        metric = PREFIX + name
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+        for labels, series in sorted(merged.items()):
+            lines.append(f'{metric}{_labels(labels)} {series[name]}')
+    return '\n'.join(lines) + '\n'
+
+
+def is_authorized(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    if token and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), token.encode()):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+def metrics_view(request):
+    if not is_authorized(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
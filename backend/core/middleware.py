@@ -0,0 +1,223 @@
+from contextlib import ExitStack
+import os
+import time
+from urllib.parse import urlparse
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import InterfaceError, OperationalError, connections
+from social_django.middleware import SocialAuthExceptionMiddleware
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import NotARegularFileError
+from whitenoise.string_utils import ensure_leading_trailing_slash
+
+from .metrics import query_timer, store, track_request
+from .routers import SELECTIONS, replica_failed, replica_settings, request_scope
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class AsyncCapableMiddleware:
+    """Permite que la cadena de middlewares siga en modo async bajo ASGI.
+
+    Si un solo middleware es solo sincrono, Django envuelve el resto con
+    ``async_to_sync`` y cada request vuelve a ocupar un hilo.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+
+class RequestMetricsMiddleware:
+    """Registra por nombre de URL el tiempo total, el de base de datos, las consultas y los bytes."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with track_request() as current, ExitStack() as stack:
+            self.wrap_connections(stack)
+            response = self.get_response(request)
+            elapsed = time.perf_counter() - start
+        return self.record(request, response, current, elapsed)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        with track_request() as current:
+            # Las conexiones son por hilo: el ORM async consulta desde el hilo
+            # thread-sensitive del request, asi que los wrappers se instalan ahi
+            stack = ExitStack()
+            await sync_to_async(self.wrap_connections)(stack)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+            elapsed = time.perf_counter() - start
+        return self.record(request, response, current, elapsed)
+
+    @staticmethod
+    def wrap_connections(stack):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(query_timer))
+
+    @staticmethod
+    def record(request, response, current, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match and match.url_name else 'unresolved'
+        if view == 'metrics':
+            return response
+        size = 0 if response.streaming else len(response.content)
+        store.observe(
+            (view, request.method, f'{response.status_code // 100}xx'),
+            {
+                'request_duration_seconds': elapsed,
+                'db_duration_seconds': current['db_duration_seconds'],
+                'db_queries_total': current['db_queries_total'],
+                'serializer_duration_seconds': current['serializer_duration_seconds'],
+                'response_size_bytes': size,
+            },
+        )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Habilita las replicas de lectura durante el request (ver ``core.routers``).
+
+    Un request que escribe deja una cookie por ``PIN_SECONDS``: las lecturas
+    siguientes del mismo cliente van al primario y ven su propia escritura aunque
+    la replica todavia no la haya recibido.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = replica_settings()
+        if self.config['SELECTION'] not in SELECTIONS:
+            raise ImproperlyConfigured(f"DATABASE_REPLICAS['SELECTION'] must be one of: {', '.join(SELECTIONS)}.")
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_scope(self.pinned(request)) as state:
+            response = self.get_response(request)
+        return self.remember(response, state)
+
+    async def __acall__(self, request):
+        with request_scope(self.pinned(request)) as state:
+            response = await self.get_response(request)
+        return self.remember(response, state)
+
+    def pinned(self, request):
+        return request.method not in SAFE_METHODS or self.config['PIN_COOKIE'] in request.COOKIES
+
+    def remember(self, response, state):
+        if state.wrote and self.config['ALIASES']:
+            response.set_cookie(
+                self.config['PIN_COOKIE'], '1', max_age=self.config['PIN_SECONDS'], httponly=True, samesite='Lax'
+            )
+        return response
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, (OperationalError, InterfaceError)):
+            replica_failed()
+
+
+class AsyncSocialAuthExceptionMiddleware(AsyncCapableMiddleware, SocialAuthExceptionMiddleware):
+    # Solo implementa process_exception, que Django invoca igual en ambos modos
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+class AsyncWhiteNoiseMiddleware(AsyncCapableMiddleware, WhiteNoiseMiddleware):
+    """WhiteNoise en ambos modos que ademas sirve ``MEDIA_URL``.
+
+    Los archivos subidos aparecen en tiempo de ejecucion, asi que se buscan en
+    disco la primera vez. Los de ``WHITENOISE_IMMUTABLE_MEDIA_DIRS`` se nombran por
+    su contenido: se memorizan y se sirven con cache ``immutable`` de un año.
+    """
+
+    def __init__(self, get_response=None):
+        # Se fijan antes del __init__ de WhiteNoise porque este ya llama a immutable_file_test
+        media_url = urlparse(getattr(settings, 'MEDIA_URL', None) or '').path
+        media_root = getattr(settings, 'MEDIA_ROOT', None)
+        self.media_prefix = ensure_leading_trailing_slash(media_url) if media_url and media_root else None
+        self.media_root = os.path.join(os.path.abspath(media_root), '') if self.media_prefix else None
+        self.immutable_media_prefixes = tuple(
+            f"{self.media_prefix}{directory.strip('/')}/"
+            for directory in getattr(settings, 'WHITENOISE_IMMUTABLE_MEDIA_DIRS', [])
+        ) if self.media_prefix else ()
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        static_file = self.get_file(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        static_file = None if self.autorefresh else self.files.get(request.path_info)
+        if static_file is None and (self.autorefresh or self.is_media(request.path_info)):
+            static_file = await sync_to_async(self.get_file)(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+    def get_file(self, url):
+        static_file = self.find_file(url) if self.autorefresh else self.files.get(url)
+        if static_file is None and self.is_media(url):
+            static_file = self.find_media_file(url)
+        return static_file
+
+    def is_media(self, url):
+        return self.media_prefix is not None and url.startswith(self.media_prefix)
+
+    def find_media_file(self, url):
+        if not self.url_is_canonical(url):
+            return None
+        path = os.path.join(self.media_root, url[len(self.media_prefix):])
+        if os.path.commonprefix((self.media_root, path)) != self.media_root:
+            return None
+        try:
+            static_file = self.get_static_file(path, url)
+        except NotARegularFileError:
+            return None
+        if url.startswith(self.immutable_media_prefixes):
+            self.files[url] = static_file
+        return static_file
+
+    def immutable_file_test(self, path, url):
+        if self.immutable_media_prefixes and url.startswith(self.immutable_media_prefixes):
+            return True
+        return super().immutable_file_test(path, url)
@@ -0,0 +1,185 @@
+"""Router que envia las lecturas de ``apps.pools`` a replicas de solo lectura.
+
+Solo se usan replicas dentro de un request (``ReplicaPinningMiddleware`` abre el
+ambito); las tareas de Celery y los comandos leen siempre del primario. Dentro
+de un request las lecturas van al primario si:
+
+- el metodo no es seguro (POST, PATCH...) o el cliente trae la cookie de una
+  escritura reciente (``PIN_SECONDS``, el retraso de replicacion tolerado);
+- el request ya escribio algo, o hay una transaccion abierta en el primario;
+- ninguna replica esta sana.
+
+Un error de conexion con una replica la marca como caida hasta la proxima
+verificacion.
+
+Cada request usa una sola replica para todas sus lecturas (el conteo y la pagina
+de un listado salen de la misma). La replica se elige por turnos
+(``round_robin``) o por menos requests en curso en este proceso
+(``least_loaded``). La salud de cada replica se verifica como mucho cada
+``HEALTH_CHECK_INTERVAL`` segundos: debe responder y, en PostgreSQL, no estar
+mas de ``MAX_LAG`` segundos atrasada. El atraso solo se mide si la replica tiene
+WAL recibido sin aplicar; si no, es 0.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import itertools
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+DEFAULT_SETTINGS = {
+    'ALIASES': [],
+    'APPS': ['pools'],
+    'SELECTION': 'round_robin',
+    'PIN_SECONDS': 5,
+    'PIN_COOKIE': 'db_primary',
+    'MAX_LAG': 10.0,
+    'HEALTH_CHECK_INTERVAL': 5.0,
+}
+SELECTIONS = ('round_robin', 'least_loaded')
+# Sin WAL pendiente de aplicar la replica esta al dia aunque el primario no escriba
+# hace rato (``now() - pg_last_xact_replay_timestamp()`` creceria sin parar)
+LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() IS NOT DISTINCT FROM pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+def replica_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'DATABASE_REPLICAS', {})}
+
+
+class RequestState:
+    __slots__ = ('pinned', 'wrote', 'alias')
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+        self.alias = None
+
+
+class ReplicaPool:
+    """Eleccion y salud de las replicas, compartidas por los hilos del proceso."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.turns = itertools.count()
+        self.in_flight = {}
+        # alias -> (sana, momento de la ultima verificacion)
+        self.health = {}
+
+    def is_healthy(self, alias, config):
+        now = time.monotonic()
+        with self.lock:
+            healthy, checked_at = self.health.get(alias, (True, None))
+            if checked_at is not None and now - checked_at < config['HEALTH_CHECK_INTERVAL']:
+                return healthy
+            # Un solo hilo verifica; los demas siguen con el ultimo resultado
+            self.health[alias] = (healthy, now)
+        healthy = self.check(alias, config)
+        with self.lock:
+            self.health[alias] = (healthy, time.monotonic())
+        return healthy
+
+    @staticmethod
+    def check(alias, config):
+        replica = connections[alias]
+        try:
+            with replica.cursor() as cursor:
+                if replica.vendor != 'postgresql':
+                    cursor.execute("SELECT 1")
+                    return True
+                cursor.execute(LAG_QUERY)
+                return float(cursor.fetchone()[0]) <= config['MAX_LAG']
+        except DatabaseError:
+            replica.close()
+            return False
+
+    def acquire(self, config):
+        candidates = [alias for alias in config['ALIASES'] if self.is_healthy(alias, config)]
+        if not candidates:
+            return None
+        with self.lock:
+            turn = next(self.turns)
+            if config['SELECTION'] == 'least_loaded':
+                # Empates por turnos, para no cargar siempre la primera
+                order = candidates[turn % len(candidates):] + candidates[:turn % len(candidates)]
+                alias = min(order, key=lambda name: self.in_flight.get(name, 0))
+            else:
+                alias = candidates[turn % len(candidates)]
+            self.in_flight[alias] = self.in_flight.get(alias, 0) + 1
+        return alias
+
+    def release(self, alias):
+        with self.lock:
+            self.in_flight[alias] -= 1
+
+    def mark_unhealthy(self, alias):
+        with self.lock:
+            self.health[alias] = (False, time.monotonic())
+
+
+replicas = ReplicaPool()
+
+
+@contextmanager
+def request_scope(pinned=False):
+    """Ambito de un request: habilita las replicas y devuelve su estado (``wrote`` indica si escribio)."""
+    state = RequestState(pinned)
+    token = _request_state.set(state)
+    try:
+        yield state
+    finally:
+        _request_state.reset(token)
+        if state.alias not in (None, DEFAULT_DB_ALIAS):
+            replicas.release(state.alias)
+
+
+def replica_failed():
+    """Marca como caida la replica que usaba el request actual, si tenia una."""
+    state = _request_state.get()
+    if state is not None and state.alias not in (None, DEFAULT_DB_ALIAS):
+        replicas.mark_unhealthy(state.alias)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        config = replica_settings()
+        if (
+            state is None
+            or state.pinned
+            or state.wrote
+            or not config['ALIASES']
+            or model._meta.app_label not in config['APPS']
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        if state.alias is None:
+            state.alias = replicas.acquire(config) or DEFAULT_DB_ALIAS
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        # Explicito: si no, Django escribiria en la base de la que se leyo la instancia
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_settings()['ALIASES']}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las replicas reciben el esquema por replicacion
+        if db in replica_settings()['ALIASES']:
+            return False
+        return None
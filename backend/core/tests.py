@@ -0,0 +1,179 @@
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+import environ
+
+from apps.pools.models import Pool
+from apps.pools.tests.helpers import make_user
+from core import metrics, routers
+from core.database import connection_settings
+from core.middleware import ReplicaPinningMiddleware
+
+
+class MetricsViewTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(METRICS_DIR=self.directory, METRICS_TOKEN='s3cret')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write_worker(self, pid, age=0):
+        path = os.path.join(self.directory, f'worker-{pid}.json')
+        with open(path, 'w') as output:
+            json.dump(metrics.store.snapshot(), output)
+        if age:
+            os.utime(path, (time.time() - age, time.time() - age))
+        return path
+
+    def test_requires_the_token_or_a_staff_user(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+        self.client.force_login(make_user('vecino'))
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.client.force_login(make_user('operador', is_staff=True))
+        self.assertEqual(self.client.get('/metrics/').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_empty_token_is_never_accepted(self):
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    def test_prunes_files_of_dead_and_stale_workers(self):
+        # Un pid por encima de pid_max no existe; el proceso padre si
+        dead = self.write_worker(2 ** 22 + 1)
+        alive = self.write_worker(os.getppid())
+
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+        self.assertFalse(os.path.exists(dead))
+        self.assertTrue(os.path.exists(alive))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, f'worker-{os.getpid()}.json')))
+
+        # Vivo pero sin escribir desde hace mas de METRICS_STALE_SECONDS
+        self.write_worker(os.getppid(), age=2 * metrics.DEFAULT_STALE_SECONDS)
+        self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertFalse(os.path.exists(alive))
+
+
+class FakeReplica:
+    """Conexion de PostgreSQL falsa que responde ``LAG_QUERY`` con ``lag``."""
+
+    vendor = 'postgresql'
+
+    def __init__(self, lag=0):
+        self.lag = lag
+        self.closed = False
+
+    def cursor(self):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value = cursor
+        if isinstance(self.lag, Exception):
+            cursor.execute.side_effect = self.lag
+        cursor.fetchone.return_value = (self.lag,)
+        return cursor
+
+    def close(self):
+        self.closed = True
+
+
+@override_settings(DATABASE_REPLICAS={'ALIASES': ['replica_1'], 'HEALTH_CHECK_INTERVAL': 0, 'MAX_LAG': 10.0})
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        routers.replicas.health.clear()
+        self.replica = FakeReplica()
+        databases = {DEFAULT_DB_ALIAS: connections[DEFAULT_DB_ALIAS], 'replica_1': self.replica}
+        patcher = mock.patch.object(routers, 'connections', databases)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(routers.replicas.health.clear)
+
+    def read_alias(self, method='get', cookies=None, write=False):
+        """Pasa un request por ``ReplicaPinningMiddleware``: ``(alias de lectura, respuesta)``."""
+        router = routers.ReplicaRouter()
+        seen = {}
+
+        def view(request):
+            if write:
+                router.db_for_write(Pool)
+            seen['alias'] = router.db_for_read(Pool)
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/pool/all/')
+        request.COOKIES.update(cookies or {})
+        response = ReplicaPinningMiddleware(view)(request)
+        return seen['alias'], response
+
+    def test_reads_go_to_a_healthy_replica(self):
+        self.assertEqual(self.read_alias()[0], 'replica_1')
+        # Fuera de un request (tareas, comandos) se lee del primario
+        self.assertEqual(routers.ReplicaRouter().db_for_read(Pool), DEFAULT_DB_ALIAS)
+
+    def test_writes_go_to_the_primary_and_pin_the_client(self):
+        self.assertEqual(routers.ReplicaRouter().db_for_write(Pool), DEFAULT_DB_ALIAS)
+        alias, response = self.read_alias(method='post', write=True)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        self.assertIn('db_primary', response.cookies)
+
+        # Con la cookie las lecturas siguientes van al primario
+        self.assertEqual(self.read_alias(cookies={'db_primary': '1'})[0], DEFAULT_DB_ALIAS)
+        self.assertEqual(self.read_alias()[0], 'replica_1')
+
+    def test_reads_after_a_write_in_the_same_request_stay_on_the_primary(self):
+        alias, response = self.read_alias(write=True)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        self.assertIn('db_primary', response.cookies)
+
+    def test_lagging_or_failing_replica_falls_back_to_the_primary(self):
+        self.replica.lag = 30.0
+        self.assertEqual(self.read_alias()[0], DEFAULT_DB_ALIAS)
+        self.replica.lag = 2.0
+        self.assertEqual(self.read_alias()[0], 'replica_1')
+
+        self.replica.lag = OperationalError('replica down')
+        self.assertEqual(self.read_alias()[0], DEFAULT_DB_ALIAS)
+        self.assertTrue(self.replica.closed)
+
+
+class ConnectionSettingsTests(SimpleTestCase):
+    def settings_for(self, **variables):
+        with mock.patch.dict(os.environ, variables, clear=True):
+            return connection_settings(environ.Env())
+
+    def test_pooling_is_opt_in(self):
+        self.assertEqual(self.settings_for(), {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': {}})
+
+    def test_persistent_connections(self):
+        config = self.settings_for(DATABASE_CONN_MODE='persistent', DATABASE_CONN_MAX_AGE='120')
+        self.assertEqual(config, {'CONN_MAX_AGE': 120, 'CONN_HEALTH_CHECKS': True, 'OPTIONS': {}})
+
+    def test_pool(self):
+        config = self.settings_for(
+            DATABASE_CONN_MODE='pool', DATABASE_POOL_MAX_SIZE='4', DATABASE_CONN_HEALTH_CHECKS='false',
+        )
+        # Django no acepta CONN_MAX_AGE con el pool
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS']['pool'], {
+            'min_size': 2, 'max_size': 4, 'timeout': 10.0, 'max_lifetime': 1800.0, 'max_idle': 300.0,
+            'name': 'database',
+        })
+
+        with mock.patch.dict(os.environ, {'DATABASE_REPLICA_CONN_MODE': 'pool'}, clear=True):
+            replica = connection_settings(environ.Env(), prefix='DATABASE_REPLICA')
+        self.assertEqual(replica['OPTIONS']['pool']['name'], 'database_replica')
+
+    def test_invalid_settings(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'DATABASE_CONN_MODE must be one of'):
+            self.settings_for(DATABASE_CONN_MODE='pgbouncer')
+        with self.assertRaisesMessage(ImproperlyConfigured, 'cannot exceed'):
+            self.settings_for(DATABASE_CONN_MODE='pool', DATABASE_POOL_MIN_SIZE='8', DATABASE_POOL_MAX_SIZE='4')
@@ -44,6 +44,37 @@ export const updatePool = async (poolId: number, poolData: Partial<Pool>): Promi
     }
 };
 
+export type PoolBulkUpdate = Partial<Pool> & ({ id: number } | { file_number: string });
+
+export interface PoolBulkUpdateResult {
+    index: number;
+    status: 'updated' | 'skipped' | 'error';
+    id?: number;
+    file_number?: string;
+    errors?: Record<string, string[]>;
+}
+
+export interface PoolBulkUpdateReport {
+    updated: number;
+    failed: number;
+    results: PoolBulkUpdateResult[];
+}
+
+/**
+ * Actualiza muchas piscinas en una sola peticion (identificadas por id o file_number).
+ * @param updates - Cambios parciales de cada piscina.
+ * @param atomic - Si es true, un item invalido cancela todo el lote.
+ */
+export const bulkUpdatePools = async (updates: PoolBulkUpdate[], atomic = false): Promise<PoolBulkUpdateReport> => {
+    try {
+        const res = await API.post('pool/bulk-update/', updates, { params: atomic ? { atomic: 'true' } : undefined });
+        return res.data;
+    } catch (error) {
+        console.error('Error bulk updating pools:', error);
+        throw new Error('Error al actualizar las piscinas.');
+    }
+};
+
 /**
  * Cambia el estado (activo/inactivo) de una piscina.
  * @param poolId - ID de la piscina.
@@ -19,6 +19,7 @@ export interface Pool {
   latitude?: number;
   longitude?: number;
   image_url?: string;
+  image_srcset?: string;
   rating?: number;
   is_active?: boolean;  // si lo necesitas en PoolManager
 }
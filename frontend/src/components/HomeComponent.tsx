@@ -4,23 +4,32 @@ import Mapa from './Mapa';
 import { Pool } from '../types/Pool';
 import { Link } from "react-router-dom";
 import axios from 'axios';
+import { applyPoolChanges, subscribePoolChanges } from '../utils/poolChanges';
 
 function HomeComponent() {
   const [pools, setPools] = useState<Pool[]>([]);
   const [selectedPool, setSelectedPool] = useState<Pool | null>(null);
 
   useEffect(() => {
-    axios.get('http://127.0.0.1:8000/pool/all/')
-      .then((res) => {
-        setPools(res.data);
-        if (res.data.length > 0) {
-          setSelectedPool(res.data[0]); // selecciona el primero por defecto
-        }
-        console.log('✅ Piscinas cargadas:', res.data);
-      })
-      .catch((err) => {
-        console.error('❌ Error al obtener las piscinas:', err);
-      });
+    const loadPools = () => {
+      axios.get('http://127.0.0.1:8000/pool/all/')
+        .then((res) => {
+          setPools(res.data);
+          setSelectedPool((current) => current
+            ? res.data.find((pool: Pool) => pool.id === current.id) ?? null
+            : res.data[0] ?? null); // selecciona el primero por defecto
+          console.log('✅ Piscinas cargadas:', res.data);
+        })
+        .catch((err) => {
+          console.error('❌ Error al obtener las piscinas:', err);
+        });
+    };
+
+    // La lista se carga al conectar al feed y despues solo se aplican los cambios
+    return subscribePoolChanges((events) => {
+      setPools((current) => applyPoolChanges(current, events));
+      setSelectedPool((current) => current && (applyPoolChanges([current], events)[0] ?? null));
+    }, loadPools);
   }, []);
 
   const handlePoolSelect = (pool: Pool) => {
@@ -12,6 +12,7 @@ interface Pool {
   id: number | string;
   commercial_name: string;
   image_url?: string;
+  image_srcset?: string;
   description?: string;
   rating: number;
   comments: Comment[];
@@ -48,6 +49,8 @@ const PoolComponent = () => {
         <div className="col-md-5 p-0">
           <img
             src={pool.image_url || "https://via.placeholder.com/500x300?text=Sin+imagen"}
+            srcSet={pool.image_srcset || undefined}
+            sizes="(min-width: 768px) 40vw, 100vw"
             className="img-fluid rounded-start w-100 h-100"
             style={{ maxHeight: "300px", objectFit: "cover" }}
             alt={`Piscina ${pool.commercial_name}`}
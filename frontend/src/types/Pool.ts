@@ -7,6 +7,7 @@ export interface Pool {
   latitude: number;
   longitude: number;
   image_url?: string;
+  image_srcset?: string;
   rating: number;
   current_state: string;
 }
@@ -0,0 +1,104 @@
+import axios from 'axios';
+import { Pool } from '../types/Pool';
+
+export type PoolChangeEvent =
+  | { type: 'update'; id: number; changes: Partial<Pool> }
+  | { type: 'create'; id: number; pool: Partial<Pool> }
+  | { type: 'delete'; id: number }
+  | { type: 'resync' };
+
+/**
+ * Escucha el feed de cambios de piscinas (/pool/live/, Server-Sent Events).
+ * @param onEvents - Lote de cambios a aplicar sobre la lista cargada.
+ * @param onResync - Se llama al conectar y cuando se perdieron cambios: hay que volver a pedir /pool/all/.
+ * @returns Funcion que cierra la conexion.
+ */
+export function subscribePoolChanges(
+  onEvents: (events: PoolChangeEvent[]) => void,
+  onResync: () => void,
+): () => void {
+  // EventSource reconecta solo y manda Last-Event-ID: el servidor reenvia lo que falto
+  const source = new EventSource('http://127.0.0.1:8000/pool/live/');
+  let closed = false;
+  // Los lotes se aplican en orden aunque completar un `create` tarde
+  let pending = Promise.resolve();
+  source.addEventListener('ready', onResync);
+  source.addEventListener('resync', onResync);
+  source.addEventListener('pools', (message) => {
+    const events: PoolChangeEvent[] = JSON.parse((message as MessageEvent).data);
+    pending = pending.then(async () => {
+      if (events.some((event) => event.type === 'resync')) {
+        onResync();
+        return;
+      }
+      try {
+        const completed = await completeCreates(events);
+        if (!closed) {
+          onEvents(completed);
+        }
+      } catch (err) {
+        console.error('❌ Error al completar las piscinas nuevas:', err);
+        if (!closed) {
+          onResync();
+        }
+      }
+    });
+  });
+  return () => {
+    closed = true;
+    source.close();
+  };
+}
+
+/**
+ * Reemplaza el `pool` de cada evento `create` por la piscina completa.
+ * El feed solo trae los campos que cambian en el mapa, y la lista necesita todos.
+ * Si la piscina ya se borro (404), el evento se descarta: su `delete` viene despues.
+ */
+async function completeCreates(events: PoolChangeEvent[]): Promise<PoolChangeEvent[]> {
+  const completed = await Promise.all(
+    events.map(async (event): Promise<PoolChangeEvent | null> => {
+      if (event.type !== 'create') {
+        return event;
+      }
+      try {
+        const res = await axios.get<Pool>(`http://127.0.0.1:8000/pool/all/${event.id}/`);
+        return { ...event, pool: res.data };
+      } catch (err) {
+        if (axios.isAxiosError(err) && err.response?.status === 404) {
+          return null;
+        }
+        throw err;
+      }
+    }),
+  );
+  return completed.filter((event): event is PoolChangeEvent => event !== null);
+}
+
+/**
+ * Aplica un lote de cambios a la lista de piscinas sin volver a descargarla.
+ */
+export function applyPoolChanges(pools: Pool[], events: PoolChangeEvent[]): Pool[] {
+  let result = pools;
+  for (const event of events) {
+    if (event.type === 'update') {
+      result = result.map((pool) => (pool.id === event.id ? { ...pool, ...normalize(event.changes) } : pool));
+    } else if (event.type === 'delete') {
+      result = result.filter((pool) => pool.id !== event.id);
+    } else if (event.type === 'create' && !result.some((pool) => pool.id === event.id)) {
+      result = [...result, { id: event.id, ...normalize(event.pool) } as Pool];
+    }
+  }
+  return result;
+}
+
+// El API manda los decimales como texto
+function normalize(values: Partial<Pool>): Partial<Pool> {
+  const copy: Record<string, unknown> = { ...values };
+  for (const name of ['latitude', 'longitude', 'rating']) {
+    if (typeof copy[name] === 'string') {
+      copy[name] = Number(copy[name]);
+    }
+  }
+  return copy as Partial<Pool>;
+}